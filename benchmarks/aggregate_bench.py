@@ -0,0 +1,65 @@
+"""Signature aggregation against a chain of pairwise merges.
+
+  python benchmarks/aggregate_bench.py --participants 10 1000 100000
+
+For every participant count, aggregates that many signatures, once by
+folding Signature.merge, which pays an inversion per signature, and once
+with Signature.aggregate for every --workers count, best of up to five
+runs. The commitments are consecutive multiples of G, which are cheap to
+make and as good as random points for timing purposes.
+"""
+import argparse
+import functools
+import time
+
+from toycrypto.asymmetric import Signature
+
+
+def signatures(n):
+  ec = Signature.Hfield.ec
+  (K, G) = (ec.O, Signature.Hfield.g)
+  result = []
+  for i in range(n):
+    K = ec.plus(K, G)
+    result.append(Signature(Signature.nF.make(i), K))
+  return result
+
+
+def timed(fn, repeat):
+  """fn's result and its best time over repeat calls."""
+  best = None
+  for i in range(repeat):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return (result, best)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--participants',
+                      type=int,
+                      nargs='+',
+                      default=[10, 1000, 100000])
+  parser.add_argument('--workers', type=int, nargs='+', default=[1, 2])
+  parser.add_argument('--chunk-size', type=int, default=4096)
+  args = parser.parse_args()
+
+  print("%-12s %-14s %10s %12s" % ("signatures", "method", "ms", "sigs/s"))
+  for n in args.participants:
+    sigs = signatures(n)
+    repeat = max(1, min(5, 10000 // n))
+    (merged, t) = timed(lambda: functools.reduce(Signature.merge, sigs), repeat)
+    print("%-12d %-14s %10.2f %12.0f" % (n, "merge chain", 1e3 * t, n / t))
+    for workers in args.workers:
+      (aggregated, t) = timed(
+          lambda: Signature.aggregate(iter(sigs), workers, args.chunk_size),
+          repeat)
+      assert aggregated == merged
+      print("%-12d %-14s %10.2f %12.0f" %
+            (n, "aggregate x%d" % workers, 1e3 * t, n / t))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,64 @@
+"""Z arithmetic per backend and operand size.
+
+  python benchmarks/backend_bench.py --bits 256 1024 2048 4096
+
+Times multiply-and-reduce, modular exponentiation and inversion on random
+operands for every backend in primefields.BACKENDS, and the speedup over
+the pure Python backend.
+"""
+import argparse
+import math
+import random
+import time
+
+from toycrypto.primefields import BACKENDS, Z
+
+
+def timeOp(op, args, repeat):
+  start = time.perf_counter()
+  for i in range(repeat):
+    for a in args:
+      op(a)
+  return (time.perf_counter() - start) / (repeat * len(args))
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--bits',
+                      type=int,
+                      nargs='+',
+                      default=[256, 1024, 2048, 4096])
+  parser.add_argument('--seed', type=int, default=1)
+  args = parser.parse_args()
+
+  rng = random.Random(args.seed)
+  print("%6s %-8s %-6s %12s %8s" %
+        ("bits", "op", "backend", "us/op", "speedup"))
+  for bits in args.bits:
+    n = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+    # Units only, so that every value can be inverted.
+    values = []
+    while len(values) < 16:
+      v = rng.randrange(1, n)
+      if math.gcd(v, n) == 1:
+        values.append(v)
+    e = rng.getrandbits(bits)
+    baseline = {}
+    for (name, backend) in sorted(BACKENDS.items(),
+                                  key=lambda x: x[0] != 'python'):
+      f = Z(n, backend)
+      elements = [f.make(v) for v in values]
+      ops = [
+          ('mul', lambda a: f.mul(a, a), 2000),
+          ('pow', lambda a: a.scalarPow(e), max(1, 2**20 // bits**2 * 8)),
+          ('invert', lambda a: a.mulInv(), 50),
+      ]
+      for (op, fn, repeat) in ops:
+        seconds = timeOp(fn, elements, repeat)
+        baseline.setdefault(op, seconds)
+        print("%6d %-8s %-6s %12.2f %8.2f" %
+              (bits, op, name, 1e6 * seconds, baseline[op] / seconds))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,74 @@
+"""Discrete logarithm throughput on weak curves.
+
+Solves random discrete logarithms on supersingular curves y^2 = x^3 + x over
+Z(4 q - 1), which have 4 q points, in the subgroup of prime order q:
+
+  python benchmarks/dlog_bench.py --bits 30 36 40 --workers 4
+"""
+import argparse
+import random
+import time
+
+from toycrypto import dlog
+from toycrypto.ec import EC, ECSubfield
+from toycrypto.primefields import Z, isProbablePrime
+
+
+def weakCurve(bits, rng):
+  """Returns an ECSubfield of prime order with the given bit length."""
+  while True:
+    q = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+    if isProbablePrime(q) and isProbablePrime(4 * q - 1):
+      break
+  z = Z(4 * q - 1)
+  ec = EC(z, z.make(1), z.make(0))
+  while True:
+    p = ec.fromX(z.make(rng.randrange(4 * q - 1)))
+    if p is not None:
+      g = p.scalarMul(4)
+      if not g.isPlusID():
+        return ECSubfield(ec, g, q)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--bits', type=int, nargs='+', default=[30, 34, 38])
+  parser.add_argument('--workers', type=int, default=None)
+  parser.add_argument('--bsgs-max-bits',
+                      type=int,
+                      default=36,
+                      help='skip baby-step giant-step above this order size')
+  parser.add_argument('--seed', type=int, default=1)
+  args = parser.parse_args()
+
+  rng = random.Random(args.seed)
+  print("%5s %6s %10s %12s %16s" %
+        ("bits", "method", "seconds", "steps", "steps/s/core"))
+  for bits in args.bits:
+    group = weakCurve(bits, rng)
+    x = rng.randrange(group.order)
+    h = group.make(x)
+
+    if bits <= args.bsgs_max_bits:
+      start = time.time()
+      assert dlog.bsgs(group, group.g, h, group.order) == x
+      seconds = time.time() - start
+      print("%5d %6s %10.2f" % (bits, "bsgs", seconds))
+
+    reports = []
+    start = time.time()
+    assert dlog.rho(group,
+                    group.g,
+                    h,
+                    group.order,
+                    workers=args.workers,
+                    progress=reports.append,
+                    seed=rng.getrandbits(64)) == x
+    seconds = time.time() - start
+    last = reports[-1]
+    print("%5d %6s %10.2f %12d %16.0f" %
+          (bits, "rho", seconds, last.steps, last.stepsPerSecondPerCore))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,53 @@
+"""Scalar multiplication latency on Ed25519 and its Weierstrass form.
+
+  python benchmarks/edwards_bench.py --count 200
+
+Multiplies the generator with the same random scalars on Ed25519 in
+extended coordinates, and on the birationally equivalent Curve25519 in
+short Weierstrass form, both affine, i.e. EC.plus, and in Jacobian
+coordinates. Prints the mean, spread and tail of the latencies.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from toycrypto import curves
+
+
+def latencies(fn, scalars):
+  result = []
+  for n in scalars:
+    start = time.perf_counter()
+    fn(n)
+    result.append(time.perf_counter() - start)
+  return result
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--count', type=int, default=100)
+  parser.add_argument('--seed', type=int, default=1)
+  args = parser.parse_args()
+
+  edwards = curves.edwards('Ed25519')
+  weierstrass = curves.get('Curve25519')
+  ec = weierstrass.ec
+  rng = random.Random(args.seed)
+  scalars = [rng.randrange(1, edwards.order) for i in range(args.count)]
+  models = [
+      ('Edwards extended', lambda n: edwards.g.scalarMul(n)),
+      ('Weierstrass affine', lambda n: weierstrass.g.scalarMul(n)),
+      ('Weierstrass Jacobian',
+       lambda n: ec._fromJacobian(ec._jacobianScalarMul(weierstrass.g, n))),
+  ]
+  print("%-22s %10s %10s %10s" % ("model", "mean ms", "stdev ms", "p99 ms"))
+  for (name, fn) in models:
+    t = sorted(latencies(fn, scalars))
+    print("%-22s %10.3f %10.3f %10.3f" %
+          (name, 1e3 * statistics.mean(t), 1e3 * statistics.pstdev(t),
+           1e3 * t[int(0.99 * (len(t) - 1))]))
+
+
+if __name__ == '__main__':
+  main()
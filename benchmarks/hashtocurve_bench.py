@@ -0,0 +1,64 @@
+"""Hash-to-curve throughput on secp256k1 against try-and-increment.
+
+  python benchmarks/hashtocurve_bench.py --count 500
+
+Try-and-increment hashes the message with a counter to an x value until
+EC.fromX finds a point, and needs two square roots on average. The RFC 9380
+maps need a fixed amount of work per message, and their batched versions
+share all inversions of a batch. Prints messages per second and the spread
+of the single message latencies.
+"""
+import argparse
+import hashlib
+import statistics
+import time
+
+from toycrypto import curves, hashtocurve
+
+DST = b'toycrypto-bench'
+
+
+def tryAndIncrement(ec, msg):
+  ctr = 0
+  while True:
+    digest = hashlib.sha256(DST + msg + ctr.to_bytes(4, 'big')).digest()
+    p = ec.fromX(ec.field.make(int.from_bytes(digest, 'big')))
+    if p is not None:
+      return p
+    ctr += 1
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--count', type=int, default=200)
+  parser.add_argument('--chunk-size', type=int, default=256)
+  args = parser.parse_args()
+
+  ec = curves.get('secp256k1').ec
+  sswu = hashtocurve.secp256k1(DST)
+  svdw = hashtocurve.HashToCurve(hashtocurve.SVDW(ec), DST)
+  msgs = [b'message %d' % i for i in range(args.count)]
+  single = [
+      ('try-and-increment', lambda m: tryAndIncrement(ec, m)),
+      ('SSWU hash', sswu.hash),
+      ('SSWU encode', sswu.encode),
+      ('SVDW hash', svdw.hash),
+  ]
+  print("%-22s %10s %10s %10s" % ("method", "msgs/s", "stdev us", "max us"))
+  for (name, fn) in single:
+    t = []
+    for m in msgs:
+      start = time.perf_counter()
+      fn(m)
+      t.append(time.perf_counter() - start)
+    print("%-22s %10.1f %10.1f %10.1f" %
+          (name, len(t) / sum(t), 1e6 * statistics.pstdev(t), 1e6 * max(t)))
+  for (name, h) in [('SSWU hashMany', sswu), ('SVDW hashMany', svdw)]:
+    start = time.perf_counter()
+    for p in h.hashMany(msgs, args.chunk_size):
+      pass
+    print("%-22s %10.1f" % (name, len(msgs) / (time.perf_counter() - start)))
+
+
+if __name__ == '__main__':
+  main()
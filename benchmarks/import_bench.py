@@ -0,0 +1,47 @@
+"""Start-up cost of importing toycrypto modules.
+
+  python benchmarks/import_bench.py --runs 20 toycrypto.asymmetric
+
+Every import runs in a fresh interpreter, and we report the median time of
+the import alone and of the first use of the secp256k1 constants, which are
+built lazily.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+CODE = """
+import time
+start = time.perf_counter()
+import %s
+imported = time.perf_counter()
+from toycrypto import curves
+curves.get('secp256k1')
+print(imported - start, time.perf_counter() - imported)
+"""
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('modules',
+                      nargs='*',
+                      default=['toycrypto.asymmetric', 'toycrypto.ec'])
+  parser.add_argument('--runs', type=int, default=10)
+  args = parser.parse_args()
+
+  print("%-24s %12s %12s" % ("module", "import ms", "first use ms"))
+  for module in args.modules:
+    imports = []
+    uses = []
+    for i in range(args.runs):
+      out = subprocess.check_output([sys.executable, '-c', CODE % module])
+      (imported, used) = map(float, out.split())
+      imports.append(imported)
+      uses.append(used)
+    print("%-24s %12.2f %12.2f" % (module, 1000 * statistics.median(imports),
+                                   1000 * statistics.median(uses)))
+
+
+if __name__ == '__main__':
+  main()
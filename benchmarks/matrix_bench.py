@@ -0,0 +1,62 @@
+"""Matrix products and elimination over a 256-bit prime field.
+
+  python benchmarks/matrix_bench.py --sizes 32 64 128 256 512
+
+Times the classic product, the Strassen product, the determinant and the
+inverse of random n x n matrices over Z(secp256k1's p). The classic product
+is timed by raising matrix.STRASSEN_THRESHOLD above n, which tells where the
+threshold should sit on this machine.
+"""
+import argparse
+import random
+import time
+
+from toycrypto import matrix
+from toycrypto.curves import SECP256K1
+from toycrypto.matrix import Matrix
+from toycrypto.primefields import Z
+
+
+def timeOnce(fn):
+  start = time.perf_counter()
+  fn()
+  return time.perf_counter() - start
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--sizes',
+                      type=int,
+                      nargs='+',
+                      default=[32, 64, 128, 256, 512])
+  parser.add_argument('--seed', type=int, default=1)
+  args = parser.parse_args()
+
+  rng = random.Random(args.seed)
+  field = Z(SECP256K1.p)
+  print("%5s %12s %12s %12s %12s" %
+        ("n", "mul s", "strassen s", "det s", "inverse s"))
+  threshold = matrix.STRASSEN_THRESHOLD
+  for n in args.sizes:
+    (a, b) = [
+        Matrix.fromRows(field, [[rng.randrange(field.order)
+                                 for j in range(n)]
+                                for i in range(n)])
+        for k in range(2)
+    ]
+    try:
+      matrix.STRASSEN_THRESHOLD = n + 1
+      classic = timeOnce(lambda: a.mul(b))
+    finally:
+      matrix.STRASSEN_THRESHOLD = threshold
+    strassen = float('nan')
+    if n >= threshold:
+      strassen = timeOnce(lambda: a.mul(b))
+    det = timeOnce(a.determinant)
+    inverse = timeOnce(a.inverse)
+    print("%5d %12.3f %12.3f %12.3f %12.3f" %
+          (n, classic, strassen, det, inverse))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,61 @@
+"""Pairings per second, and field operations per pairing.
+
+  python benchmarks/pairing_bench.py --curve bn254
+
+Times single pairings and a product of --pairs pairings, which shares one
+Miller loop and final exponentiation. The operation counts are those of
+one pairing, from instrument.Counters, per field.
+"""
+import argparse
+import time
+
+from toycrypto import instrument, pairing
+
+CURVES = {
+    'supersingular': pairing.supersingular,
+    'bn254': pairing.bn254,
+}
+
+
+def rate(fn, minTime):
+  calls = 0
+  start = time.perf_counter()
+  while time.perf_counter() - start < minTime:
+    fn()
+    calls += 1
+  return calls / (time.perf_counter() - start)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--curve', choices=sorted(CURVES), action='append')
+  parser.add_argument('--pairs', type=int, default=4)
+  parser.add_argument('--min-time', type=float, default=2.0)
+  args = parser.parse_args()
+
+  for name in args.curve or sorted(CURVES):
+    e = CURVES[name]()
+    (P, Q) = (e.g1.g, e.g2.g)
+    pairs = [(P.scalarMul(i + 2), Q) for i in range(args.pairs)]
+    print("%s, embedding degree %d" % (name, e.k))
+    print("  pair:         %8.2f/s" % rate(lambda: e.pair(P, Q), args.min_time))
+    print("  miller:       %8.2f/s" %
+          rate(lambda: e.miller([(P, Q)]), args.min_time))
+    f = e.miller([(P, Q)])
+    print("  final exp:    %8.2f/s" %
+          rate(lambda: e.finalExponentiation(f), args.min_time))
+    print("  product of %d: %7.2f/s" %
+          (args.pairs, rate(lambda: e.pairProduct(pairs), args.min_time)))
+    with instrument.Counters() as counters:
+      e.pair(P, Q)
+    p = str(e.gt.field.order)
+    for (field, counts) in sorted(counters.counts.items()):
+      if field == instrument.label(e):
+        continue
+      print("  %s" % field.replace(p, 'p'))
+      print("    " +
+            ", ".join("%s %d" % (op, n) for (op, n) in sorted(counts.items())))
+
+
+if __name__ == '__main__':
+  main()
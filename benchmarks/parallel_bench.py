@@ -0,0 +1,46 @@
+"""Scaling of parallel.scalarMulMany with the number of workers.
+
+  python benchmarks/parallel_bench.py --count 2000 --workers 1 2 4 8 16 32
+
+Multiplies the secp256k1 generator with --count random scalars, as in key
+generation, or with --distinct, distinct points with one scalar each, as
+in verification.
+"""
+import argparse
+import random
+import time
+
+from toycrypto import parallel
+from toycrypto.asymmetric import Signature
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--count', type=int, default=500)
+  parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+  parser.add_argument('--distinct', action='store_true')
+  parser.add_argument('--seed', type=int, default=1)
+  args = parser.parse_args()
+
+  rng = random.Random(args.seed)
+  group = Signature.Hfield
+  scalars = [rng.randrange(1, group.order) for i in range(args.count)]
+  points = group.g
+  if args.distinct:
+    points = list(
+        group.makeMany(
+            rng.randrange(1, group.order) for i in range(args.count)))
+
+  print("%8s %10s %12s %8s" % ("workers", "seconds", "mults/s", "speedup"))
+  base = None
+  for workers in args.workers:
+    start = time.time()
+    parallel.scalarMulMany(group, scalars, points, workers=workers)
+    seconds = time.time() - start
+    base = base or seconds
+    print("%8d %10.2f %12.1f %8.2f" %
+          (workers, seconds, args.count / seconds, base / seconds))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,57 @@
+"""Reed-Solomon throughput in MB/s of data, per vectors backend.
+
+  python benchmarks/reedsolomon_bench.py --k 10 --m 4 --shard-size 65536
+
+Times encoding, decoding of intact shards, rebuilding m lost data shards
+with and without the error check, and correcting a shard that has an error
+in every 64th byte, which goes through the scalar decoder.
+"""
+import argparse
+import random
+import time
+
+from toycrypto.reedsolomon import VECTORS, ReedSolomon
+
+
+def rate(fn, megabytes, minTime=1.0):
+  calls = 0
+  start = time.perf_counter()
+  while time.perf_counter() - start < minTime:
+    fn()
+    calls += 1
+  return calls * megabytes / (time.perf_counter() - start)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--k', type=int, default=10)
+  parser.add_argument('--m', type=int, default=4)
+  parser.add_argument('--shard-size', type=int, default=65536)
+  parser.add_argument('--seed', type=int, default=1)
+  args = parser.parse_args()
+
+  rng = random.Random(args.seed)
+  size = args.shard_size
+  data = [rng.randbytes(size) for i in range(args.k)]
+  megabytes = args.k * size / 1e6
+  print("RS(%d, %d), %d byte shards" % (args.k + args.m, args.k, size))
+  print("%-8s %-20s %10s" % ("vectors", "operation", "MB/s"))
+  for name in sorted(VECTORS):
+    rs = ReedSolomon(args.k, args.m, vectors=name)
+    shards = data + rs.encode(data)
+    lost = [None] * args.m + shards[args.m:]
+    corrupted = list(shards)
+    corrupted[0] = bytes(b ^ (i % 64 == 0) for (i, b) in enumerate(shards[0]))
+    ops = [
+        ('encode', lambda: rs.encode(data)),
+        ('decode intact', lambda: rs.decode(shards)),
+        ('rebuild unchecked', lambda: rs.decode(lost, errors=False)),
+        ('rebuild checked', lambda: rs.decode(lost)),
+        ('correct 1/64', lambda: rs.decode(corrupted)),
+    ]
+    for (op, fn) in ops:
+      print("%-8s %-20s %10.2f" % (name, op, rate(fn, megabytes)))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,53 @@
+"""Cost of SAG ring signatures versus ring size.
+
+  python benchmarks/ring_bench.py --sizes 2 4 8 16 32 64 128 256 512 1024
+
+Reports signing, plain verification, the one-off per-ring precomputation
+and verification against the precomputed ring, in seconds.
+"""
+import argparse
+import random
+import time
+
+from toycrypto.asymmetric import RingSignatureEC, Signature
+
+
+def timed(f, *args):
+  start = time.time()
+  result = f(*args)
+  return (result, time.time() - start)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--sizes', type=int, nargs='+', default=[2, 4, 8, 16, 32])
+  parser.add_argument('--seed', type=int, default=1)
+  args = parser.parse_args()
+
+  random.seed(args.seed)
+  order = Signature.Hfield.order
+  m = b'benchmark message'
+  others = list(
+      Signature.Hfield.makeMany(
+          random.randrange(1, order) for i in range(max(args.sizes) - 1)))
+  priv_key = Signature.gen_private_key()
+
+  # Build the generator table outside of the measurements.
+  RingSignatureEC._generatorTable()
+
+  print(
+      "%6s %9s %9s %11s %12s %14s" %
+      ("ring", "sign", "verify", "precompute", "verify(pre)", "verify/member"))
+  for n in args.sizes:
+    (sig, sign) = timed(RingSignatureEC.sign, priv_key, others[:n - 1], m)
+    (ok, verify) = timed(sig.verify, m)
+    assert ok
+    (pre, precompute) = timed(RingSignatureEC.precompute, sig.ring)
+    (ok, verifyPre) = timed(sig.verify, m, pre)
+    assert ok
+    print("%6d %9.3f %9.3f %11.3f %12.3f %14.4f" %
+          (n, sign, verify, precompute, verifyPre, verifyPre / n))
+
+
+if __name__ == '__main__':
+  main()
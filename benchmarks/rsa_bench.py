@@ -0,0 +1,51 @@
+"""RSA key generation time and private operation throughput.
+
+  python benchmarks/rsa_bench.py --bits 2048 3072 4096 --primes 2 3 4
+
+The private operation is measured via CRT and, as a baseline, as a single
+exponentiation y^d mod n.
+"""
+import argparse
+import random
+import time
+
+from toycrypto import rsa
+
+
+def opsPerSecond(f, y, seconds):
+  n = 0
+  start = time.time()
+  while time.time() - start < seconds:
+    f(y)
+    n += 1
+  return n / (time.time() - start)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--bits', type=int, nargs='+', default=[2048, 3072, 4096])
+  parser.add_argument('--primes', type=int, nargs='+', default=[2, 3, 4])
+  parser.add_argument('--seconds',
+                      type=float,
+                      default=1.0,
+                      help='time spent measuring each private operation')
+  parser.add_argument('--seed', type=int, default=1)
+  args = parser.parse_args()
+
+  rng = random.Random(args.seed)
+  print("%6s %6s %10s %12s %14s" %
+        ("bits", "primes", "keygen s", "private/s", "no CRT/s"))
+  for bits in args.bits:
+    for nprimes in args.primes:
+      start = time.time()
+      key = rsa.PrivateKey.generate(bits, nprimes, rng=rng)
+      keygen = time.time() - start
+      y = rng.randrange(key.n)
+      crt = opsPerSecond(key.trapdoorInvert, y, args.seconds)
+      plain = opsPerSecond(lambda y: pow(y, key.d, key.n), y, args.seconds)
+      print("%6d %6d %10.2f %12.1f %14.1f" %
+            (bits, nprimes, keygen, crt, plain))
+
+
+if __name__ == '__main__':
+  main()
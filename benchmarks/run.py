@@ -0,0 +1,243 @@
+"""Benchmark suite across the arithmetic layers, with regression tracking.
+
+  python benchmarks/run.py --output results.json
+  python benchmarks/run.py --baseline baseline.json --threshold 0.1
+  python benchmarks/run.py --results results.json --baseline baseline.json
+
+Every benchmark runs its operation in a loop until --min-time has passed,
+and records the best seconds per operation over --repeat such loops, as the
+minimum is the least noisy estimate on a busy machine. Results are written
+as JSON together with metadata about the machine and the checkout.
+
+With --baseline, results are compared against a stored results file, and
+every benchmark that got slower by more than --threshold is reported. The
+exit status is then 1 if there were regressions. With --results, an
+existing results file is compared instead of running the suite.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+
+from toycrypto import curves
+from toycrypto.asymmetric import Signature
+from toycrypto.gfpof import GFPOF
+from toycrypto.pof import POF
+from toycrypto.primefields import DEFAULT_BACKEND, Z
+
+# Primes p = 3 mod 4 of various sizes, so that Z(p) has a sqrt.
+PRIMES = {
+    127: 2**127 - 1,
+    256: 2**256 - 2**32 - 977,
+    521: 2**521 - 1,
+    2203: 2**2203 - 1,
+}
+
+# Reduction polynomials as lists of exponents.
+GF2_8 = [8, 4, 3, 1, 0]
+GF2_163 = [163, 7, 6, 3, 0]
+
+
+def zBenchmarks(rng):
+  for (bits, p) in sorted(PRIMES.items()):
+    f = Z(p)
+    a = f.make(rng.randrange(1, p))
+    b = f.make(rng.randrange(1, p))
+    square = f.mul(a, a)
+    e = rng.getrandbits(bits)
+    yield ('Z%d.mul' % bits, lambda: f.mul(a, b))
+    yield ('Z%d.mulInv' % bits, a.mulInv)
+    yield ('Z%d.pow' % bits, lambda: a.scalarPow(e))
+    yield ('Z%d.sqrt' % bits, square.sqrt)
+
+
+def randomPolynomial(pof, degree, rng):
+  order = pof.field.order
+  return pof.make([rng.randrange(order) for i in range(degree)] + [1])
+
+
+def pofBenchmarks(rng):
+  pof = POF(Z(2**31 - 1))
+  for degree in (8, 32, 128):
+    a = randomPolynomial(pof, degree, rng)
+    b = randomPolynomial(pof, degree, rng)
+    divisor = randomPolynomial(pof, degree // 2, rng)
+    product = pof.mul(a, b)
+    yield ('POF.deg%d.mul' % degree, lambda: pof.mul(a, b))
+    yield ('POF.deg%d.longDiv' % degree, lambda: pof.longDiv(product, divisor))
+
+
+def gf2(exponents):
+  z = Z(2)
+  return GFPOF(z, POF(z).make({e: 1 for e in exponents}))
+
+
+def gfpofBenchmarks(rng):
+  p = PRIMES[256]
+  zp = Z(p)
+  fields = [
+      ('GF2^8', gf2(GF2_8)),
+      ('GF2^163', gf2(GF2_163)),
+      # x^2 + 1 is irreducible, as -1 is not a square for p = 3 mod 4.
+      ('GFp^2', GFPOF(zp,
+                      POF(zp).make([1, 0, 1]))),
+  ]
+  for (name, field) in fields:
+    degree = field.rp.getDegree()
+    order = field.field.order
+    a = field.make([rng.randrange(1, order) for i in range(degree)])
+    b = field.make([rng.randrange(1, order) for i in range(degree)])
+    yield ('%s.mul' % name, lambda: field.mul(a, b))
+    yield ('%s.mulInv' % name, a.mulInv)
+
+
+def ecBenchmarks(rng):
+  curve = curves.get('secp256k1')
+  ec = curve.ec
+  P = curve.make(rng.randrange(1, curve.order))
+  Q = curve.make(rng.randrange(1, curve.order))
+  n = rng.randrange(1, curve.order)
+  yield ('EC.plus', lambda: ec.plus(P, Q))
+  yield ('EC.double', lambda: ec.plus(P, P))
+  yield ('EC.scalarMul', lambda: P.scalarMul(n))
+  yield ('EC.jacobianScalarMul',
+         lambda: ec._fromJacobian(ec._jacobianScalarMul(P, n)))
+
+
+def signatureBenchmarks(rng):
+  x = Signature.gen_private_key()
+  X = Signature.make_pub_key(x)
+  e = rng.getrandbits(256)
+  sig = Signature.sign(e, x)
+  yield ('Signature.sign', lambda: Signature.sign(e, x))
+  yield ('Signature.verify', lambda: sig.verify(X, e))
+
+
+SUITES = [
+    zBenchmarks, pofBenchmarks, gfpofBenchmarks, ecBenchmarks,
+    signatureBenchmarks
+]
+
+
+def measure(fn, minTime, repeat):
+  """Best seconds per call of fn over repeat loops of at least minTime."""
+  best = None
+  for i in range(repeat):
+    calls = 0
+    start = time.perf_counter()
+    while True:
+      fn()
+      calls += 1
+      elapsed = time.perf_counter() - start
+      if elapsed >= minTime:
+        break
+    perCall = elapsed / calls
+    best = perCall if best is None else min(best, perCall)
+  return best
+
+
+def machine():
+  """Metadata to tell apart results from different machines and trees."""
+  try:
+    commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                     stderr=subprocess.DEVNULL,
+                                     cwd=os.path.dirname(__file__)).decode()
+  except (OSError, subprocess.CalledProcessError):
+    commit = None
+  return {
+      'python': platform.python_version(),
+      'implementation': platform.python_implementation(),
+      'platform': platform.platform(),
+      'processor': platform.processor() or platform.machine(),
+      'cpus': os.cpu_count(),
+      'backend': DEFAULT_BACKEND.name,
+      'commit': commit and commit.strip(),
+      'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+  }
+
+
+def run(pattern, minTime, repeat, seed):
+  rng = random.Random(seed)
+  results = {}
+  for suite in SUITES:
+    for (name, fn) in suite(rng):
+      if not re.search(pattern, name):
+        continue
+      seconds = measure(fn, minTime, repeat)
+      results[name] = seconds
+      print("%-28s %14.2f us" % (name, 1e6 * seconds), file=sys.stderr)
+  return results
+
+
+def compare(results, baseline, threshold):
+  """Prints the changes against baseline, returns the regressed names."""
+  regressions = []
+  print("%-28s %12s %12s %8s" %
+        ("benchmark", "baseline us", "current us", "ratio"))
+  for name in sorted(set(results) & set(baseline)):
+    ratio = results[name] / baseline[name]
+    flag = ''
+    if ratio > 1 + threshold:
+      flag = '  REGRESSION'
+      regressions.append(name)
+    elif ratio < 1 / (1 + threshold):
+      flag = '  faster'
+    print("%-28s %12.2f %12.2f %8.2f%s" %
+          (name, 1e6 * baseline[name], 1e6 * results[name], ratio, flag))
+  for name in sorted(set(baseline) - set(results)):
+    print("%-28s missing from the current results" % name)
+  return regressions
+
+
+def main():
+  parser = argparse.ArgumentParser(
+      description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--filter',
+                      default='',
+                      help='only run benchmarks matching this regex')
+  parser.add_argument('--min-time', type=float, default=0.2)
+  parser.add_argument('--repeat', type=int, default=3)
+  parser.add_argument('--seed', type=int, default=1)
+  parser.add_argument('--output', help='write the results to this file')
+  parser.add_argument('--results', help='compare this file instead of running')
+  parser.add_argument('--baseline', help='results file to compare against')
+  parser.add_argument('--threshold',
+                      type=float,
+                      default=0.1,
+                      help='relative slowdown reported as a regression')
+  args = parser.parse_args()
+
+  if args.results:
+    with open(args.results) as f:
+      data = json.load(f)
+  else:
+    data = {
+        'machine': machine(),
+        'minTime': args.min_time,
+        'repeat': args.repeat,
+        'results': run(args.filter, args.min_time, args.repeat, args.seed),
+    }
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump(data, f, indent=2, sort_keys=True)
+
+  if args.baseline:
+    with open(args.baseline) as f:
+      baseline = json.load(f)
+    if baseline['machine'].get('processor') != data['machine'].get('processor'):
+      print("Warning: the baseline was measured on a different processor",
+            file=sys.stderr)
+    regressions = compare(data['results'], baseline['results'], args.threshold)
+    if regressions:
+      print("%d regressions beyond %d%%" %
+            (len(regressions), 100 * args.threshold))
+      sys.exit(1)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,69 @@
+"""Verification throughput of SignatureService against a thread pool.
+
+  python benchmarks/service_bench.py --requests 500 --max-batch 1 16 64
+
+Submits --requests concurrent verifications, once to a thread pool running
+Signature.verify for each, and once per --max-batch to a SignatureService
+with --workers processes. Prints requests per second, the mean batch size
+and the p50 and p99 latencies.
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import time
+
+from toycrypto.asymmetric import Signature
+from toycrypto.service import Metrics, SignatureService
+
+
+async def threads(items, workers):
+  loop = asyncio.get_running_loop()
+  with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+    return await asyncio.gather(
+        *
+        [loop.run_in_executor(pool, sig.verify, X, e) for (sig, X, e) in items])
+
+
+async def service(items, args, maxBatch):
+  async with SignatureService(maxBatch, args.max_delay,
+                              args.workers) as service:
+    # Warm up the worker processes.
+    await service.verify(*items[0])
+    service.metrics = Metrics()
+    results = await asyncio.gather(*[service.verify(*i) for i in items])
+    return (results, service.metrics)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--requests', type=int, default=300)
+  parser.add_argument('--max-batch', type=int, nargs='+', default=[1, 16, 64])
+  parser.add_argument('--max-delay', type=float, default=0.005)
+  parser.add_argument('--workers', type=int)
+  args = parser.parse_args()
+
+  xs = [Signature.gen_private_key() for i in range(16)]
+  items = []
+  for (i, X) in enumerate(Signature.make_pub_keys(xs)):
+    items.append((Signature.sign(i + 1, xs[i]), X, i + 1))
+  items = [items[i % len(items)] for i in range(args.requests)]
+
+  print("%-18s %10s %10s %10s %10s" %
+        ("", "req/s", "batch", "p50 ms", "p99 ms"))
+  start = time.perf_counter()
+  assert all(asyncio.run(threads(items, args.workers or 4)))
+  print("%-18s %10.1f" % ("thread pool", len(items) /
+                          (time.perf_counter() - start)))
+  for maxBatch in args.max_batch:
+    start = time.perf_counter()
+    (results, metrics) = asyncio.run(service(items, args, maxBatch))
+    elapsed = time.perf_counter() - start
+    assert all(results)
+    m = metrics.toDict()
+    print("%-18s %10.1f %10.1f %10.1f %10.1f" %
+          ("service batch %d" % maxBatch, len(items) / elapsed,
+           m['meanBatchSize'], 1e3 * m['p50'], 1e3 * m['p99']))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,56 @@
+"""Throughput of Signature.verifyBatch versus batch size.
+
+  python benchmarks/verify_batch_bench.py --sizes 1 10 100 1000 10000
+
+Signatures are made with the batched ECSubfield.makeMany, as signing them
+one by one would dominate the run time. With --single, plain verify is
+measured on the smallest batch size for comparison.
+"""
+import argparse
+import random
+import time
+
+from toycrypto.asymmetric import Signature
+
+
+def makeItems(n, rng):
+  """Returns n valid (signature, pubKey, e) triples."""
+  nF = Signature.nF
+  order = Signature.Hfield.order
+  xs = [rng.randrange(1, order) for i in range(n)]
+  ks = [rng.randrange(1, order) for i in range(n)]
+  es = [rng.getrandbits(256) for i in range(n)]
+  pubKeys = Signature.Hfield.makeMany(xs)
+  Ks = Signature.Hfield.makeMany(ks)
+  return [(Signature(nF.make((k + x * e) % order), K), X, e)
+          for (x, k, e, X, K) in zip(xs, ks, es, pubKeys, Ks)]
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100])
+  parser.add_argument('--single', action='store_true')
+  parser.add_argument('--seed', type=int, default=1)
+  args = parser.parse_args()
+
+  rng = random.Random(args.seed)
+  items = makeItems(max(args.sizes), rng)
+
+  print("%8s %10s %12s" % ("batch", "seconds", "sigs/s"))
+  if args.single:
+    n = min(args.sizes)
+    start = time.time()
+    for (sig, pubKey, e) in items[:n]:
+      assert sig.verify(pubKey, e)
+    seconds = time.time() - start
+    print("%8s %10.2f %12.1f" % ("single", seconds, n / seconds))
+
+  for n in args.sizes:
+    start = time.time()
+    assert Signature.verifyBatch(items[:n]) == []
+    seconds = time.time() - start
+    print("%8d %10.2f %12.1f" % (n, seconds, n / seconds))
+
+
+if __name__ == '__main__':
+  main()
@@ -1,4 +1,5 @@
 from toycrypto.asymmetric import *
+import tempfile
 import unittest
 
 # Deterministic tests for the moment
@@ -13,6 +14,11 @@ class SignatureTests(unittest.TestCase):
     for i in range(0, 100):
       Signature.gen_private_key()
 
+  def test_make_pub_keys(self):
+    priv_keys = [Signature.gen_private_key() for i in range(0, 3)]
+    self.assertEqual(list(Signature.make_pub_keys(priv_keys)),
+                     [Signature.make_pub_key(k) for k in priv_keys])
+
   def test_sign_and_verify(self):
     # Pick a random scalar to sign
     e = 44099
@@ -37,6 +43,140 @@ class SignatureTests(unittest.TestCase):
     pub_key_merged = Signature.Hfield.ec.plus(pub_key, pub_key2)
     self.assertTrue(sig_merged.verify(pub_key_merged, e))
 
+  def test_signMany(self):
+    keys = [Signature.gen_private_key() for i in range(5)]
+    sigs = Signature.signMany((e, x) for (e, x) in enumerate(keys))
+    self.assertEqual(len(sigs), 5)
+    for (e, (sig, x)) in enumerate(zip(sigs, keys)):
+      self.assertTrue(sig.verify(Signature.make_pub_key(x), e))
+    self.assertEqual(Signature.signMany([]), [])
+
+  def test_aggregate(self):
+    e = 1234
+    keys = [Signature.gen_private_key() for i in range(20)]
+    sigs = [Signature.sign(e, x) for x in keys]
+    pubKey = Signature.aggregateKeys(Signature.make_pub_keys(keys), chunkSize=3)
+    merged = sigs[0]
+    for sig in sigs[1:]:
+      merged = Signature.merge(merged, sig)
+    for workers in (1, 2):
+      aggregated = Signature.aggregate(iter(sigs), workers, chunkSize=3)
+      self.assertEqual(aggregated, merged)
+      self.assertTrue(aggregated.verify(pubKey, e))
+    self.assertFalse(Signature.aggregate(sigs[1:]).verify(pubKey, e))
+
+  def test_sign_and_verify_stream(self):
+    priv_key = Signature.gen_private_key()
+    pub_key = Signature.make_pub_key(priv_key)
+    with tempfile.TemporaryFile() as f:
+      f.write(b'a large artifact' * 1000)
+      f.seek(0)
+      sig = Signature.signStream(f, priv_key)
+      f.seek(0)
+      self.assertTrue(sig.verifyStream(f, pub_key))
+    self.assertTrue(sig.verifyStream([b'a large artifact'] * 1000, pub_key))
+    self.assertFalse(sig.verifyStream([b'a large artifact'] * 999, pub_key))
+
+  def test_verify_with_key_cache(self):
+    cache = Signature.makeKeyCache(promoteAfter=1)
+    priv_key = Signature.gen_private_key()
+    pub_key = Signature.make_pub_key(priv_key)
+    e = 2**300 + 17
+    sig = Signature.sign(e, priv_key)
+    self.assertTrue(sig.verify(pub_key, e, cache))
+    self.assertTrue(sig.verify(pub_key, e, cache))
+    self.assertFalse(sig.verify(pub_key, e + 1, cache))
+    self.assertEqual((cache.hits, cache.misses), (4, 2))
+
+  def test_verify_batch(self):
+    priv_keys = [Signature.gen_private_key() for i in range(0, 5)]
+    pub_keys = list(Signature.make_pub_keys(priv_keys))
+    es = [1000 + i for i in range(0, 5)]
+    sigs = [Signature.sign(e, k) for (e, k) in zip(es, priv_keys)]
+    items = list(zip(sigs, pub_keys, es))
+    self.assertEqual(Signature.verifyBatch(items), [])
+    self.assertEqual(Signature.verifyBatch([]), [])
+
+    # Wrong message, wrong key and a signature for someone else's key.
+    items[1] = (sigs[1], pub_keys[1], es[1] + 1)
+    items[3] = (sigs[3], pub_keys[4], es[3])
+    items[4] = (sigs[3], pub_keys[4], es[4])
+    self.assertEqual(Signature.verifyBatch(items), [1, 3, 4])
+    self.assertEqual(Signature.verifyBatch(items[1:2]), [0])
+
+
+class StarImportTests(unittest.TestCase):
+
+  def test_constants(self):
+    namespace = {}
+    exec('from toycrypto.asymmetric import *', namespace)
+    for name in ('secp256k1', 'secp256k1_G', 'secp256k1_GField', 'z', 'p',
+                 'Signature', 'RingSignatureEC', 'EC', 'Z', 'random'):
+      self.assertIn(name, namespace)
+    self.assertEqual(namespace['secp256k1_G'], Signature.Hfield.g)
+    self.assertIs(namespace['z'], Signature.Hfield.ec.field)
+    self.assertEqual(namespace['p'], 2**256 - 2**32 - 977)
+
+
+class RingSignatureRSATests(unittest.TestCase):
+
+  def test_sign_and_verify(self):
+    rng = random.Random(seed)
+    keys = [
+        rsa.PrivateKey.generate(bits, nprimes, rng=rng)
+        for (bits, nprimes) in [(512, 2), (640, 3), (512, 2), (768, 2)]
+    ]
+    pubs = [k.publicKey() for k in keys]
+    m = b'attack at dawn'
+    for i in range(len(keys)):
+      sig = RingSignatureRSA.sign(keys[i], pubs[:i] + pubs[i + 1:], m)
+      self.assertEqual(set(sig.pubKeys), set(pubs))
+      self.assertTrue(sig.verify(m))
+      self.assertFalse(sig.verify(b'attack at dusk'))
+
+    xs = list(sig.xs)
+    xs[0] ^= 1
+    self.assertFalse(RingSignatureRSA(sig.pubKeys, xs, sig.v).verify(m))
+    self.assertFalse(RingSignatureRSA([], [], sig.v).verify(m))
+
+    # Alone in the ring.
+    sig = RingSignatureRSA.sign(keys[0], [], m)
+    self.assertTrue(sig.verify(m))
+
+
+class RingSignatureECTests(unittest.TestCase):
+
+  def test_sign_and_verify(self):
+    priv_keys = [Signature.gen_private_key() for i in range(0, 4)]
+    pub_keys = list(Signature.make_pub_keys(priv_keys))
+    m = b'attack at dawn'
+
+    sig = RingSignatureEC.sign(priv_keys[0], pub_keys[1:], m)
+    self.assertEqual(len(sig.ring), 4)
+    self.assertEqual(set(sig.ring), set(pub_keys))
+    self.assertTrue(sig.verify(m))
+    self.assertFalse(sig.verify(b'attack at dusk'))
+
+    pre = RingSignatureEC.precompute(sig.ring)
+    self.assertTrue(sig.verify(m, pre))
+    with self.assertRaises(ValueError):
+      sig.verify(m, RingSignatureEC.precompute(sig.ring[:2]))
+
+    # Swapping a ring member or tweaking a response breaks the signature.
+    ring = list(sig.ring)
+    ring[1] = Signature.make_pub_key(Signature.gen_private_key())
+    self.assertFalse(RingSignatureEC(ring, sig.c, sig.rs).verify(m))
+    rs = list(sig.rs)
+    rs[2] = (rs[2] + 1) % Signature.Hfield.order
+    self.assertFalse(RingSignatureEC(sig.ring, sig.c, rs).verify(m))
+    self.assertFalse(RingSignatureEC([], sig.c, []).verify(m))
+
+  def test_single_member_ring(self):
+    priv_key = Signature.gen_private_key()
+    sig = RingSignatureEC.sign(priv_key, [], b'm')
+    self.assertEqual(sig.ring, [Signature.make_pub_key(priv_key)])
+    self.assertTrue(sig.verify(b'm'))
+
 
 if __name__ == '__main__':
   unittest.main()
@@ -25,3 +25,10 @@ class FieldTests(GroupTests):
       if not e.isPlusID():
         inv_e = e.mulInv()
         self.assertEqual(self.field.mul(e, inv_e), self.field.mulID())
+
+  def test_batchMulInv(self):
+    elements = [self.field.make(i) for i in range(1, 40)]
+    elements = [e for e in elements if not e.isPlusID()]
+    inverses = self.field.batchMulInv(elements)
+    self.assertEqual(inverses, [e.mulInv() for e in elements])
+    self.assertEqual(self.field.batchMulInv([]), [])
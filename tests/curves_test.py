@@ -0,0 +1,51 @@
+from toycrypto.curves import *
+from toycrypto.asymmetric import Signature
+import os
+import subprocess
+import sys
+import unittest
+
+
+class CurvesTests(unittest.TestCase):
+
+  def test_generators(self):
+    for name in names():
+      curve = get(name)
+      g = curve.g
+      ec = curve.ec
+      self.assertEqual(ec.field.mul(g.y, g.y), ec._rhs(g.x), name)
+      self.assertTrue(
+          ec._fromJacobian(ec._jacobianScalarMul(g, curve.order)).isPlusID(),
+          name)
+
+  def test_secp256k1(self):
+    curve = get('secp256k1')
+    self.assertEqual(curve.ec.fromX(curve.g.x, odd=False), curve.g)
+    self.assertIs(Signature.Hfield, curve)
+    self.assertIs(Signature.nF, scalarField('secp256k1'))
+    self.assertEqual(Signature.nF.order, curve.order)
+
+  def test_edwards(self):
+    curve = edwards('Ed25519')
+    self.assertIs(edwards('Ed25519'), curve)
+    self.assertTrue(curve.g.scalarMul(curve.order).isPlusID())
+    with self.assertRaises(ValueError):
+      edwards('secp256k1')
+
+  def test_interned(self):
+    self.assertIs(get('P-256'), get('P-256'))
+    self.assertIs(get('P-256').ec.field, get('P-256').g.x.z_field)
+
+  def test_unknown(self):
+    self.assertRaises(ValueError, get, 'secp256r2')
+
+  def test_lazy_import(self):
+    code = ("import toycrypto.asymmetric, toycrypto.base; "
+            "assert not toycrypto.base._REGISTRY; "
+            "toycrypto.asymmetric.Signature.Hfield; "
+            "assert toycrypto.base._REGISTRY")
+    subprocess.check_call([sys.executable, '-c', code], env=os.environ)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,95 @@
+from toycrypto.dlog import *
+from toycrypto.base import MulGroup
+from toycrypto.ec import *
+from toycrypto import dlog as dlogModule
+from toycrypto import primefields
+import random
+import unittest
+
+Z = primefields.Z
+
+# Supersingular y^2 = x^3 + x over Z(p) has p + 1 = 4 q points, q prime.
+q = 1048601
+z = Z(4 * q - 1)
+ec = EC(z, z.make(1), z.make(0))
+g = ec.fromX(z.make(2)).scalarMul(4)
+sub_field = ECSubfield(ec, g, q)
+
+# Z(2161)* has order 2^4 3^3 5 and is generated by 23.
+z2161 = Z(2161)
+mul_group = MulGroup(z2161)
+
+
+class DlogTests(unittest.TestCase):
+
+  def setUp(self):
+    self.rng = random.Random(1)
+
+  def test_bsgs(self):
+    for i in range(3):
+      x = self.rng.randrange(q)
+      self.assertEqual(bsgs(sub_field, g, g.scalarMul(x), q), x)
+
+  def test_bsgs_no_solution(self):
+    # 2 only generates a subgroup of Z(2161)*, which doesn't contain 23.
+    self.assertIsNone(bsgs(mul_group, z2161.make(2), z2161.make(23), 2160))
+
+  def test_rho(self):
+    x = self.rng.randrange(q)
+    reports = []
+    self.assertEqual(
+        rho(sub_field,
+            g,
+            g.scalarMul(x),
+            q,
+            workers=1,
+            seed=2,
+            progress=reports.append), x)
+    self.assertTrue(reports)
+    self.assertGreater(reports[-1].stepsPerSecondPerCore, 0)
+
+  def test_rho_pool(self):
+    x = self.rng.randrange(q)
+    self.assertEqual(rho(sub_field, g, g.scalarMul(x), q, workers=2, seed=3), x)
+
+  def test_rho_mul_group(self):
+    # The squares of Z(2 r + 1) form a subgroup of prime order r.
+    r = 1048889
+    zr = Z(2 * r + 1)
+    h = zr.make(3).scalarPow(2)
+    x = self.rng.randrange(r)
+    self.assertEqual(rho(MulGroup(zr), h, h.scalarPow(x), r, workers=1, seed=4),
+                     x)
+
+  def test_pohlig_hellman(self):
+    gen = z2161.make(23)
+    for x in [0, 1, 17, 2159, self.rng.randrange(2160)]:
+      self.assertEqual(dlog(mul_group, gen, gen.scalarPow(x), 2160), x)
+    self.assertEqual(
+        pohligHellman(mul_group, gen, gen.scalarPow(1000), 2160, {
+            2: 4,
+            3: 3,
+            5: 1
+        }, bsgs), 1000)
+
+  def test_dlog_ec(self):
+    x = self.rng.randrange(q)
+    self.assertEqual(dlog(sub_field, g, g.scalarMul(x), q), x)
+
+  def test_dlog_rho_no_solution(self):
+    # The point of order 4 q isn't a multiple of g, which rho used to walk
+    # for forever.
+    limit = dlogModule.BSGS_LIMIT
+    dlogModule.BSGS_LIMIT = 1000
+    try:
+      x = self.rng.randrange(q)
+      self.assertEqual(dlog(sub_field, g, g.scalarMul(x), q, workers=1), x)
+      outside = ec.fromX(z.make(2))
+      self.assertIsNone(dlog(sub_field, g, outside, q, workers=1))
+      self.assertIsNone(pohligHellman(sub_field, g, outside, q))
+    finally:
+      dlogModule.BSGS_LIMIT = limit
+
+
+if __name__ == '__main__':
+  unittest.main()
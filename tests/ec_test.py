@@ -45,6 +45,120 @@ class ECTests(unittest.TestCase):
         z.make(
             0x388f7b0f632de8140fe337e62a37f3566500a99934c2231b6cb9fd7584b8e672))
 
+  def testPlusMany(self):
+    g2 = secp256k1.plus(g, g)
+    g3 = secp256k1.plus(g2, g)
+    O = secp256k1.plusID()
+    pairs = [(g, g), (g2, g), (g, g.plusInv()), (O, g3), (g3, O), (O, O),
+             (g3, g2)]
+    self.assertEqual(list(secp256k1.plusMany(pairs, chunkSize=3)),
+                     [secp256k1.plus(a, b) for (a, b) in pairs])
+
+  def testScalarMulMany(self):
+    scalars = [0, 1, 2, 3, 255, 2**70 + 5, sub_field.order - 1]
+    self.assertEqual(list(secp256k1.scalarMulMany(g, scalars, chunkSize=4)),
+                     [g.scalarMul(n) for n in scalars])
+    self.assertEqual(list(sub_field.makeMany(scalars[:4])),
+                     [sub_field.make(n) for n in scalars[:4]])
+    with self.assertRaises(ValueError):
+      list(secp256k1.scalarMulMany(g, [1, -1]))
+
+  def testFromXParity(self):
+    self.assertEqual(secp256k1.fromX(z.make(x), odd=False), g)
+    self.assertEqual(secp256k1.fromX(z.make(x), odd=True), g.plusInv())
+
+  def testEncodeDecode(self):
+    self.assertEqual(
+        g.encode(),
+        bytes.fromhex(
+            '0279BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798'
+        ))
+    g3 = secp256k1.plus(secp256k1.plus(g, g), g)
+    O = secp256k1.plusID()
+    for p in [g, g.plusInv(), g3, g3.plusInv(), O]:
+      self.assertEqual(secp256k1.decode(p.encode()), p)
+      self.assertEqual(secp256k1.decode(p.encode(compressed=False)), p)
+
+    buf = bytearray()
+    for p in [g, O, g3.plusInv()]:
+      buf += p.encode()
+    buf += g3.encode(compressed=False)
+    self.assertEqual(list(secp256k1.decodeMany(buf)), [g, O, g3.plusInv(), g3])
+
+  def testDecodeInvalid(self):
+    # x = 5 has no point on secp256k1, x = p is out of range.
+    for data in [
+        b'\x02' + (5).to_bytes(32, 'big'), b'\x02' + p.to_bytes(32, 'big'),
+        b'\x05' + bytes(32),
+        g.encode()[:-1],
+        g.encode() + b'\x00', b'\x04' + bytes(64)
+    ]:
+      with self.assertRaises(ValueError):
+        secp256k1.decode(data)
+
+  def testMultiScalarMul(self):
+    g2 = secp256k1.plus(g, g)
+    g3 = secp256k1.plus(g2, g)
+    pairs = [(5, g), (7, g2), (0, g3), (2**200 + 3, g3), (1, g),
+             (9, secp256k1.plusID()), (12, g2.plusInv())]
+    expected = secp256k1.plusID()
+    for (n, p) in pairs:
+      expected = secp256k1.plus(expected, p.scalarMul(n))
+    self.assertEqual(secp256k1.multiScalarMul(pairs), expected)
+    self.assertEqual(secp256k1.multiScalarMul([]), secp256k1.plusID())
+    # g + (n - 1) g cancels out.
+    self.assertEqual(
+        secp256k1.multiScalarMul([(1, g), (sub_field.order - 1, g)]),
+        secp256k1.plusID())
+
+  def testSum(self):
+    g2 = secp256k1.plus(g, g)
+    # Doubling, cancelling and the point at infinity in the mixed addition.
+    points = [g, g, g2.plusInv(), secp256k1.plusID(), g2, g, g2]
+    expected = secp256k1.plusID()
+    for p in points:
+      expected = secp256k1.plus(expected, p)
+    self.assertEqual(secp256k1.sum(points), expected)
+    self.assertEqual(secp256k1.sum(iter(points)), g.scalarMul(5))
+    self.assertEqual(secp256k1.sum([]), secp256k1.plusID())
+
+  def testWindowTable(self):
+    table = WindowTable(g, 64, window=3)
+    for n in [0, 1, 7, 8, 2**63 + 12345, 2**64 - 1, 2**64 + 3]:
+      self.assertEqual(table.scalarMul(n), g.scalarMul(n))
+    self.assertEqual(table.nbytes(), 22 * 7 * 2 * 32)
+    self.assertEqual(WindowTable.size(secp256k1, 64, 3), table.nbytes())
+    with self.assertRaises(ValueError):
+      table.scalarMul(-1)
+
+  def testWindowTableCache(self):
+    g2 = secp256k1.plus(g, g)
+    g3 = secp256k1.plus(g2, g)
+    cache = WindowTableCache(16, maxEntries=2, promoteAfter=2)
+    self.assertIsNone(cache.get(g))
+    self.assertEqual(cache.scalarMul(g, 1000), g.scalarMul(1000))
+    self.assertEqual(cache.promotions, 1)
+    self.assertEqual(cache.scalarMul(g, 999), g.scalarMul(999))
+    self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    for p in [g2, g2, g3, g3]:
+      cache.get(p)
+    # g was least recently used and got evicted.
+    self.assertEqual(len(cache), 2)
+    self.assertEqual(cache.evictions, 1)
+    self.assertIsNone(cache.get(g))
+    self.assertIsNotNone(cache.get(g3))
+
+    # A budget below one table, or no entries at all, never builds any.
+    for cache in (WindowTableCache(16, maxBytes=100, promoteAfter=1),
+                  WindowTableCache(16, maxEntries=0, promoteAfter=1)):
+      for i in range(3):
+        self.assertIsNone(cache.get(g))
+      self.assertEqual(cache.scalarMul(g, 999), g.scalarMul(999))
+      self.assertEqual((cache.nbytes, cache.promotions, cache.evictions),
+                       (0, 0, 0))
+      self.assertEqual(cache.sightings[g], 4)
+
 
 class Secp256k1Tests(base_test.GroupTests):
 
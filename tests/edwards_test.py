@@ -0,0 +1,106 @@
+from toycrypto import curves
+from toycrypto.edwards import *
+from toycrypto.primefields import Z
+import base_test
+import pickle
+import random
+import unittest
+
+
+class Ed25519GroupTests(base_test.GroupTests, unittest.TestCase):
+  field = curves.edwards('Ed25519')
+  generator = field.g
+
+
+class Ed25519Tests(unittest.TestCase):
+
+  def setUp(self):
+    self.subgroup = curves.edwards('Ed25519')
+    self.curve = self.subgroup.ec
+    self.g = self.subgroup.g
+
+  def test_order(self):
+    self.assertTrue(self.g.scalarMul(self.subgroup.order).isPlusID())
+    self.assertFalse(self.g.scalarMul(self.subgroup.order - 1).isPlusID())
+
+  def test_unified(self):
+    c = self.curve
+    g = self.g
+    # A copy isn't the same object, so this goes through the addition law.
+    copy = c.point(*g.affine())
+    self.assertEqual(c.plus(g, copy), c.double(g))
+    self.assertEqual(c.plus(g, c.O), g)
+    self.assertEqual(c.plus(c.O, g), g)
+    self.assertTrue(c.plus(g, g.plusInv()).isPlusID())
+    self.assertEqual(self.g.scalarMul(5), c.plus(c.double(c.double(g)), g))
+
+  def test_curve25519(self):
+    c = self.curve
+    montgomery = curves.get('Curve25519')
+    self.assertEqual(c.weierstrass(), montgomery.ec)
+    self.assertEqual(int(c.toMontgomery(self.g)[0]), 9)
+    self.assertEqual(c.toWeierstrass(self.g), montgomery.g.plusInv())
+    self.assertEqual(c.fromWeierstrass(montgomery.g), self.g.plusInv())
+    h = self.g.scalarMul(12345)
+    k = self.g.scalarMul(678)
+    self.assertEqual(c.toWeierstrass(c.plus(h, k)),
+                     montgomery.plus(c.toWeierstrass(h), c.toWeierstrass(k)))
+    self.assertEqual(c.fromMontgomery(c.toMontgomery(h)), h)
+
+  def test_point(self):
+    (x, y) = self.g.affine()
+    with self.assertRaises(ValueError):
+      self.curve.point(x, x)
+    self.assertEqual(hash(self.curve.point(x, y)), hash(self.g))
+
+  def test_pickle(self):
+    h = self.g.scalarMul(99)
+    copy = pickle.loads(pickle.dumps(h))
+    self.assertEqual(copy, h)
+    self.assertIs(copy.curve, self.curve)
+
+
+class SmallCurveTests(unittest.TestCase):
+  """All points of a small complete curve, against its Weierstrass form."""
+
+  def setUp(self):
+    p = 1019
+    self.z = z = Z(p)
+    # 1 is a square, 2 is not, so the addition law is complete.
+    self.curve = EdwardsCurve(z, z.make(1), z.make(2))
+    self.points = []
+    for x in range(p):
+      xx = x * x % p
+      yy = z.make((1 - xx) * pow(1 - 2 * xx, -1, p))
+      y = yy.sqrt()
+      if y is not None:
+        for v in set([int(y), int(y.plusInv())]):
+          self.points.append(self.curve.point(z.make(x), z.make(v)))
+
+  def test_maps(self):
+    c = self.curve
+    ec = c.weierstrass()
+    for P in self.points:
+      Q = c.toWeierstrass(P)
+      if not Q.isPlusID():
+        self.assertEqual(ec.field.mul(Q.y, Q.y), ec._rhs(Q.x))
+      self.assertEqual(c.fromWeierstrass(Q), P)
+      self.assertEqual(c.fromMontgomery(c.toMontgomery(P)), P)
+
+  def test_complete(self):
+    c = self.curve
+    ec = c.weierstrass()
+    rng = random.Random(1)
+    special = [
+        c.O,
+        c.point(self.z.plusID(), self.z.make(-1)),
+    ] + [P for P in self.points if c.double(P).isPlusID()]
+    for P in special + rng.sample(self.points, 20):
+      for Q in special + rng.sample(self.points, 20):
+        self.assertEqual(c.toWeierstrass(c.plus(P, Q)),
+                         ec.plus(c.toWeierstrass(P), c.toWeierstrass(Q)))
+      self.assertEqual(c.plus(P, P), c.plus(P, c.point(*P.affine())))
+
+
+if __name__ == '__main__':
+  unittest.main()
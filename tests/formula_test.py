@@ -0,0 +1,91 @@
+from toycrypto.formula import *
+from toycrypto.gfpof import GFPOF
+from toycrypto.pof import POF
+from toycrypto.primefields import Z
+import random
+import unittest
+
+
+def chord(f, x1, y1, x2, y2):
+  # As written in the original EC.plus, with the inversion twice.
+  lmbd = f.mul(f.plus(y2, y1.plusInv()), f.plus(x2, x1.plusInv()).mulInv())
+  vu = f.mul(f.plus(f.mul(y1, x2),
+                    f.mul(y2, x1).plusInv()),
+             f.plus(x2, x1.plusInv()).mulInv())
+  return (lmbd, vu)
+
+
+def twoInverses(f, a, b, c):
+  return (f.mul(a.mulInv(), c), f.plus(b.mulInv(), c))
+
+
+class FormulaTests(unittest.TestCase):
+
+  def setUp(self):
+    self.field = Z(1019)
+
+  def check(self, fn, nargs, field, constants=()):
+    formula = Formula.trace(fn, nargs, constants)
+    compiled = formula.compile(field)
+    for i in range(20):
+      args = [field.make(random.randrange(1, 1019)) for j in range(nargs)]
+      try:
+        expected = fn(field, *constants, *args)
+      except ZeroDivisionError:
+        continue
+      self.assertEqual(compiled(*args), expected)
+      self.assertEqual(formula.evaluate(field, *args), expected)
+    return formula
+
+  def test_cse_and_sub(self):
+    formula = self.check(chord, 4, self.field)
+    counts = formula.counts()
+    self.assertEqual(counts['inv'], 1)
+    self.assertEqual(counts['sub'], 3)
+    self.assertEqual(counts['mul'], 4)
+    self.assertNotIn('neg', counts)
+    self.assertNotIn('add', counts)
+
+  def test_batched_inversions(self):
+    formula = self.check(twoInverses, 3, self.field)
+    self.assertEqual(formula.counts()['inv'], 2)
+    self.assertEqual(formula.counts()['inversions'], 1)
+    source = formula.source()
+    self.assertEqual(source.count('inv('), 1)
+    # The inversion comes last, after the only non-inversion operation.
+    self.assertLess(source.index('inv('), source.index('* t3'))
+
+  def test_constants(self):
+
+    def fn(f, A, B, x):
+      return (f.plus(f.mul(A, x), f.mul(B, f.mul(f.mulID(), x))),)
+
+    field = self.field
+    formula = self.check(fn, 1, field, (field.make(0), field.make(5)))
+    self.assertEqual(formula.counts(), {'mul': 1})
+
+  def test_ints(self):
+    formula = Formula.trace(chord, 4)
+    fn = formula.compile(self.field, ints=True)
+    args = [3, 7, 10, 20]
+    expected = chord(self.field, *[self.field.make(a) for a in args])
+    self.assertEqual(fn(*args), tuple(int(e) for e in expected))
+
+  def test_other_fields(self):
+    z = Z(2)
+    gf = GFPOF(z, POF(z).make([1, 1, 0, 1, 1, 0, 0, 0, 1]))
+    formula = Formula.trace(twoInverses, 3)
+    args = [gf.make([1, 1]), gf.make([0, 1, 1]), gf.make([1, 0, 0, 1])]
+    self.assertEqual(formula.compile(gf)(*args), twoInverses(gf, *args))
+    self.assertRaises(ValueError, formula.compile, gf, True)
+
+  def test_branching(self):
+
+    def fn(f, x):
+      return (x if x.isPlusID() else f.mul(x, x),)
+
+    self.assertRaises(TypeError, Formula.trace, fn, 1)
+
+
+if __name__ == '__main__':
+  unittest.main()
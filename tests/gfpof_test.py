@@ -1,6 +1,7 @@
 from toycrypto.gfpof import *
 from toycrypto.pof import *
 import base_test
+import random
 import unittest
 from toycrypto import primefields
 
@@ -87,6 +88,36 @@ class TmathTests(unittest.TestCase):
       inverseinverse = inverse.mulInv()
       self.assertEqual(inverseinverse, g)
 
+  def test_inverse_odd_characteristic(self):
+    # x^2 + 2 is irreducible over Z5, as -2 is not a square.
+    GF25 = GFPOF(Z5, POF(Z5).make([2, 0, 1]))
+    for i in range(1, 25):
+      g = GF25.make([i % 5, i // 5])
+      self.assertEqual(GF25.mul(g, g.mulInv()), GF25.mulID())
+
+  def test_dense_mul(self):
+    # Large enough to take the dense path over Z.
+    p = 1000003
+    z = Z(p)
+    gf = GFPOF(z, POF(z).make([2, 0, 0, 0, 0, 0, 3, 0, 0, 0, 0, 0, 1]))
+    rng = random.Random(1)
+    a = gf.make([rng.randrange(p) for i in range(12)])
+    b = gf.make([rng.randrange(p) for i in range(12)])
+    pofz = POF(z)
+    lift = lambda e: pofz.make({k: v.value for (k, v) in e.c.items()})
+    (_, product) = pofz.longDiv(pofz.mul(lift(a), lift(b)), gf.rp)
+    self.assertEqual(lift(gf.mul(a, b)), product)
+
+  def test_frobenius(self):
+    z = Z(1019)
+    gf = GFPOF(z, POF(z).make([2, 0, 0, 0, 0, 0, 3, 0, 0, 0, 0, 0, 1]))
+    a = gf.make([i * i + 1 for i in range(12)])
+    self.assertEqual(gf.frobenius(a), a.scalarPow(1019))
+    self.assertEqual(gf.frobenius(gf.frobenius(a, 5), 7), a)
+    self.assertEqual(gf.frobenius(a, 0), a)
+    with self.assertRaises(ValueError):
+      GFPOF(POF(z), POF(POF(z)).plusID()).frobenius(a)
+
 
 if __name__ == '__main__':
   unittest.main()
@@ -0,0 +1,57 @@
+from toycrypto.hashing import *
+import hashlib
+import io
+import os
+import tempfile
+import unittest
+
+
+class DigestStreamTests(unittest.TestCase):
+
+  def setUp(self):
+    self.data = bytes(range(256)) * 41 + b'tail'
+    (fd, self.path) = tempfile.mkstemp()
+    with os.fdopen(fd, 'wb') as f:
+      f.write(self.data)
+
+  def tearDown(self):
+    os.remove(self.path)
+
+  def digest(self, data, prefix=b''):
+    return hashlib.sha512(prefix + data).digest()
+
+  def test_sources(self):
+    expected = self.digest(self.data)
+    self.assertEqual(digestStream(self.path, chunkSize=1000), expected)
+    with open(self.path, 'rb') as f:
+      self.assertEqual(digestStream(f, chunkSize=1000), expected)
+    self.assertEqual(digestStream(io.BytesIO(self.data), chunkSize=1000),
+                     expected)
+    self.assertEqual(digestStream(self.data, chunkSize=1000), expected)
+    self.assertEqual(digestStream(memoryview(self.data)), expected)
+    chunks = [self.data[i:i + 777] for i in range(0, len(self.data), 777)]
+    self.assertEqual(digestStream(iter(chunks), chunkSize=100), expected)
+
+  def test_file_position(self):
+    # Only the rest of a file object is hashed, and it is consumed.
+    with open(self.path, 'rb') as f:
+      f.seek(1000)
+      self.assertEqual(digestStream(f), self.digest(self.data[1000:]))
+      self.assertEqual(f.read(), b'')
+      self.assertEqual(digestStream(f), self.digest(b''))
+
+  def test_empty_file(self):
+    with open(self.path, 'wb'):
+      pass
+    with open(self.path, 'rb') as f:
+      self.assertEqual(digestStream(f), self.digest(b''))
+
+  def test_prefix_and_hash(self):
+    self.assertEqual(digestStream(self.path, prefix=b'tag'),
+                     self.digest(self.data, b'tag'))
+    self.assertEqual(digestStream(self.path, 'sha256'),
+                     hashlib.sha256(self.data).digest())
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,112 @@
+from toycrypto import curves
+from toycrypto.base import interned
+from toycrypto.ec import EC
+from toycrypto.hashtocurve import *
+from toycrypto.primefields import Z
+import io
+import unittest
+
+
+def onCurve(p):
+  ec = p.group
+  return p.isPlusID() or ec.field.mul(p.y, p.y) == ec._rhs(p.x)
+
+
+class ExpandTests(unittest.TestCase):
+
+  DST = b'QUUX-V01-CS02-with-expander-SHA256-128'
+
+  def test_vectors(self):
+    # RFC 9380, K.1
+    self.assertEqual(
+        expandMessageXmd(b'', self.DST, 0x20).hex(),
+        '68a985b87eb6b46952128911f2a4412bbc302a9d759667f87f7a21d803f07235')
+    self.assertEqual(
+        expandMessageXmd(b'abc', self.DST, 0x20).hex(),
+        'd8ccab23b5985ccea865c6c97b6e5b8350e794e603b4b97902f53a8a0d605615')
+
+  def test_stream(self):
+    msg = bytes(range(256)) * 10
+    self.assertEqual(expandMessageXmd(io.BytesIO(msg), self.DST, 100),
+                     expandMessageXmd(msg, self.DST, 100))
+    self.assertEqual(len(expandMessageXmd(msg, b'x' * 300, 200)), 200)
+    self.assertRaises(ValueError, expandMessageXmd, msg, self.DST, 256 * 32)
+
+
+class SuiteTests(unittest.TestCase):
+
+  def test_secp256k1(self):
+    # RFC 9380, J.8.1
+    h = secp256k1(b'QUUX-V01-CS02-with-secp256k1_XMD:SHA-256_SSWU_RO_')
+    p = h.hash(b'')
+    self.assertEqual(
+        int(p.x),
+        0xc1cae290e291aee617ebaef1be6d73861479c48b841eaba9b7b5852ddfeb1346)
+    self.assertEqual(
+        int(p.y),
+        0x64fa678e07ae116126f08b022a94af6de15985c996c3a91b64c406a960e51067)
+
+  def test_p256(self):
+    # RFC 9380, J.1.1
+    h = p256(b'QUUX-V01-CS02-with-P256_XMD:SHA-256_SSWU_RO_')
+    p = h.hash(b'')
+    self.assertEqual(
+        int(p.x),
+        0x2c15230b26dbc6fc9a37051158c95b79656e17a1a920b11394ca91c44247d3e4)
+    self.assertEqual(
+        int(p.y),
+        0x8a7a74985cc5c776cdfe4b1f19884970453912e9d31528c060be9ab5c43e8415)
+
+  def test_hashMany(self):
+    h = secp256k1(b'test')
+    msgs = [b'%d' % i for i in range(20)]
+    points = list(h.hashMany(msgs, chunkSize=7))
+    self.assertEqual(points, [h.hash(m) for m in msgs])
+    self.assertEqual(len(set(points)), 20)
+    self.assertTrue(onCurve(h.encode(b'abc')))
+
+  def test_findZ(self):
+    self.assertEqual(
+        findZSswu(curves.get('P-256').ec).plusInv(),
+        curves.get('P-256').ec.field.make(10))
+    self.assertTrue(findZSvdw(curves.get('secp256k1').ec).isMulID())
+
+
+class MapTests(unittest.TestCase):
+
+  def test_svdw(self):
+    # Curve25519 has p = 1 mod 4 and a cofactor of 8.
+    for name in ('secp256k1', 'Curve25519'):
+      group = curves.get(name)
+      f = group.ec.field
+      svdw = SVDW(group.ec)
+      us = [f.make(i) for i in range(-5, 30)]
+      points = svdw.mapMany(us)
+      self.assertEqual(points, [svdw.map(u) for u in us])
+      self.assertTrue(all(onCurve(p) for p in points))
+    h = HashToCurve(svdw, b'test', cofactor=8)
+    self.assertTrue(h.hash(b'abc').scalarMul(group.order).isPlusID())
+
+  def test_small(self):
+    # p = 1 mod 4 takes the generic square root path of SSWU.
+    f = Z(1009)
+    ec = EC(f, f.make(1), f.make(3))
+    sswu = SSWU(ec)
+    points = sswu.mapMany([f.make(i) for i in range(1009)])
+    self.assertTrue(all(onCurve(p) for p in points))
+    svdw = SVDW(ec)
+    points = svdw.mapMany([f.make(i) for i in range(1009)])
+    self.assertTrue(all(onCurve(p) for p in points))
+
+  def test_exceptional(self):
+    h = secp256k1(b'test')
+    f = h.ec.field
+    # u = 0 and Z u^2 = -1 hit the exceptional case of SSWU.
+    root = f.mul(h.mapping.Z, f.make(-1)).mulInv().sqrt()
+    for u in (f.plusID(), root):
+      self.assertTrue(onCurve(h.mapping.map(u)))
+    self.assertRaises(ValueError, SSWU, h.ec)
+
+
+if __name__ == '__main__':
+  unittest.main()
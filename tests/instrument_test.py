@@ -0,0 +1,95 @@
+from toycrypto.instrument import *
+from toycrypto import pairing
+from toycrypto.ec import EC
+from toycrypto.edwards import EdwardsCurve
+from toycrypto.gfpof import GFPOF
+from toycrypto.pof import POF
+from toycrypto.primefields import Z
+import json
+import unittest
+
+
+class CountersTests(unittest.TestCase):
+
+  def test_field_counts(self):
+    f = Z(19)
+    a = f.make(3)
+    with Counters() as counters:
+      b = f.mul(a, f.plus(a, a))
+      b.mulInv()
+      b.sqrt()
+    counts = counters.counts['Z(19)']
+    self.assertEqual(counts['plus'], 1)
+    self.assertEqual(counts['mul'], 2)
+    self.assertEqual(counts['mulInv'], 1)
+    self.assertEqual(counts['sqrt'], 1)
+    self.assertEqual(counts['pow'], 1)
+    self.assertEqual(counts['new'], 5)
+    self.assertEqual(counters.total('mul'), 2)
+
+  def test_restores(self):
+    original = Z.mul
+    with self.assertRaises(KeyError):
+      with Counters():
+        self.assertIsNot(Z.mul, original)
+        raise KeyError()
+    self.assertIs(Z.mul, original)
+    self.assertIsNone(Counters.active)
+
+  def test_not_reentrant(self):
+    with Counters():
+      with self.assertRaises(RuntimeError):
+        with Counters():
+          pass
+
+  def test_ext_euclidean(self):
+    z = Z(2)
+    gf = GFPOF(z, POF(z).make([1, 1, 0, 1, 1, 0, 0, 0, 1]))
+    with Counters() as counters:
+      gf.make([1, 1, 0, 1]).mulInv()
+    label = "GFPOF(Z(2), %s)" % gf.rp
+    self.assertEqual(counters.counts[label]['mulInv'], 1)
+    self.assertEqual(counters.counts['POF(Z(2))']['ExtEuclidean'], 1)
+    self.assertGreater(counters.counts['POF(Z(2))']['longDiv'], 0)
+    # ExtEuclidean runs within mulInv, so only the latter is timed.
+    self.assertEqual(list(counters.histograms), ['GFPOF.mulInv'])
+
+  def test_top_level_timing(self):
+    z = Z(1019)
+    ec = EC(z, z.make(1), z.make(1))
+    g = ec.fromX(z.make(2))
+    with Counters() as counters:
+      g.scalarMul(100)
+      ec.plus(g, g)
+    label = "EC(Z(1019), 1, 1)"
+    self.assertGreater(counters.counts[label]['plus'], 1)
+    self.assertEqual(sum(counters.histograms['EC.scalarMul'].values()), 1)
+    self.assertEqual(sum(counters.histograms['EC.plus'].values()), 1)
+    data = json.loads(counters.toJSON())
+    self.assertEqual(data['counts'][label]['scalarMul'], 1)
+
+  def test_edwards(self):
+    z = Z(1019)
+    curve = EdwardsCurve(z, z.make(1), z.make(2))
+    g = curve.point(z.make(4), z.make(772))
+    with Counters() as counters:
+      g.scalarMul(6)
+    counts = counters.counts[label(curve)]
+    # opN doubles three times via plus, and adds 2 g and 4 g to O.
+    self.assertEqual(counts['double'], 3)
+    self.assertEqual(counts['plus'], 5)
+
+  def test_pairing(self):
+    e = pairing.supersingular()
+    with Counters() as counters:
+      e.pair(e.g1.g, e.g1.g)
+    counts = counters.counts[label(e)]
+    self.assertEqual(counts['miller'], 1)
+    self.assertEqual(counts['finalExponentiation'], 1)
+    self.assertGreater(counters.counts[label(e.gt)]['mul'], 0)
+    self.assertEqual(sorted(counters.histograms),
+                     ['TatePairing.finalExponentiation', 'TatePairing.miller'])
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,152 @@
+from toycrypto import matrix
+from toycrypto.gfpof import GFPOF
+from toycrypto.matrix import *
+from toycrypto.pof import POF
+from toycrypto.primefields import Z
+import random
+import unittest
+
+
+def naiveMul(a, b):
+  f = a.field
+  rows = []
+  for i in range(a.nrows):
+    row = []
+    for j in range(b.ncols):
+      s = f.plusID()
+      for k in range(a.ncols):
+        s = f.plus(s, f.mul(a[i, k], b[k, j]))
+      row.append(s)
+    rows.append(row)
+  return Matrix.fromRows(f, rows)
+
+
+class MatrixTests(unittest.TestCase):
+
+  def setUp(self):
+    self.rng = random.Random(1)
+    self.field = Z(1019)
+
+  def random(self, rows, cols, field=None, order=1019):
+    field = field or self.field
+    return Matrix.fromRows(
+        field, [[field.make(self.rng.randrange(order))
+                 for j in range(cols)]
+                for i in range(rows)])
+
+  def testAccess(self):
+    m = Matrix.fromRows(self.field, [[1, 2, 3], [4, 5, 1020]])
+    self.assertEqual((m.nrows, m.ncols), (2, 3))
+    self.assertEqual(m[1, 2], self.field.make(1))
+    self.assertEqual(m.data, [1, 2, 3, 4, 5, 1])
+    m[0, 0] = self.field.make(7)
+    self.assertEqual(m.rows()[0], [self.field.make(i) for i in (7, 2, 3)])
+    self.assertEqual(
+        m.transpose().rows(),
+        [[self.field.make(i) for i in r] for r in [[7, 4], [2, 5], [3, 1]]])
+    self.assertRaises(ValueError, Matrix.fromRows, self.field, [[1], [1, 2]])
+
+  def testMul(self):
+    a = self.random(3, 5)
+    b = self.random(5, 4)
+    self.assertEqual(a.mul(b), naiveMul(a, b))
+    self.assertEqual(a.mul(Matrix.identity(self.field, 5)), a)
+    self.assertEqual(a.mulVector([1, 0, 0, 0, 0]), [a[i, 0] for i in range(3)])
+    self.assertRaises(ValueError, a.mul, a)
+
+  def testStrassen(self):
+    threshold = matrix.STRASSEN_THRESHOLD
+    matrix.STRASSEN_THRESHOLD = 4
+    try:
+      for (n, m, k) in [(8, 8, 8), (5, 7, 4), (9, 4, 6)]:
+        a = self.random(n, m)
+        b = self.random(m, k)
+        self.assertEqual(a.mul(b), naiveMul(a, b))
+    finally:
+      matrix.STRASSEN_THRESHOLD = threshold
+
+  def testStrassenThin(self):
+    # A thin side keeps the product classic, padding it would cost n^2.8.
+    (threshold, strassen) = (matrix.STRASSEN_THRESHOLD, Matrix._strassen)
+    calls = []
+
+    def spy(a, b):
+      calls.append((a.nrows, a.ncols, b.ncols))
+      return strassen(a, b)
+
+    matrix.STRASSEN_THRESHOLD = 4
+    Matrix._strassen = spy
+    try:
+      for (n, m, k) in [(9, 2, 9), (2, 9, 9), (9, 9, 2)]:
+        a = self.random(n, m)
+        b = self.random(m, k)
+        self.assertEqual(a.mul(b), naiveMul(a, b))
+      self.assertEqual(calls, [])
+      self.random(4, 4).mul(self.random(4, 4))
+      self.assertEqual(calls, [(4, 4, 4)])
+    finally:
+      (matrix.STRASSEN_THRESHOLD, Matrix._strassen) = (threshold, strassen)
+
+  def testPlus(self):
+    a = self.random(3, 3)
+    b = self.random(3, 3)
+    self.assertEqual(
+        a.plus(b).rows(), [[self.field.plus(x, y)
+                            for (x, y) in zip(r, s)]
+                           for (r, s) in zip(a.rows(), b.rows())])
+
+  def testEchelon(self):
+    m = Matrix.fromRows(self.field, [[0, 2, 4], [1, 1, 1], [2, 4, 6]])
+    (e, pivots) = m.echelon()
+    self.assertEqual(pivots, [0, 1])
+    self.assertEqual(m.rank(), 2)
+    (r, pivots) = m.echelon(reduced=True)
+    self.assertEqual(
+        r, Matrix.fromRows(self.field, [[1, 0, -1], [0, 1, 2], [0, 0, 0]]))
+    self.assertEqual(m.determinant(), self.field.plusID())
+
+  def testDeterminant(self):
+    m = Matrix.fromRows(self.field, [[0, 1], [1, 0]])
+    self.assertEqual(m.determinant(), self.field.make(-1))
+    m = Matrix.fromRows(self.field, [[2, 3, 1], [4, 1, 5], [6, 2, 2]])
+    # 2 (2 - 10) - 3 (8 - 30) + (8 - 6)
+    self.assertEqual(m.determinant(), self.field.make(52))
+    a = self.random(6, 6)
+    b = self.random(6, 6)
+    self.assertEqual(
+        a.mul(b).determinant(), self.field.mul(a.determinant(),
+                                               b.determinant()))
+
+  def testInverse(self):
+    gf256 = GFPOF(Z(2), POF(Z(2)).make([1, 1, 0, 1, 1, 0, 0, 0, 1]))
+    for (field, order) in [(self.field, 1019), (gf256, 256)]:
+      a = self.random(6, 6, field, order)
+      while a.determinant().isPlusID():
+        a = self.random(6, 6, field, order)
+      self.assertEqual(a.mul(a.inverse()), Matrix.identity(field, 6))
+    singular = Matrix.fromRows(self.field, [[1, 2], [2, 4]])
+    self.assertRaises(ZeroDivisionError, singular.inverse)
+
+  def testSolve(self):
+    a = self.random(5, 5)
+    x = [self.field.make(self.rng.randrange(1019)) for i in range(5)]
+    self.assertEqual(a.solve(a.mulVector(x)), x)
+    m = Matrix.fromRows(self.field, [[1, 2, 3], [2, 4, 6]])
+    self.assertEqual(m.solve([1, 3]), None)
+    y = m.solve([1, 2])
+    self.assertEqual(m.mulVector(y), [self.field.make(1), self.field.make(2)])
+
+  def testGenericField(self):
+    # GF(1019^2) with entries from Z(1019) goes through the element path.
+    z = Z(1019)
+    f = GFPOF(z, POF(z).make([1, 0, 1]))
+    a = self.random(4, 4)
+    lift = lambda m: Matrix.fromRows(f, [[f.make([int(x)])
+                                          for x in r]
+                                         for r in m.rows()])
+    self.assertEqual(lift(a).mul(lift(a)), lift(a.mul(a)))
+    self.assertEqual(lift(a).determinant(), f.make([int(a.determinant())]))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,57 @@
+from toycrypto.pairing import *
+from toycrypto.pairing import _cyclotomic
+import unittest
+
+
+class PairingTests(object):
+  """Checks for a pairing e, set by subclasses."""
+
+  def test_generators(self):
+    for g in (self.e.g1, self.e.g2):
+      ec = g.ec
+      self.assertEqual(ec.field.mul(g.g.y, g.g.y), ec._rhs(g.g.x))
+
+  def test_bilinear(self):
+    e = self.e
+    (P, Q) = (e.g1.g, e.g2.g)
+    v = e.pair(P, Q)
+    self.assertFalse(v.isMulID())
+    self.assertEqual(v.scalarPow(e.r), e.gt.mulID())
+    self.assertEqual(e.pair(P.scalarMul(6), Q.scalarMul(5)), v.scalarPow(30))
+    self.assertEqual(e.pair(P, Q.scalarMul(e.r - 1)), v.scalarPow(e.r - 1))
+
+  def test_pairProduct(self):
+    e = self.e
+    (P, Q) = (e.g1.g, e.g2.g)
+    # e(3 P, Q) e(-P, 3 Q) = 1, like a BLS signature check.
+    self.assertEqual(
+        e.pairProduct([(P.scalarMul(3), Q), (P.plusInv(), Q.scalarMul(3))]),
+        e.gt.mulID())
+    self.assertEqual(e.pairProduct([(P, Q), (P, Q)]), e.pair(P.scalarMul(2), Q))
+    self.assertEqual(e.pair(e.g1.plusID(), Q), e.gt.mulID())
+    self.assertEqual(e.pairProduct([]), e.gt.mulID())
+
+
+class TatePairingTests(PairingTests, unittest.TestCase):
+  e = supersingular()
+
+  def test_symmetric(self):
+    e = self.e
+    P = e.g1.g
+    Q = P.scalarMul(12345)
+    self.assertEqual(e.pair(P, Q), e.pair(Q, P))
+
+
+class AtePairingTests(PairingTests, unittest.TestCase):
+  e = bn254()
+
+  def test_cyclotomic(self):
+    p = self.e.gt.field.order
+    self.assertEqual(_cyclotomic(12, p), p**4 - p**2 + 1)
+    self.assertEqual(_cyclotomic(2, p), p + 1)
+    self.assertEqual(_cyclotomic(1, p), p - 1)
+    self.assertEqual(self.e.loop, 29793968203157093288)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,87 @@
+from toycrypto.parallel import *
+from toycrypto.asymmetric import Signature, secp256k1, secp256k1_G
+from toycrypto.base import MulGroup
+from toycrypto.primefields import Z
+import math
+import pickle
+import unittest
+
+
+class PickleTests(unittest.TestCase):
+
+  def test_z(self):
+    Z7 = Z(7)
+    e = Z7.make(3)
+    copy = pickle.loads(pickle.dumps(e))
+    self.assertEqual(copy, e)
+    self.assertIs(pickle.loads(pickle.dumps(Z7)), copy.z_field)
+
+  def test_ec(self):
+    P = secp256k1_G.scalarMul(5)
+    Q = secp256k1_G.scalarMul(7)
+    (P2, Q2) = pickle.loads(pickle.dumps((P, Q)))
+    self.assertEqual((P2, Q2), (P, Q))
+    self.assertIs(P2.field, Q2.field)
+    self.assertIs(P2.x.z_field, Q2.y.z_field)
+    self.assertEqual(pickle.loads(pickle.dumps(secp256k1.plusID())),
+                     secp256k1.plusID())
+    self.assertEqual(
+        pickle.loads(pickle.dumps(Signature.Hfield)).make(5),
+        Signature.Hfield.make(5))
+
+  def test_size(self):
+    points = [secp256k1_G.scalarMul(n) for n in range(1, 11)]
+    # Two coordinates of 32 bytes per point, plus some framing.
+    self.assertLess(len(pickle.dumps(points)), 10 * 100 + 300)
+
+
+class ScalarMulManyTests(unittest.TestCase):
+
+  def test_single_point(self):
+    scalars = [0, 1, 2, 3, 12345, 2**200 + 7]
+    expected = [secp256k1_G.scalarMul(n) for n in scalars]
+    for workers in (1, 2):
+      self.assertEqual(
+          scalarMulMany(Signature.Hfield,
+                        scalars,
+                        secp256k1_G,
+                        workers=workers,
+                        chunkSize=2), expected)
+
+  def test_many_points(self):
+    points = [secp256k1_G.scalarMul(n) for n in range(1, 6)]
+    scalars = [5, 0, 7, 1, 99]
+    expected = [P.scalarMul(n) for (n, P) in zip(scalars, points)]
+    self.assertEqual(scalarMulMany(secp256k1, scalars, points, workers=2),
+                     expected)
+    self.assertRaises(ValueError, scalarMulMany, secp256k1, scalars[1:], points)
+
+  def test_generic_group(self):
+    group = MulGroup(Z(101))
+    points = [Z(101).make(n) for n in (2, 3, 5)]
+    self.assertEqual(
+        scalarMulMany(group, [10, 20, 30], points, workers=2),
+        [Z(101).make(pow(b, e, 101)) for (b, e) in ((2, 10), (3, 20), (5, 30))])
+
+
+class SumPointsTests(unittest.TestCase):
+
+  def test_ec(self):
+    points = [secp256k1_G.scalarMul(n) for n in (1, 2, 3, 5, 8, 13, 21)]
+    expected = secp256k1_G.scalarMul(53)
+    for workers in (1, 2):
+      for chunkSize in (1, 2, 3, 100):
+        self.assertEqual(
+            sumPoints(Signature.Hfield, iter(points), workers, chunkSize),
+            expected)
+    self.assertEqual(sumPoints(secp256k1, [], workers=2), secp256k1.plusID())
+
+  def test_generic_group(self):
+    group = MulGroup(Z(101))
+    points = [Z(101).make(n) for n in range(1, 20)]
+    self.assertEqual(sumPoints(group, points, workers=2, chunkSize=4),
+                     Z(101).make(math.factorial(19)))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -68,6 +68,9 @@ class POFTest(unittest.TestCase):
     self.assertEqual(
         POF(Z2).make([1, 1, 0, 1, 1, 0, 0, 0, 1]),
         POF(Z2).make(0x11b))
+    self.assertEqual(int(POF(Z2).make(0x11b)), 0x11b)
+    self.assertEqual(int(POFZ5.make(8)), 8)
+    self.assertEqual(int(POFZ5.plusID()), 0)
 
   def testXtime(self):
     POFZ5 = POF(Z5)
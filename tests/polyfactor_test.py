@@ -0,0 +1,138 @@
+from toycrypto.base import opNWindow
+from toycrypto.pof import POF
+from toycrypto.polyfactor import *
+from toycrypto.primefields import Z
+import json
+import os
+import random
+import tempfile
+import unittest
+
+
+class PolyFactorTests(unittest.TestCase):
+
+  def test_isIrreducible(self):
+    pof = POF(Z(2))
+    self.assertTrue(isIrreducible(pof.make({8: 1, 4: 1, 3: 1, 1: 1, 0: 1})))
+    self.assertTrue(isIrreducible(pof.make({1: 1})))
+    self.assertFalse(isIrreducible(pof.make({2: 1, 0: 1})))
+    self.assertFalse(isIrreducible(pof.make({0: 1})))
+    # x^4 + x^3 + x^2 + x + 1 is irreducible, but x has order 5 only.
+    pentagon = pof.make([1, 1, 1, 1, 1])
+    self.assertTrue(isIrreducible(pentagon))
+    self.assertFalse(isPrimitive(pentagon))
+    self.assertTrue(isPrimitive(pof.make({8: 1, 4: 1, 3: 1, 2: 1, 0: 1})))
+    self.assertFalse(isPrimitive(pof.make({8: 1, 4: 1, 3: 1, 1: 1, 0: 1})))
+    # (x^2 + 1) (x^2 + 2) over Z(7) has no roots.
+    pof7 = POF(Z(7))
+    self.assertFalse(isIrreducible(pof7.make([2, 0, 3, 0, 1])))
+    self.assertTrue(isIrreducible(pof7.make([1, 0, 1])))
+
+  def test_randomIrreducible(self):
+    pof = POF(Z(11))
+    rng = random.Random(1)
+    for n in (1, 2, 5, 9):
+      f = randomIrreducible(pof, n, rng)
+      self.assertEqual(f.getDegree(), n)
+      self.assertTrue(isIrreducible(f))
+
+  def checkFactor(self, p, degrees):
+    pof = POF(Z(p))
+    rng = random.Random(p)
+    expected = {}
+    for (n, m) in degrees:
+      f = randomIrreducible(pof, n, rng)
+      key = tuple(int(c) for c in f.toEL())
+      expected[key] = expected.get(key, 0) + m
+    f = pof.mulID()
+    for (key, m) in expected.items():
+      for i in range(m):
+        f = pof.mul(f, pof.make(list(key)))
+    f = pof.mul(f, pof.make(3 % p or 1))
+    factors = factor(f)
+    self.assertEqual({tuple(int(c) for c in g.toEL()): m for (g, m) in factors},
+                     expected)
+    self.assertEqual([g.getDegree() for (g, m) in factors],
+                     sorted(g.getDegree() for (g, m) in factors))
+
+  def test_factor(self):
+    self.checkFactor(7, [(1, 1), (1, 2), (3, 1), (3, 1), (4, 3), (6, 1)])
+    self.checkFactor(2, [(1, 3), (2, 1), (5, 2), (5, 1), (7, 2), (8, 1)])
+    self.checkFactor(3, [(1, 3), (2, 4), (4, 1)])
+    self.checkFactor(1019, [(2, 1), (2, 1), (2, 2), (9, 1)])
+
+  def test_powMod(self):
+    pof = POF(Z(13))
+    rng = random.Random(2)
+    a = pof.make([rng.randrange(13) for i in range(9)])
+    m = pof.make([rng.randrange(13) for i in range(6)] + [5])
+    expected = pof.longDiv(pof.mulID(), m)[1]
+    for e in range(40):
+      self.assertEqual(a.powMod(e, m), expected)
+      expected = pof.longDiv(pof.mul(expected, a), m)[1]
+
+  def test_opNWindow(self):
+    add = lambda a, b: a + b
+    for n in list(range(70)) + [2**100 - 1, 2**100 + 5, 3**200]:
+      for width in (0, 1, 2, 4):
+        self.assertEqual(opNWindow(7, n, 0, add, width), 7 * n)
+    with self.assertRaises(ValueError):
+      opNWindow(3, -1, 0, add)
+
+  def test_lowestWeight(self):
+    f2 = Z(2)
+    self.assertEqual(lowestWeightIrreducible(f2, 8, None),
+                     POF(f2).make({
+                         8: 1,
+                         4: 1,
+                         3: 1,
+                         1: 1,
+                         0: 1
+                     }))
+    self.assertEqual(lowestWeightPrimitive(f2, 8, None),
+                     POF(f2).make({
+                         8: 1,
+                         4: 1,
+                         3: 1,
+                         2: 1,
+                         0: 1
+                     }))
+    # The reduction polynomial of the NIST binary curve B-163.
+    self.assertEqual(lowestWeightIrreducible(f2, 163, None),
+                     POF(f2).make({
+                         163: 1,
+                         7: 1,
+                         6: 1,
+                         3: 1,
+                         0: 1
+                     }))
+    f7 = Z(7)
+    self.assertEqual(lowestWeightIrreducible(f7, 4, None),
+                     POF(f7).make([1, 1, 0, 0, 1]))
+    primitive = lowestWeightPrimitive(f7, 4, None)
+    self.assertTrue(isPrimitive(primitive))
+    # x^3 + c is never primitive, but can be irreducible.
+    large = Z(2**31 - 1)
+    self.assertEqual(lowestWeightIrreducible(large, 3, None),
+                     POF(large).make([5, 0, 0, 1]))
+    self.assertEqual(lowestWeightPrimitive(large, 3, None).getDegree(), 3)
+
+  def test_cache(self):
+    with tempfile.TemporaryDirectory() as d:
+      path = os.path.join(d, 'sub', 'polynomials.json')
+      f = lowestWeightPrimitive(Z(5), 6, path)
+      with open(path) as cache:
+        self.assertIn('primitive/5/6', json.load(cache))
+      self.assertEqual(lowestWeightPrimitive(Z(5), 6, path), f)
+      # The cache is trusted, as a search would take long in general.
+      with open(path, 'w') as cache:
+        json.dump({'primitive/5/6': {'0': 2, '6': 1}}, cache)
+      self.assertEqual(lowestWeightPrimitive(Z(5), 6, path),
+                       POF(Z(5)).make({
+                           0: 2,
+                           6: 1
+                       }))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -1,5 +1,6 @@
 from toycrypto.primefields import *
 import base_test
+import os
 import random
 import unittest
 
@@ -24,6 +25,12 @@ class ZFieldTests(base_test.FieldTests):
     ]
     self.assertEqual(sorted(all_elements), list(range(0, self.field.order)))
 
+  def test_jacobi(self):
+    for i in range(0, self.field.order):
+      e = self.field.make(i)
+      euler = int(e.scalarPow((self.field.order - 1) // 2))
+      self.assertEqual(e.jacobi() % self.field.order, euler)
+
   def xtestGFZ(self):
     z = Z(2)
     rp = L2POL([1, 1, 0, 1, 1, 0, 0, 0, 1], z)
@@ -38,18 +45,89 @@ class ZFieldTests(base_test.FieldTests):
 
 
 class Z17FieldTests(ZFieldTests):
+  backend = 'python'
 
   def setUp(self):
-    self.field = Z(17)
+    self.field = Z(17, self.backend)
     self.generator = self.field.make(5)
 
 
 class Z311FieldTests(ZFieldTests):
+  backend = 'python'
 
   def setUp(self):
-    self.field = Z(311)
+    self.field = Z(311, self.backend)
     self.generator = self.field.make(20)
 
 
+@unittest.skipIf(gmpy2 is None, "gmpy2 not installed")
+class Z17GMPFieldTests(Z17FieldTests):
+  backend = 'gmp'
+
+
+@unittest.skipIf(gmpy2 is None, "gmpy2 not installed")
+class Z311GMPFieldTests(Z311FieldTests):
+  backend = 'gmp'
+
+
+class BackendTests(unittest.TestCase):
+
+  def test_against_python(self):
+    n = 2**2203 - 1
+    python = BACKENDS['python']
+    for backend in BACKENDS.values():
+      f = Z(n, backend)
+      for i in range(5):
+        a = random.randrange(1, n)
+        b = random.randrange(1, n)
+        e = random.getrandbits(2048)
+        self.assertEqual(int(f.mul(f.make(a), f.make(b))), a * b % n)
+        self.assertEqual(int(f.make(a).scalarPow(e)), python.pow(a, e, n))
+        self.assertEqual(int(f.make(a).mulInv()), python.invert(a, n))
+        self.assertEqual(f.make(a).jacobi(), python.jacobi(a, n))
+
+  def test_not_invertible(self):
+    for backend in BACKENDS.values():
+      self.assertRaises(ZeroDivisionError, Z(15, backend).make(6).mulInv)
+      self.assertRaises(ZeroDivisionError, Z(17, backend).plusID().mulInv)
+
+  def test_default(self):
+    self.assertIs(Z(7).backend, DEFAULT_BACKEND)
+    if gmpy2 is not None and 'TOYCRYPTO_BACKEND' not in os.environ:
+      self.assertEqual(DEFAULT_BACKEND.name, 'gmp')
+
+  def test_make_across_backends(self):
+    for a in BACKENDS.values():
+      for b in BACKENDS.values():
+        (fa, fb) = (Z(17, a), Z(17, b))
+        self.assertEqual(int(fb.make(fa.make(22).value)), 5)
+        self.assertEqual(fb.make(fa.make(22).value).value, fb.make(5).value)
+        self.assertEqual(fb.make(fa.make(22)), fb.make(5))
+        self.assertEqual(fa == fb, a is b)
+        self.assertEqual(hash(fa) == hash(fb), a is b)
+        if a is not b:
+          self.assertRaises(ValueError, fb.plus, fa.make(1), fb.make(1))
+    self.assertRaises(ValueError, Z(17).make, True)
+    self.assertRaises(ValueError, Z(17).make, 1.0)
+
+
+class PrimeTests(unittest.TestCase):
+
+  def test_isProbablePrime(self):
+    primes = [p for p in range(2, 2000) if isProbablePrime(p)]
+    self.assertEqual(primes[:10], [2, 3, 5, 7, 11, 13, 17, 19, 23, 29])
+    self.assertEqual(len(primes), 303)
+    self.assertTrue(isProbablePrime(2**127 - 1))
+    # Carmichael number and a product of two large primes.
+    self.assertFalse(isProbablePrime(561))
+    self.assertFalse(isProbablePrime((2**61 - 1) * (2**89 - 1)))
+
+  def test_factorize(self):
+    self.assertEqual(factorize(1), {})
+    self.assertEqual(factorize(2160), {2: 4, 3: 3, 5: 1})
+    self.assertEqual(factorize(2**64 + 1), {274177: 1, 67280421310721: 1})
+    self.assertEqual(factorize((2**31 - 1)**2 * 1009), {2**31 - 1: 2, 1009: 1})
+
+
 if __name__ == '__main__':
   unittest.main()
@@ -0,0 +1,92 @@
+from toycrypto.reedsolomon import *
+import io
+import random
+import unittest
+
+
+class TablesTests(unittest.TestCase):
+
+  def test_against_gfpof(self):
+    # Rijndael's polynomial, for which x is not primitive.
+    t = tables(0x11b)
+    self.assertEqual(t.generator, 3)
+    rng = random.Random(1)
+    for i in range(50):
+      (a, b) = (rng.randrange(256), rng.randrange(1, 256))
+      product = t.field.mul(t.fromByte(a), t.fromByte(b))
+      self.assertEqual(t.mul(a, b), t.toByte(product))
+      self.assertEqual(t.mul(t.div(a, b), b), a)
+      self.assertEqual(
+          bytes([a]).translate(t.mulTable(b)), bytes([t.mul(a, b)]))
+
+  def test_reducible(self):
+    self.assertRaises(ValueError, tables, 0x100)
+
+
+class ReedSolomonTests(unittest.TestCase):
+  vectors = 'bytes'
+
+  def setUp(self):
+    self.rng = random.Random(1)
+    self.rs = ReedSolomon(10, 4, vectors=self.vectors)
+
+  def randomBytes(self, n):
+    return bytes(self.rng.randrange(256) for i in range(n))
+
+  def test_block(self):
+    data = self.randomBytes(10)
+    codeword = self.rs.encodeBlock(data)
+    self.assertEqual(codeword[:10], data)
+    for i in range(100):
+      c = bytearray(codeword)
+      errors = self.rng.randrange(3)
+      erasures = self.rng.randrange(5 - 2 * errors)
+      positions = self.rng.sample(range(14), errors + erasures)
+      for p in positions:
+        c[p] ^= self.rng.randrange(1, 256)
+      self.assertEqual(self.rs.decodeBlock(bytes(c), positions[errors:]), data)
+
+  def test_too_many_errors(self):
+    codeword = bytearray(self.rs.encodeBlock(self.randomBytes(10)))
+    for p in (0, 4, 9):
+      codeword[p] ^= 1
+    self.assertRaises(ValueError, self.rs.decodeBlock, bytes(codeword))
+
+  def test_shards(self):
+    data = [self.randomBytes(64) for i in range(10)]
+    parity = self.rs.encode(data)
+    for j in range(64):
+      codeword = self.rs.encodeBlock(bytes(d[j] for d in data))
+      self.assertEqual(codeword[10:], bytes(p[j] for p in parity))
+    shards = data + parity
+    for lost in [(), (0,), (1, 5, 11, 13), (10, 11, 12, 13)]:
+      s = [None if i in lost else x for (i, x) in enumerate(shards)]
+      self.assertEqual(self.rs.decode(s), data)
+      self.assertEqual(self.rs.decode(s, errors=False), data)
+    # A corrupted shard and a lost one.
+    s = list(shards)
+    s[2] = self.randomBytes(64)
+    s[7] = None
+    self.assertEqual(self.rs.decode(s), data)
+    self.assertRaises(ValueError, self.rs.decode, [None] * 5 + shards[5:])
+
+  def test_stream(self):
+    blob = self.randomBytes(1000)
+    files = [io.BytesIO() for i in range(14)]
+    self.assertEqual(self.rs.encodeStream(io.BytesIO(blob), files, 32), 1000)
+    for f in files:
+      self.assertEqual(len(f.getvalue()), 4 * 32)
+      f.seek(0)
+    files[3] = files[12] = None
+    out = io.BytesIO()
+    self.rs.decodeStream(files, out, 1000, 32)
+    self.assertEqual(out.getvalue(), blob)
+
+
+@unittest.skipIf(numpy is None, "numpy not installed")
+class NumPyReedSolomonTests(ReedSolomonTests):
+  vectors = 'numpy'
+
+
+if __name__ == '__main__':
+  unittest.main()
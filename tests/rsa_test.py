@@ -0,0 +1,45 @@
+from toycrypto.rsa import *
+from toycrypto.primefields import isProbablePrime
+import random
+import unittest
+
+
+class RSATests(unittest.TestCase):
+
+  def setUp(self):
+    self.rng = random.Random(5)
+
+  def test_genPrime(self):
+    for bits in [16, 100, 256]:
+      p = genPrime(bits, 65537, self.rng)
+      self.assertTrue(isProbablePrime(p))
+      self.assertEqual(p.bit_length(), bits)
+      self.assertEqual(p >> (bits - 2), 3)
+      self.assertNotEqual((p - 1) % 65537, 0)
+    # e = 3 rules out all p = 1 mod 3.
+    self.assertEqual(genPrime(64, 3, self.rng) % 3, 2)
+
+  def test_trapdoor(self):
+    for nprimes in [2, 3, 4]:
+      key = PrivateKey.generate(512, nprimes, rng=self.rng)
+      self.assertEqual(key.n.bit_length(), 512)
+      self.assertEqual(len(key.primes), nprimes)
+      pub = key.publicKey()
+      for x in [0, 1, 2, key.n - 1, self.rng.randrange(key.n)]:
+        y = pub.trapdoor(x)
+        self.assertEqual(key.trapdoorInvert(y), x)
+        # CRT agrees with the textbook private operation.
+        self.assertEqual(key.trapdoorInvert(y), pow(y, key.d, key.n))
+
+  def test_small_exponent(self):
+    key = PrivateKey.generate(256, 2, e=3, rng=self.rng)
+    self.assertEqual(key.trapdoorInvert(key.trapdoor(42)), 42)
+
+  def test_duplicate_primes(self):
+    p = genPrime(64, rng=self.rng)
+    with self.assertRaises(ValueError):
+      PrivateKey([p, p])
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,151 @@
+from toycrypto import wire
+from toycrypto.asymmetric import Signature
+from toycrypto.service import *
+import asyncio
+import concurrent.futures
+import json
+import os
+import tempfile
+import unittest
+
+
+def keys(n):
+  xs = [Signature.gen_private_key() for i in range(n)]
+  return (xs, [Signature.make_pub_key(x) for x in xs])
+
+
+class ServiceTests(unittest.TestCase):
+
+  def service(self, **kwargs):
+    # Threads keep the tests fast, test_processes covers the process pool.
+    return SignatureService(executor=concurrent.futures.ThreadPoolExecutor(1),
+                            **kwargs)
+
+  def test_sign_and_verify(self):
+    (xs, pubKeys) = keys(10)
+
+    async def run():
+      async with self.service(maxBatch=4, maxDelay=0.05, workers=1) as service:
+        sigs = await asyncio.gather(
+            *[service.sign(e, x) for (e, x) in enumerate(xs, 1)])
+        valid = await asyncio.gather(
+            *[
+                service.verify(s, X, e)
+                for (e, (s, X)) in enumerate(zip(sigs, pubKeys), 1)
+            ], service.verify(sigs[0], pubKeys[0], 2),
+            service.verify(sigs[0], pubKeys[1], 1))
+        return (valid, service.metrics)
+
+    (valid, metrics) = asyncio.run(run())
+    self.assertEqual(valid, [True] * 10 + [False, False])
+    self.assertEqual(metrics.requests, 22)
+    self.assertEqual(metrics.maxBatchSize, 4)
+    self.assertGreaterEqual(metrics.batches, 6)
+    self.assertEqual(metrics.queueDepth, 0)
+    d = metrics.toDict()
+    self.assertLessEqual(d['p50'], d['p99'])
+    self.assertEqual(json.loads(json.dumps(d)), d)
+
+  def test_deadline(self):
+    # A lone request doesn't wait for a batch to fill up.
+    (xs, pubKeys) = keys(1)
+
+    async def run():
+      async with self.service(maxBatch=1000, maxDelay=0.01) as service:
+        return await service.sign(5, xs[0])
+
+    self.assertTrue(asyncio.run(run()).verify(pubKeys[0], 5))
+
+  def test_errors(self):
+    (xs, pubKeys) = keys(2)
+
+    async def run():
+      async with self.service(maxBatch=8, maxDelay=0.05) as service:
+        return await asyncio.gather(service.sign(1, xs[0]),
+                                    service.sign(2, None),
+                                    service.sign(3, xs[1]),
+                                    return_exceptions=True)
+
+    results = asyncio.run(run())
+    self.assertTrue(results[0].verify(pubKeys[0], 1))
+    self.assertIsInstance(results[1], Exception)
+    self.assertTrue(results[2].verify(pubKeys[1], 3))
+
+    async def stopped():
+      await SignatureService().sign(1, xs[0])
+
+    self.assertRaises(RuntimeError, asyncio.run, stopped())
+
+  def test_processes(self):
+    (xs, pubKeys) = keys(3)
+
+    async def run():
+      async with SignatureService(workers=1) as service:
+        sigs = await asyncio.gather(
+            *[service.sign(e, x) for (e, x) in enumerate(xs)])
+        return await asyncio.gather(*[
+            service.verify(s, X, e)
+            for (e, (s, X)) in enumerate(zip(sigs, pubKeys))
+        ])
+
+    self.assertEqual(asyncio.run(run()), [True] * 3)
+
+
+class ServerTests(unittest.TestCase):
+
+  def test_socket(self):
+    (xs, pubKeys) = keys(1)
+    pubKey = wire.PointCodec(Signature.Hfield.ec).encode(pubKeys[0]).hex()
+
+    async def request(reader, writer, **kwargs):
+      writer.write(json.dumps(kwargs).encode() + b'\n')
+      return json.loads(await reader.readline())
+
+    async def run(path):
+      async with SignatureService(
+          executor=concurrent.futures.ThreadPoolExecutor(1)) as service:
+        server = Server(service)
+        async with await asyncio.start_unix_server(server.handle, path):
+          (reader, writer) = await asyncio.open_unix_connection(path)
+          signed = await request(reader,
+                                 writer,
+                                 id=1,
+                                 op='sign',
+                                 e=42,
+                                 x=int(xs[0]))
+          responses = [
+              signed,
+              await request(reader,
+                            writer,
+                            id=2,
+                            op='verify',
+                            signature=signed['signature'],
+                            pubKey=pubKey,
+                            e=42),
+              await request(reader,
+                            writer,
+                            id=3,
+                            op='verify',
+                            signature=signed['signature'],
+                            pubKey=pubKey,
+                            e=43),
+              await request(reader, writer, id=4, op='metrics'),
+              await request(reader, writer, id=5, op='nope'),
+          ]
+          # The server closes its end once all responses are out.
+          writer.write_eof()
+          self.assertEqual(await reader.read(), b'')
+          writer.close()
+          return responses
+
+    with tempfile.TemporaryDirectory() as d:
+      responses = asyncio.run(run(os.path.join(d, 'socket')))
+    self.assertEqual([r['id'] for r in responses], [1, 2, 3, 4, 5])
+    self.assertTrue(responses[1]['valid'])
+    self.assertFalse(responses[2]['valid'])
+    self.assertEqual(responses[3]['metrics']['requests'], 3)
+    self.assertIn('error', responses[4])
+
+
+if __name__ == '__main__':
+  unittest.main()
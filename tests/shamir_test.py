@@ -0,0 +1,72 @@
+from toycrypto.primefields import Z
+from toycrypto.shamir import *
+import io
+import random
+import unittest
+
+
+class ShamirTests(unittest.TestCase):
+
+  def setUp(self):
+    self.shamir = Shamir(3, 5, rng=random.Random(1))
+
+  def test_split(self):
+    shares = self.shamir.split(42)
+    self.assertEqual([s.x for s in shares], [1, 2, 3, 4, 5])
+    for subset in [shares[:3], shares[2:], [shares[4], shares[0], shares[2]]]:
+      self.assertEqual(self.shamir.combine(subset), self.shamir.field.make(42))
+    # Too few shares, or the same share repeated, are refused.
+    self.assertRaises(ValueError, self.shamir.combine, shares[:2])
+    self.assertRaises(ValueError, self.shamir.combine, shares[:1] * 3)
+
+  def test_splitMany(self):
+    secrets = [random.getrandbits(256) for i in range(20)]
+    shares = self.shamir.splitMany(secrets)
+    self.assertEqual(len(shares), 5)
+    self.assertEqual(self.shamir.combineMany([1, 2, 3], shares[:3]), secrets)
+    self.assertEqual(
+        self.shamir.combineMany([2, 4, 5], [shares[i] for i in (1, 3, 4)]),
+        secrets)
+    self.assertEqual(self.shamir.combineMany(list(range(1, 6)), shares),
+                     secrets)
+    # The POF path reconstructs the same way.
+    single = self.shamir.split(secrets[0])
+    self.assertEqual(self.shamir.combine(single[1:4]),
+                     self.shamir.field.make(secrets[0]))
+
+  def test_lagrange_cached(self):
+    l = self.shamir.lagrange([1, 2, 3])
+    self.assertIs(self.shamir.lagrange((1, 2, 3)), l)
+    # Interpolating f(x) = x at 0.
+    p = self.shamir.field.order
+    self.assertEqual(sum(a * x for (a, x) in zip(l, [1, 2, 3])) % p, 0)
+
+  def test_small_field(self):
+    shamir = Shamir(2, 3, Z(101), random.Random(2))
+    shares = shamir.split(7)
+    self.assertEqual(int(shamir.combine(shares[1:])), 7)
+    self.assertRaises(ValueError, Shamir, 2, 101, Z(101))
+
+  def test_stream(self):
+    blob = bytes(random.getrandbits(8) for i in range(1000))
+    files = [io.BytesIO() for i in range(5)]
+    self.assertEqual(self.shamir.splitStream(io.BytesIO(blob), files, batch=4),
+                     1000)
+    # 32 chunks of 32 bytes, 33 bytes per share.
+    self.assertEqual(len(files[0].getvalue()), 32 * 33)
+    for f in files:
+      f.seek(0)
+    out = io.BytesIO()
+    self.shamir.combineStream({
+        1: files[0],
+        3: files[2],
+        5: files[4]
+    },
+                              out,
+                              1000,
+                              batch=5)
+    self.assertEqual(out.getvalue(), blob)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,112 @@
+from toycrypto.wire import *
+from toycrypto.asymmetric import Signature, secp256k1, secp256k1_G
+from toycrypto.gfpof import GFPOF
+from toycrypto.pof import POF
+from toycrypto.primefields import Z
+import os
+import tempfile
+import unittest
+import weakref
+
+
+class CodecTests(unittest.TestCase):
+
+  def test_scalar(self):
+    codec = ScalarCodec(Z(257))
+    self.assertEqual(codec.size, 2)
+    e = Z(257).make(256)
+    self.assertEqual(codec.encode(e), b'\x01\x00')
+    self.assertEqual(codec.decode(codec.encode(e)), e)
+    self.assertRaises(ValueError, codec.decode, b'\x01\x01')
+
+  def test_point(self):
+    for compressed in (True, False):
+      codec = PointCodec(secp256k1, compressed)
+      self.assertEqual(codec.size, 33 if compressed else 65)
+      P = secp256k1.plus(secp256k1_G, secp256k1_G)
+      self.assertEqual(len(codec.encode(P)), codec.size)
+      self.assertEqual(codec.decode(codec.encode(P)), P)
+      O = secp256k1.plusID()
+      self.assertEqual(codec.encode(O), bytes(codec.size))
+      self.assertEqual(codec.decode(codec.encode(O)), O)
+    codec = PointCodec(secp256k1)
+    self.assertRaises(ValueError, codec.decode, b'\x00' * 32 + b'\x01')
+    self.assertRaises(ValueError, codec.decode, b'\x02' * 32)
+
+  def test_polynomial(self):
+    Z7 = Z(7)
+    pof = POF(Z7)
+    codec = PolynomialCodec(pof, 4)
+    pol = pof.make([3, 0, 5])
+    self.assertEqual(codec.encode(pol), b'\x03\x00\x05\x00')
+    self.assertEqual(codec.decode(codec.encode(pol)), pol)
+    self.assertRaises(ValueError, codec.encode, pof.make([1] * 5))
+
+    Z2 = Z(2)
+    gf = GFPOF(Z2, POF(Z2).make([1, 1, 0, 1, 1, 0, 0, 0, 1]))
+    codec = PolynomialCodec(gf)
+    self.assertEqual(codec.size, 8)
+    x = gf.make([1, 1, 0, 1])
+    self.assertEqual(codec.decode(codec.encode(x)), x)
+
+  def test_signature(self):
+    codec = SignatureCodec()
+    self.assertEqual(codec.size, 65)
+    priv_key = Signature.gen_private_key()
+    sig = Signature.sign(1234, priv_key)
+    decoded = codec.decode(codec.encode(sig))
+    self.assertIsInstance(decoded, Signature)
+    self.assertTrue(decoded.verify(Signature.make_pub_key(priv_key), 1234))
+
+
+class RecordViewTests(unittest.TestCase):
+
+  def setUp(self):
+    self.codec = TupleCodec(IntCodec(4), ScalarCodec(Z(257)))
+    self.records = [(i * 1000, Z(257).make(i)) for i in range(10)]
+    self.data = b''.join(self.codec.encode(r) for r in self.records)
+
+  def test_buffer(self):
+    view = RecordView(self.data, self.codec)
+    self.assertEqual(len(view), 10)
+    self.assertEqual(list(view), self.records)
+    self.assertEqual(view[-1], self.records[-1])
+    self.assertEqual(list(view[2:5]), self.records[2:5])
+    self.assertEqual(len(view[7:3]), 0)
+    self.assertEqual(bytes(view.raw(1)), self.data[6:12])
+    self.assertRaises(IndexError, view.__getitem__, 10)
+    self.assertRaises(ValueError, RecordView, self.data[:-1], self.codec)
+
+  def test_file(self):
+    (fd, path) = tempfile.mkstemp()
+    try:
+      with os.fdopen(fd, 'wb') as f:
+        self.assertEqual(writeRecords(f, self.codec, self.records), 10)
+      with RecordView.open(path, self.codec) as view:
+        self.assertEqual(list(view), self.records)
+    finally:
+      os.remove(path)
+
+  def test_close_with_live_slices(self):
+    (fd, path) = tempfile.mkstemp()
+    try:
+      with os.fdopen(fd, 'wb') as f:
+        writeRecords(f, self.codec, self.records)
+      view = RecordView.open(path, self.codec)
+      part = view[2:5]
+      record = view.raw(3)
+      mapping = weakref.ref(view._mmap)
+      view.close()
+      # Slices are released with the view, raw records stay readable
+      # until they are released themselves, which unmaps the file.
+      self.assertRaises(ValueError, len, part)
+      self.assertEqual(bytes(record), self.data[18:24])
+      self.assertIsNotNone(mapping())
+      record.release()
+      self.assertIsNone(mapping())
+    finally:
+      os.remove(path)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,94 @@
+from toycrypto.pof import POF
+from toycrypto.primefields import Z
+from toycrypto.zvector import *
+import random
+import unittest
+
+
+class ZVectorTests(unittest.TestCase):
+  modulus = 1019
+
+  def setUp(self):
+    self.field = Z(self.modulus)
+    rng = random.Random(1)
+    self.a = [rng.randrange(1, self.modulus) for i in range(20)]
+    self.b = [rng.randrange(self.modulus) for i in range(20)]
+    self.va = ZVector(self.field, self.a)
+    self.vb = ZVector(self.field, [self.field.make(x) for x in self.b])
+
+  def elements(self, ints):
+    return [self.field.make(x) for x in ints]
+
+  def test_access(self):
+    self.assertEqual(len(self.va), 20)
+    self.assertEqual(self.va[3], self.field.make(self.a[3]))
+    self.assertEqual(int(self.va[3]), self.a[3])
+    self.assertEqual(list(self.va), self.elements(self.a))
+    self.assertEqual(self.va[2:5].ints(), self.a[2:5])
+    self.assertEqual(ZVector(self.field, [-1]).ints(), [self.modulus - 1])
+
+  def test_arithmetic(self):
+    f = self.field
+    ea = self.elements(self.a)
+    eb = self.elements(self.b)
+    self.assertEqual(list(self.va.plus(self.vb)),
+                     [f.plus(x, y) for (x, y) in zip(ea, eb)])
+    self.assertEqual(list(self.va.minus(self.vb)),
+                     [f.plus(x, y.plusInv()) for (x, y) in zip(ea, eb)])
+    self.assertEqual(list(self.va.mul(self.vb)),
+                     [f.mul(x, y) for (x, y) in zip(ea, eb)])
+    self.assertEqual(list(self.va.mul(3)), [f.mul(x, f.make(3)) for x in ea])
+    self.assertEqual(list(self.va.plusInv()), [x.plusInv() for x in ea])
+    self.assertEqual(list(self.va.pow(1000)), [x.scalarPow(1000) for x in ea])
+    self.assertEqual(list(self.va.mulInv()), [x.mulInv() for x in ea])
+    self.assertEqual(self.va.sum(), f.make(sum(self.a)))
+    self.assertEqual(self.va.dot(self.vb),
+                     f.make(sum(x * y for (x, y) in zip(self.a, self.b))))
+
+  def test_errors(self):
+    self.assertRaises(ZeroDivisionError, ZVector.zeros(self.field, 3).mulInv)
+    self.assertRaises(ValueError, self.va.plus, self.va[1:])
+    self.assertRaises(ValueError, self.va.plus, ZVector(Z(7), self.a))
+
+  def test_pof(self):
+    pof = POF(self.field)
+    a = pof.make(self.a)
+    b = pof.make(self.b[:7])
+    self.assertEqual(ZVector.fromPOF(a).ints(), self.a)
+    self.assertEqual(ZVector.fromPOF(pof.plusID(), 3).ints(), [0, 0, 0])
+    self.assertEqual(ZVector.fromPOF(a).toPOF(pof), a)
+    # The sparse product, term by term.
+    product = pof.plusID()
+    for (i, x) in a.c.items():
+      for (j, y) in b.c.items():
+        product.addToCoefficient(i + j, self.field.mul(x, y))
+    self.assertEqual(
+        ZVector.fromPOF(a).convolve(ZVector.fromPOF(b)).toPOF(pof), product)
+    self.assertEqual(pof.mul(a, b), product)
+
+
+class PolyModTests(unittest.TestCase):
+
+  def test_reduce(self):
+    p = 1019
+    pof = POF(Z(p))
+    rng = random.Random(3)
+    m = [rng.randrange(p) for i in range(7)] + [17]
+    ring = PolyMod(m, p)
+    for length in (0, 3, 8, 14, 15, 40):
+      a = [rng.randrange(p) for i in range(length)]
+      expected = pof.longDiv(pof.make(a), pof.make(m))[1]
+      self.assertEqual(ring.reduce(a), ZVector.fromPOF(expected, 7).ints())
+    x = ring.reduce([0, 1])
+    self.assertEqual(ring.frobenius(2), ring.pow(x, p * p))
+    self.assertEqual(ring.pow(x, 0), ring.one())
+    with self.assertRaises(ValueError):
+      PolyMod([3, 0], p)
+
+
+class LargeZVectorTests(ZVectorTests):
+  modulus = 2**127 - 1
+
+
+if __name__ == '__main__':
+  unittest.main()
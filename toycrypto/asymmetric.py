@@ -1,23 +1,35 @@
 import collections
 import random
 
+from toycrypto import curves
+from toycrypto import hashing
+from toycrypto import parallel
 from toycrypto.ec import *
 from toycrypto.primefields import *
 
-p = 2**256 - 2**32 - 2**9 - 2**8 - 2**7 - 2**6 - 2**4 - 1
-z = Z(p)
-secp256k1 = EC(z, z.make(0), z.make(7))
-secp256k1_G = secp256k1.fromX(
-    z.make(0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798))
-secp256k1_GField = ECSubfield(
-    secp256k1, secp256k1_G,
-    0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141)
+# The secp256k1 constants, which used to be plain globals, see __getattr__.
+_LAZY = ['secp256k1_GField', 'secp256k1_G', 'secp256k1', 'z', 'p']
+
+
+def __getattr__(name):
+  """The secp256k1 constants, built on first access, see curves."""
+  if name == 'secp256k1_GField':
+    return curves.get('secp256k1')
+  if name == 'secp256k1_G':
+    return curves.get('secp256k1').g
+  if name == 'secp256k1':
+    return curves.get('secp256k1').ec
+  if name == 'z':
+    return curves.get('secp256k1').ec.field
+  if name == 'p':
+    return curves.PARAMS['secp256k1'].p
+  raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 
 class Signature(collections.namedtuple("Signature", ["s", "K"])):
   """Schnorr signatures over secp256k1."""
-  Hfield = secp256k1_GField
-  nF = Z(Hfield.order)
+  Hfield = curves.lazy(lambda: curves.get('secp256k1'))
+  nF = curves.lazy(lambda: curves.scalarField('secp256k1'))
 
   @classmethod
   def sign(cls, e, x):
@@ -25,16 +37,149 @@ class Signature(collections.namedtuple("Signature", ["s", "K"])):
     s = cls.nF.plus(k, cls.nF.mul(x, cls.nF.make(e)))
     return Signature(s, cls.Hfield.make(int(k)))
 
+  @classmethod
+  def signMany(cls, items):
+    """Batched sign for many (e, x), returning the signatures in order.
+
+    The nonce commitments k G share their inversions, see make_pub_keys.
+    """
+    items = list(items)
+    ks = [cls.gen_private_key() for i in items]
+    return [
+        Signature(cls.nF.plus(k, cls.nF.mul(x, cls.nF.make(e))), K)
+        for ((e, x), k, K) in zip(items, ks, cls.make_pub_keys(ks))
+    ]
+
+  # Prefix for hashing messages into challenges, see challenge.
+  CHALLENGE_TAG = b'toycrypto/Signature/challenge'
+
+  @classmethod
+  def challenge(cls, source, chunkSize=hashing.CHUNK_SIZE):
+    """Hashes a message into a challenge e for sign and verify.
+
+    source is anything hashing.digestStream accepts, e.g. a path or a file
+    object. The message is hashed with SHA-512 behind a length-prefixed
+    CHALLENGE_TAG, so the challenges can't collide with hashes of the same
+    message for other purposes. The 512-bit digest is then reduced into nF,
+    with negligible bias.
+    """
+    prefix = bytes([len(cls.CHALLENGE_TAG)]) + cls.CHALLENGE_TAG
+    digest = hashing.digestStream(source, 'sha512', prefix, chunkSize)
+    return int(cls.nF.make(int.from_bytes(digest, 'big')))
+
+  @classmethod
+  def signStream(cls, source, x):
+    """Signs the message read from source in constant memory."""
+    return cls.sign(cls.challenge(source), x)
+
+  def verifyStream(self, source, pubKey, cache=None):
+    """Verifies a signature made with signStream."""
+    return self.verify(pubKey, self.challenge(source), cache)
+
   @classmethod
   def merge(cls, s1, s2):
     return Signature(cls.nF.plus(s1.s, s2.s),
                      Signature.Hfield.ec.plus(s1.K, s2.K))
 
-  def verify(self, pubKey, e):
-    S = Signature.Hfield.make(int(self.s))
-    V = Signature.Hfield.ec.plus(self.K, pubKey.scalarMul(e))
+  @classmethod
+  def aggregate(cls, signatures, workers=1, chunkSize=4096):
+    """Merges any number of signatures, consuming them as a stream.
+
+    Like repeated merge, but the nonce commitments K are summed in Jacobian
+    coordinates by parallel.sumPoints, with a single inversion in total.
+    workers > 1 spreads the chunks over a process pool, None uses all CPUs.
+    The result verifies against aggregateKeys of the public keys.
+    """
+    s = 0
+
+    def commitments():
+      nonlocal s
+      for sig in signatures:
+        s += int(sig.s)
+        yield sig.K
+
+    K = parallel.sumPoints(cls.Hfield.ec, commitments(), workers, chunkSize)
+    return Signature(cls.nF.make(s), K)
+
+  @classmethod
+  def aggregateKeys(cls, pubKeys, workers=1, chunkSize=4096):
+    """The sum of all public keys, see aggregate."""
+    return parallel.sumPoints(cls.Hfield.ec, pubKeys, workers, chunkSize)
+
+  def verify(self, pubKey, e, cache=None):
+    """Checks s G = K + e X.
+
+    cache is an optional WindowTableCache, see makeKeyCache, that speeds
+    up the scalar multiplications for public keys that get verified against
+    repeatedly. The generator G is cached like any other hot key.
+    """
+    if cache is None:
+      S = Signature.Hfield.make(int(self.s))
+      eX = pubKey.scalarMul(e)
+    else:
+      S = cache.scalarMul(Signature.Hfield.g, int(self.s))
+      eX = cache.scalarMul(pubKey, e % Signature.Hfield.order)
+    V = Signature.Hfield.ec.plus(self.K, eX)
     return S == V
 
+  @classmethod
+  def makeKeyCache(cls, maxEntries=64, maxBytes=None, promoteAfter=2):
+    """Returns a public key precomputation cache for verify."""
+    return WindowTableCache(cls.Hfield.order.bit_length(), maxEntries, maxBytes,
+                            promoteAfter)
+
+  @classmethod
+  def verifyBatch(cls, items):
+    """Verifies many (signature, pubKey, e) at once.
+
+    Returns the indices of the invalid signatures, i.e. an empty list if all
+    signatures are valid.
+
+    Every valid signature satisfies s_i G = K_i + e_i X_i. Instead of
+    checking each equation, we check a random linear combination
+
+      sum a_i s_i G = sum a_i K_i + sum a_i e_i X_i
+
+    with a single multi-scalar multiplication. A bad signature only slips
+    through if the random a_i happen to cancel its error, which has
+    probability 2^-128. If the batch fails, we bisect it to find the bad
+    signatures.
+    """
+    items = list(items)
+    bad = []
+
+    def check(lo, hi, knownBad):
+      if not knownBad and cls._verifyCombined(items[lo:hi]):
+        return
+      if hi - lo == 1:
+        bad.append(lo)
+        return
+      mid = (lo + hi) // 2
+      if cls._verifyCombined(items[lo:mid]):
+        # The bad signatures must all be in the other half.
+        check(mid, hi, True)
+      else:
+        check(lo, mid, True)
+        check(mid, hi, False)
+
+    if items:
+      check(0, len(items), False)
+    return bad
+
+  @classmethod
+  def _verifyCombined(cls, items):
+    n = cls.Hfield.order
+    pairs = []
+    s = 0
+    for (sig, pubKey, e) in items:
+      a = random.getrandbits(128) | 1
+      s += a * int(sig.s)
+      pairs.append((a, sig.K))
+      pairs.append((a * e % n, pubKey))
+    # Move the left-hand side over, so that we check for O.
+    pairs.append(((-s) % n, cls.Hfield.g))
+    return cls.Hfield.ec.multiScalarMul(pairs).isPlusID()
+
   @classmethod
   def gen_private_key(cls):
     return cls.nF.make(random.randrange(1, Signature.Hfield.order))
@@ -43,6 +188,11 @@ class Signature(collections.namedtuple("Signature", ["s", "K"])):
   def make_pub_key(cls, private_key):
     return Signature.Hfield.make(int(private_key))
 
+  @classmethod
+  def make_pub_keys(cls, private_keys):
+    """Batched make_pub_key. Yields the public keys in order."""
+    return Signature.Hfield.makeMany(int(k) for k in private_keys)
+
 
 """DH key exchange: A regenerates a secret, x and computes, X=xG. B
 generates a secret y and computes Y=yG. Both parties exchange X & Y
@@ -52,25 +202,47 @@ multiplies X with y and gets xyG. xyG is the shared secret now."""
 
 import hashlib
 
+from toycrypto import rsa
+
 
 class RingSignatureRSA(
-    collections.namedtuple("RignSignatureRSA", ["xs", "m", "v"])):
+    collections.namedtuple("RingSignatureRSA", ["pubKeys", "xs", "v"])):
+  """Rivest-Shamir-Tauman ring signature over RSA trapdoors.
+
+  pubKeys are the rsa.PublicKeys of the ring members. All values live in a
+  common domain of b bits, b being 128 bits more than the largest modulus,
+  see domainBits.
+  """
 
   # E implements a simple 'encryption' method. Sadly it has no
-  # decryption method.
+  # decryption method. It maps b-bit values to b-bit values under key k.
   @classmethod
-  def E(cls, k, v):
-    m = hashlib.sha256()
+  def E(cls, k, v, b):
+    m = hashlib.shake_256()
     m.update(k)
-    m.update(v)
-    return m.digest()
+    m.update(v.to_bytes(b // 8, 'big'))
+    return int.from_bytes(m.digest(b // 8), 'big')
 
   @classmethod
-  def C(cls, k, ys, v):
+  def C(cls, k, ys, v, b):
     for y in ys:
-      v = E(y ^ v)
+      v = cls.E(k, y ^ v, b)
     return v
 
+  @classmethod
+  def domainBits(cls, pubKeys):
+    bits = max(pk.n.bit_length() for pk in pubKeys) + 128
+    return (bits + 7) // 8 * 8
+
+  @classmethod
+  def key(cls, pubKeys, m):
+    """The key k for E, binding the message and the ring."""
+    h = hashlib.sha256()
+    for pk in pubKeys:
+      h.update(b'%x:%x;' % (pk.n, pk.e))
+    h.update(m)
+    return h.digest()
+
   # IDEAS
   # Can we create a trapdoor function based on EC?
   # ---------------------------------------------
@@ -80,13 +252,26 @@ class RingSignatureRSA(
   # Assume that we know 'x', which is the factor of X, x=xG. Then we
   # can produce a Y with a chosen factor y, such that Y=yG.
 
+  # The RSA trapdoor x -> x^e mod n permutes Z(n), but the ring members'
+  # moduli differ. We extend every trapdoor to a permutation of the common
+  # b-bit domain: write x = q n + r, and map it to q n + trapdoor(r), unless
+  # this block of n values sticks out of the domain, where x maps to itself.
+  # With b 128 bits larger than n, the latter happens with probability
+  # 2^-128.
+
   @classmethod
-  def trapdoor(cls, x):
-    raise NotImplementedError()
+  def trapdoor(cls, pubKey, x, b):
+    (q, r) = divmod(x, pubKey.n)
+    if (q + 1) * pubKey.n > 1 << b:
+      return x
+    return q * pubKey.n + pubKey.trapdoor(r)
 
   @classmethod
-  def trapdoor_invert(cls, y):
-    raise NotImplementedError()
+  def trapdoor_invert(cls, privKey, y, b):
+    (q, r) = divmod(y, privKey.n)
+    if (q + 1) * privKey.n > 1 << b:
+      return y
+    return q * privKey.n + privKey.trapdoorInvert(r)
 
   # The verification is defined as:
   #
@@ -99,9 +284,12 @@ class RingSignatureRSA(
   # invert the trapdoor function.
 
   def verify(self, m):
-    ys = map(RignSignatureRSA.trapdoor, self.xs)
-    v_ = RignSignatureRSA.C(sha256(m), ys, v)
-    return v_ == v
+    if not self.pubKeys or len(self.pubKeys) != len(self.xs):
+      return False
+    b = self.domainBits(self.pubKeys)
+    ys = [self.trapdoor(pk, x, b) for (pk, x) in zip(self.pubKeys, self.xs)]
+    v_ = self.C(self.key(self.pubKeys, m), ys, self.v, b)
+    return v_ == self.v
 
   # Signature construction:
   #
@@ -159,24 +347,49 @@ class RingSignatureRSA(
   # without having D and with a free choice of our public key index.
 
   @classmethod
-  def sign(cls, myPubKey, otherPubKeys, m):
-    k = sha256(m)
-    ys = map(trapdoor, otherPubKeys)
-    randomInsertPoint = random(len(otherPubKeys))
-    w = random()
-    v = C(k, ys[0:randomInsertPoint], w)
-    w_ = C(k, ys[randomInsertPoint:], v)
+  def sign(cls, myPrivKey, otherPubKeys, m):
+    otherPubKeys = list(otherPubKeys)
+    randomInsertPoint = random.randrange(0, len(otherPubKeys) + 1)
+    pubKeys = (otherPubKeys[0:randomInsertPoint] + [myPrivKey.publicKey()] +
+               otherPubKeys[randomInsertPoint:])
+    b = cls.domainBits(pubKeys)
+    k = cls.key(pubKeys, m)
+
+    other_xs = [random.getrandbits(b) for pk in otherPubKeys]
+    ys = [cls.trapdoor(pk, x, b) for (pk, x) in zip(otherPubKeys, other_xs)]
+    # Walk from our slot around the end of the ring to get v, then from the
+    # start of the ring back to our slot to get w_.
+    w = random.getrandbits(b)
+    v = cls.C(k, ys[randomInsertPoint:], cls.E(k, w, b), b)
+    w_ = cls.C(k, ys[0:randomInsertPoint], v, b)
     y = w ^ w_
-    x = trapdoor_invert(y)
-    return RignSignatureRSA(
+    my_x = cls.trapdoor_invert(myPrivKey, y, b)
+    return RingSignatureRSA(
+        pubKeys,
         other_xs[0:randomInsertPoint] + [my_x] + other_xs[randomInsertPoint:],
-        m, v)
+        v)
 
 
 # Implement SAG from
 # https://github.com/baro77/RingsCS/blob/main/RingsCheatsheet20210301.pdf
 class RingSignatureEC(
-    collections.namedtuple("RignSignatureEC", ["xs", "m", "v"])):
+    collections.namedtuple("RingSignatureEC", ["ring", "c", "rs"])):
+  """SAG ring signature over secp256k1.
+
+  ring holds the public keys P_0 ... P_n-1 of the ring members, c is the
+  challenge c_0 and rs the responses r_0 ... r_n-1. The signature convinces
+  a verifier that one of the ring members signed, without revealing which.
+
+  Verification recomputes the chain
+
+    c_i+1 = H(k, r_i G + c_i P_i)
+
+  around the ring, where k binds the ring and the message, and accepts if
+  it ends up at c_0 again. The signer at index s picks a random a, starts
+  the chain at c_s+1 = H(k, a G), walks it around with random r_i and
+  closes it with r_s = a - c_s x_s, so that r_s G + c_s P_s = a G.
+  """
+  _gTable = None
 
   @classmethod
   def H(cls, k, v):
@@ -185,16 +398,93 @@ class RingSignatureEC(
     m.update(v)
     return m.digest()
 
-  def verify(self, m, v):
-    v_ = v
-    for y in ys:
-      v_ = H(
-          k,
-          sec256p1k.plus(secp256k1_Hfield.make(ps[i - 1].r),
-                         ps[i].X.scalarmul(c)))
-    return v == v_
+  @classmethod
+  def _challenge(cls, k, point):
+    return int.from_bytes(cls.H(k, point.encode()),
+                          'big') % Signature.Hfield.order
+
+  @classmethod
+  def _generatorTable(cls):
+    if cls._gTable is None:
+      cls._gTable = WindowTable(Signature.Hfield.g,
+                                Signature.Hfield.order.bit_length())
+    return cls._gTable
 
   @classmethod
-  def sign(cls, myPubKey, otherPubKeys, m):
-    # TODO
-    pass
+  def precompute(cls, ring):
+    """Precomputes window tables for the members of a ring.
+
+    Worth it when many signatures are verified against the same ring.
+    """
+    return PrecomputedRing(ring)
+
+  @classmethod
+  def _ringDigest(cls, ring):
+    m = hashlib.sha256()
+    for P in ring:
+      m.update(P.encode())
+    return m.digest()
+
+  @classmethod
+  def _commitments(cls, ring, k, c, rs, start, pre=None):
+    """Walks the chain from c_start, yielding c_start+1, c_start+2, ..."""
+    ec = Signature.Hfield.ec
+    gTable = cls._generatorTable()
+    n = len(ring)
+    for j in range(n):
+      i = (start + j) % n
+      rG = gTable._jacobianScalarMul(rs[i])
+      if pre is None:
+        cP = ec._jacobianScalarMul(ring[i], c)
+      else:
+        cP = pre.tables[i]._jacobianScalarMul(c)
+      c = cls._challenge(k, ec._fromJacobian(ec._jacobianPlus(rG, cP)))
+      yield c
+
+  def verify(self, m, pre=None):
+    """Verifies the signature on m. pre is an optional PrecomputedRing."""
+    if not self.ring or len(self.ring) != len(self.rs):
+      return False
+    if pre is not None and pre.ring != list(self.ring):
+      raise ValueError("Precomputed ring doesn't match the signature's ring")
+    digest = pre.digest if pre is not None else self._ringDigest(self.ring)
+    k = self.H(digest, m)
+    c = self.c
+    for c in self._commitments(self.ring, k, self.c, self.rs, 0, pre):
+      pass
+    return c == self.c
+
+  @classmethod
+  def sign(cls, myPrivKey, otherPubKeys, m):
+    order = Signature.Hfield.order
+    ring = list(otherPubKeys)
+    s = random.randrange(0, len(ring) + 1)
+    ring.insert(s, cls._generatorTable().scalarMul(int(myPrivKey)))
+    n = len(ring)
+    k = cls.H(cls._ringDigest(ring), m)
+
+    a = random.randrange(1, order)
+    rs = [random.randrange(0, order) for i in range(n)]
+    # c_s+1 from a G, then walk the ring up to c_s.
+    cs = {(s + 1) % n: cls._challenge(k, cls._generatorTable().scalarMul(a))}
+    if n > 1:
+      chain = cls._commitments(ring, k, cs[(s + 1) % n], rs, s + 1)
+      for j in range(1, n):
+        cs[(s + 1 + j) % n] = next(chain)
+    rs[s] = (a - cs[s] * int(myPrivKey)) % order
+    return RingSignatureEC(ring, cs[0], rs)
+
+
+class PrecomputedRing(object):
+  """Window tables for the members of a ring, see RingSignatureEC."""
+
+  def __init__(self, ring):
+    self.ring = list(ring)
+    self.digest = RingSignatureEC._ringDigest(self.ring)
+    bits = Signature.Hfield.order.bit_length()
+    self.tables = [WindowTable(P, bits) for P in self.ring]
+
+
+# Star imports export the public globals as before, and the lazy constants,
+# which builds the curve on first use.
+__all__ = [n for n in globals() if not n.startswith('_')] + _LAZY
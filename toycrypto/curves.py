@@ -0,0 +1,128 @@
+"""Registry of named elliptic curves, built on first use.
+
+All parameters are hard-coded, including the generator's y-coordinate, so
+building a curve is a handful of object constructions rather than a square
+root in a 256-bit field. Nothing is built at import time.
+
+Fields and curves are interned, see base.interned, so every user of a named
+curve in a process shares the same objects.
+"""
+import collections
+
+from toycrypto.base import interned
+from toycrypto.ec import EC, ECSubfield
+from toycrypto.edwards import EdwardsCurve
+from toycrypto.primefields import Z
+from typing import Any, Callable, Dict, List
+
+# Short Weierstrass curve y^2 = x^3 + a x + b over Z(p), with a generator
+# (gx, gy) of prime order and the cofactor of the group it generates.
+CurveParams = collections.namedtuple(
+    "CurveParams", ["p", "a", "b", "gx", "gy", "order", "cofactor"])
+
+SECP256K1 = CurveParams(
+    p=2**256 - 2**32 - 977,
+    a=0,
+    b=7,
+    gx=0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798,
+    gy=0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8,
+    order=0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141,
+    cofactor=1)
+
+P256 = CurveParams(
+    p=2**256 - 2**224 + 2**192 + 2**96 - 1,
+    a=2**256 - 2**224 + 2**192 + 2**96 - 4,
+    b=0x5AC635D8AA3A93E7B3EBBD55769886BC651D06B0CC53B0F63BCE3C3E27D2604B,
+    gx=0x6B17D1F2E12C4247F8BCE6E563A440F277037D812DEB33A0F4A13945D898C296,
+    gy=0x4FE342E2FE1A7F9B8EE7EB4A7C0F9E162BCE33576B315ECECBB6406837BF51F5,
+    order=0xFFFFFFFF00000000FFFFFFFFFFFFFFFFBCE6FAADA7179E84F3B9CAC2FC632551,
+    cofactor=1)
+
+# Curve25519, v^2 = u^3 + 486662 u^2 + u, mapped to Weierstrass form by
+# x = u + 486662 / 3. The generator is the image of u = 9.
+CURVE25519 = CurveParams(
+    p=2**255 - 19,
+    a=0x2AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA984914A144,
+    b=0x7B425ED097B425ED097B425ED097B425ED097B425ED097B4260B5E9C7710C864,
+    gx=0x2AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAD245A,
+    gy=0x20AE19A1B8A086B4E01EDD2C7748D14C923D4D7E6D7C61B229E9C5A27ECED3D9,
+    order=2**252 + 27742317777372353535851937790883648493,
+    cofactor=8)
+
+PARAMS: Dict[str, CurveParams] = {
+    'secp256k1': SECP256K1,
+    'P-256': P256,
+    'Curve25519': CURVE25519,
+}
+
+# Twisted Edwards curve a x^2 + y^2 = 1 + d x^2 y^2 over Z(p), with a
+# generator (gx, gy) of prime order and its cofactor, see edwards.
+EdwardsParams = collections.namedtuple(
+    "EdwardsParams", ["p", "a", "d", "gx", "gy", "order", "cofactor"])
+
+# Ed25519 of RFC 8032, birationally equivalent to Curve25519, with
+# d = -121665 / 121666 and gy = 4 / 5.
+ED25519 = EdwardsParams(
+    p=2**255 - 19,
+    a=2**255 - 20,
+    d=0x52036CEE2B6FFE738CC740797779E89800700A4D4141D8AB75EB4DCA135978A3,
+    gx=0x216936D3CD6E53FEC0A4E231FDD6DC5C692CC7609525A7B2C9562D608F25D51A,
+    gy=0x6666666666666666666666666666666666666666666666666666666666666658,
+    order=2**252 + 27742317777372353535851937790883648493,
+    cofactor=8)
+
+EDWARDS_PARAMS: Dict[str, EdwardsParams] = {
+    'Ed25519': ED25519,
+}
+
+
+def names() -> List[str]:
+  return sorted(PARAMS)
+
+
+def get(name: str) -> ECSubfield:
+  """Returns the subgroup generated by the named curve's generator."""
+  try:
+    params = PARAMS[name]
+  except KeyError:
+    raise ValueError("Unknown curve %s, known are %s" %
+                     (name, ", ".join(names())))
+  z = interned(Z, params.p)
+  ec = interned(EC, z, z.make(params.a), z.make(params.b))
+  g = ec.Element(ec, z.make(params.gx), z.make(params.gy))
+  return interned(ECSubfield, ec, g, params.order)
+
+
+def edwards(name: str) -> ECSubfield:
+  """Like get, for the named twisted Edwards curve."""
+  try:
+    params = EDWARDS_PARAMS[name]
+  except KeyError:
+    raise ValueError("Unknown Edwards curve %s, known are %s" %
+                     (name, ", ".join(sorted(EDWARDS_PARAMS))))
+  z = interned(Z, params.p)
+  curve = interned(EdwardsCurve, z, z.make(params.a), z.make(params.d))
+  g = curve.point(z.make(params.gx), z.make(params.gy))
+  return interned(ECSubfield, curve, g, params.order)
+
+
+def scalarField(name: str) -> Z:
+  """Z(order) of the named curve's generator, for private keys."""
+  return interned(Z, get(name).order)
+
+
+class lazy(object):
+  """Class attribute computed by factory on its first access.
+
+    class Signature(...):
+      Hfield = lazy(lambda: curves.get('secp256k1'))
+  """
+
+  def __init__(self, factory: Callable[[], Any]):
+    self.factory = factory
+    self.value = None
+
+  def __get__(self, obj: Any, owner: Any) -> Any:
+    if self.value is None:
+      self.value = self.factory()
+    return self.value
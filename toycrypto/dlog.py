@@ -0,0 +1,388 @@
+"""Discrete logarithm solvers.
+
+Given an element g of order n in some group and h = x g, the functions here
+recover x. They only use group.plus and group.plusID, so they work for
+elliptic curves as well as for multiplicative groups like Z(p)* wrapped into
+base.MulGroup. Elements need to be hashable, and the hash must be the same
+in every process for the parallel Pollard rho.
+
+The solvers exist to demonstrate and measure attacks on weak parameters.
+Their cost is O(sqrt(q)) group operations for the largest prime factor q of
+the group order, which is hopeless for proper cryptographic parameters.
+"""
+import collections
+import math
+import multiprocessing
+import os
+import queue
+import random
+import time
+from array import array
+
+from toycrypto.base import Group, opN
+from toycrypto.primefields import factorize
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Prime orders below this are solved with baby-step giant-step.
+BSGS_LIMIT = 2**32
+
+# Above it rho gives up after this many times sqrt(q) steps. A solvable
+# instance needs about 1.25 sqrt(q), and missing a collision in 16 sqrt(q)
+# has a probability of e^-128.
+RHO_STEP_FACTOR = 16
+
+
+def _mul(group: Group, a: Any, n: int) -> Any:
+  return opN(a, n, group.plusID(), group.plus)
+
+
+class _CompactTable(object):
+  """Open addressing hash table from element hashes to small integers.
+
+  A dict from elements to baby step indices keeps every element object
+  alive. We only need candidate indices for an element, so we keep a 64-bit
+  fingerprint of the element's hash and the index in two flat arrays,
+  costing 12 bytes per slot. get yields all indices with a matching
+  fingerprint and the caller has to verify them.
+  """
+
+  def __init__(self, size: int):
+    # Keep the load factor below 1/2 so probe sequences stay short.
+    self.mask = (1 << (2 * size).bit_length()) - 1
+    self.keys = array('Q', [0]) * (self.mask + 1)
+    # Indices are stored off by one, so 0 marks an empty slot.
+    self.values = array('I', [0]) * (self.mask + 1)
+
+  def add(self, h: int, value: int) -> None:
+    key = h & 0xFFFFFFFFFFFFFFFF
+    slot = key & self.mask
+    while self.values[slot]:
+      slot = (slot + 1) & self.mask
+    self.keys[slot] = key
+    self.values[slot] = value + 1
+
+  def get(self, h: int) -> Iterator[int]:
+    key = h & 0xFFFFFFFFFFFFFFFF
+    slot = key & self.mask
+    while self.values[slot]:
+      if self.keys[slot] == key:
+        yield self.values[slot] - 1
+      slot = (slot + 1) & self.mask
+
+
+def bsgs(group: Group, g: Any, h: Any, order: int) -> Optional[int]:
+  """Baby-step giant-step.
+
+  Write x = i m + j with m = ceil(sqrt(order)). We store the baby steps j g
+  for 0 <= j < m and then walk the giant steps h - i m g until we hit one of
+  them. Returns None if h is not a multiple of g.
+  """
+  m = math.isqrt(order - 1) + 1
+  table = _CompactTable(m)
+  e = group.plusID()
+  for j in range(m):
+    table.add(hash(e), j)
+    e = group.plus(e, g)
+
+  giant = _mul(group, g, (order - m) % order)
+  gamma = h
+  for i in range(m):
+    for j in table.get(hash(gamma)):
+      if _mul(group, g, j) == gamma:
+        return (i * m + j) % order
+    gamma = group.plus(gamma, giant)
+  return None
+
+
+class Progress(
+    collections.namedtuple("Progress",
+                           ["steps", "seconds", "workers", "distinguished"])):
+  """Throughput report handed to the progress callback of rho."""
+
+  @property
+  def stepsPerSecond(self) -> float:
+    return self.steps / self.seconds if self.seconds else 0.0
+
+  @property
+  def stepsPerSecondPerCore(self) -> float:
+    return self.stepsPerSecond / max(1, self.workers)
+
+
+class _Walk(object):
+  """An r-adding walk X -> X + M_j through elements X = a g + b h.
+
+  The partition j and whether X is distinguished both derive from hash(X),
+  so every process walks the same way from the same X. Two walks that
+  collide stay together until the next distinguished point, where the
+  collision shows up as two different (a, b) for the same X.
+  """
+
+  def __init__(self, group: Group, g: Any, h: Any, order: int, partitions: int,
+               distinguishedBits: int, rng: random.Random):
+    self.group = group
+    self.g = g
+    self.h = h
+    self.order = order
+    self.coefficients = [
+        (rng.randrange(order), rng.randrange(order)) for i in range(partitions)
+    ]
+    self.steps = [self._combine(a, b) for (a, b) in self.coefficients]
+    # Restarting from a fresh random a g + b h costs two scalar
+    # multiplications, while walks are only about 2^distinguishedBits steps
+    # long. Instead, a walk that reached a distinguished point continues from
+    # that point plus a random element of a second table.
+    self.restartCoefficients = [
+        (rng.randrange(order), rng.randrange(order)) for i in range(partitions)
+    ]
+    self.restarts = [self._combine(a, b) for (a, b) in self.restartCoefficients]
+    self.dmask = (1 << distinguishedBits) - 1
+    # Walks stuck in a cycle without distinguished points get restarted.
+    self.maxLength = 20 << distinguishedBits
+    # Walk state [X, a, b, length], kept across calls to run.
+    self.walks: List[List[Any]] = []
+
+  def _combine(self, a: int, b: int) -> Any:
+    return self.group.plus(_mul(self.group, self.g, a),
+                           _mul(self.group, self.h, b))
+
+  def _restart(self, w: List[Any], rng: random.Random) -> None:
+    k = rng.randrange(len(self.restarts))
+    (a, b) = self.restartCoefficients[k]
+    w[0] = self.group.plus(w[0], self.restarts[k])
+    w[1] = (w[1] + a) % self.order
+    w[2] = (w[2] + b) % self.order
+    w[3] = 0
+
+  def run(self, seed: int, steps: int,
+          parallel: int) -> Tuple[List[Tuple[Any, int, int]], int]:
+    """Steps parallel walks for about steps steps in total.
+
+    Returns the distinguished points found as (X, a, b) and the number of
+    steps taken. Groups with a plusMany, like EC, advance all walks of a
+    round together and share the inversions of their affine additions.
+    """
+    rng = random.Random(seed)
+    group = self.group
+    order = self.order
+    r = len(self.steps)
+    plusMany = getattr(group, 'plusMany', None)
+    while len(self.walks) < parallel:
+      (a, b) = (rng.randrange(order), rng.randrange(order))
+      self.walks.append([self._combine(a, b), a, b, 0])
+    walks = self.walks
+    found = []
+    done = 0
+    while done < steps:
+      js = [hash(w[0]) % r for w in walks]
+      pairs = [(w[0], self.steps[j]) for (w, j) in zip(walks, js)]
+      if plusMany:
+        nexts = list(plusMany(pairs, len(pairs)))
+      else:
+        nexts = [group.plus(a, b) for (a, b) in pairs]
+      for (w, j, X) in zip(walks, js, nexts):
+        (a, b) = self.coefficients[j]
+        w[0] = X
+        w[1] = (w[1] + a) % order
+        w[2] = (w[2] + b) % order
+        w[3] += 1
+        if (hash(X) // r) & self.dmask == 0:
+          found.append((X, w[1], w[2]))
+          self._restart(w, rng)
+        elif w[3] > self.maxLength:
+          self._restart(w, rng)
+      done += len(walks)
+    return (found, done)
+
+
+_worker_walk: Optional[_Walk] = None
+
+
+def _initWorker(walk: _Walk) -> None:
+  global _worker_walk
+  _worker_walk = walk
+
+
+def _runWorker(seed: int, steps: int,
+               parallel: int) -> Tuple[List[Tuple[Any, int, int]], int]:
+  assert _worker_walk is not None
+  return _worker_walk.run(seed, steps, parallel)
+
+
+def rho(group: Group,
+        g: Any,
+        h: Any,
+        order: int,
+        workers: Optional[int] = None,
+        partitions: int = 20,
+        distinguishedBits: Optional[int] = None,
+        parallelWalks: int = 32,
+        progress: Optional[Callable[[Progress], None]] = None,
+        seed: Optional[int] = None,
+        maxSteps: Optional[int] = None) -> Optional[int]:
+  """Pollard rho with r-adding walks and distinguished points.
+
+  order has to be prime. Walks are started at random a g + b h and stepped
+  until they hit a distinguished point, i.e. one whose hash has
+  distinguishedBits zero bits. With workers > 1 the walks are fanned out
+  over a multiprocessing pool and only the distinguished points travel
+  back. Once the same point is reached with a g + b h = a' g + b' h,
+  x = (a' - a) / (b - b') mod order.
+
+  Gives up and returns None after maxSteps steps, if given.
+  """
+  if order < 1000:
+    return bsgs(group, g, h, order)
+
+  rng = random.Random(seed)
+  if distinguishedBits is None:
+    distinguishedBits = max(0, order.bit_length() // 4 - 2)
+  walk = _Walk(group, g, h, order, partitions, distinguishedBits, rng)
+  stepsPerTask = max(1024, parallelWalks << distinguishedBits)
+  if workers is None:
+    workers = os.cpu_count() or 1
+
+  start = time.time()
+  total = 0
+  seen: Dict[Any, Tuple[int, int]] = {}
+
+  def collect(result: Tuple[List[Tuple[Any, int, int]], int]) -> Optional[int]:
+    nonlocal total
+    (found, steps) = result
+    total += steps
+    if progress:
+      progress(Progress(total, time.time() - start, workers, len(seen)))
+    for (X, a, b) in found:
+      if X not in seen:
+        seen[X] = (a, b)
+        continue
+      (a2, b2) = seen[X]
+      if (b - b2) % order:
+        x = (a2 - a) * pow(b - b2, -1, order) % order
+        if _mul(group, g, x) == h:
+          return x
+    return None
+
+  def exhausted() -> bool:
+    return maxSteps is not None and total >= maxSteps
+
+  if workers <= 1:
+    while not exhausted():
+      x = collect(walk.run(rng.getrandbits(64), stepsPerTask, parallelWalks))
+      if x is not None:
+        return x
+    return None
+
+  results: 'queue.Queue[Any]' = queue.Queue()
+  with multiprocessing.Pool(workers, initializer=_initWorker,
+                            initargs=(walk,)) as pool:
+
+    def submit() -> None:
+      pool.apply_async(_runWorker,
+                       (rng.getrandbits(64), stepsPerTask, parallelWalks),
+                       callback=results.put,
+                       error_callback=results.put)
+
+    # Keep two tasks per worker in flight so no worker idles while we
+    # process results.
+    for i in range(2 * workers):
+      submit()
+    while not exhausted():
+      result = results.get()
+      if isinstance(result, BaseException):
+        raise result
+      x = collect(result)
+      if x is not None:
+        return x
+      submit()
+  return None
+
+
+def pohligHellman(
+    group: Group,
+    g: Any,
+    h: Any,
+    order: int,
+    factors: Optional[Dict[int, int]] = None,
+    solve: Optional[Callable[[Group, Any, Any, int], Optional[int]]] = None
+) -> Optional[int]:
+  """Pohlig-Hellman reduction to prime order subgroups.
+
+  For every prime power q^e dividing the order, we project g and h into the
+  subgroup of order q^e and find x mod q^e one base-q digit at a time with
+  solve, which defaults to bsgs or rho depending on q. The Chinese remainder
+  theorem then combines the residues. The cost is dominated by the largest
+  prime factor of the order.
+  """
+  if factors is None:
+    factors = factorize(order)
+  if solve is None:
+    solve = _solvePrime
+
+  x = 0
+  modulus = 1
+  for (q, e) in sorted(factors.items()):
+    qe = q**e
+    gq = _mul(group, g, order // qe)
+    hq = _mul(group, h, order // qe)
+    # gamma has order q.
+    gamma = _mul(group, gq, q**(e - 1))
+    xq = 0
+    for k in range(e):
+      # Strip the digits we already know and project to the order q
+      # subgroup, leaving d gamma for the next digit d.
+      hk = _mul(group, group.plus(hq, _mul(group, gq, (qe - xq) % qe)),
+                q**(e - 1 - k))
+      d = solve(group, gamma, hk, q)
+      if d is None:
+        return None
+      xq += d * q**k
+
+    # Combine x mod modulus with xq mod qe.
+    t = (xq - x) * pow(modulus, -1, qe) % qe
+    x += modulus * t
+    modulus *= qe
+
+  x %= order
+  return x if _mul(group, g, x) == h else None
+
+
+def _solvePrime(
+    group: Group,
+    g: Any,
+    h: Any,
+    q: int,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[Progress], None]] = None) -> Optional[int]:
+  if q < BSGS_LIMIT:
+    return bsgs(group, g, h, q)
+  # rho only finds a collision for h in <g>, so rule out the rest: q h = 0
+  # decides it when the q-torsion is cyclic, the step bound otherwise.
+  if _mul(group, h, q) != group.plusID():
+    return None
+  return rho(group,
+             g,
+             h,
+             q,
+             workers=workers,
+             progress=progress,
+             maxSteps=RHO_STEP_FACTOR * math.isqrt(q))
+
+
+def dlog(
+    group: Group,
+    g: Any,
+    h: Any,
+    order: int,
+    factors: Optional[Dict[int, int]] = None,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[Progress], None]] = None) -> Optional[int]:
+  """Finds x with x g = h, where g has the given order.
+
+  Uses Pohlig-Hellman on top of bsgs for small and rho for large prime
+  factors. Returns None if h is not a multiple of g.
+  """
+
+  def solve(group: Group, g: Any, h: Any, q: int) -> Optional[int]:
+    return _solvePrime(group, g, h, q, workers, progress)
+
+  return pohligHellman(group, g, h, order, factors, solve)
@@ -1,6 +1,102 @@
+import collections
+import itertools
+import math
+
 from toycrypto.base import Field
 from toycrypto.base import Group
-from typing import Union, Optional
+from toycrypto.base import interned
+from toycrypto.formula import Formula
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Formulas for EC, see formula.Formula. They take the field f, the curve
+# coefficients A and B and the coordinates.
+
+
+def _chordFormula(f, A, B, x1, y1, x2, y2):
+  """(x1, y1) + (x2, y2) for x1 != x2."""
+  # Slope of the line through both points.
+  lmbd = f.mul(f.plus(y2, y1.plusInv()), f.plus(x2, x1.plusInv()).mulInv())
+  # The line meets the curve in a third point, whose mirror image is the sum.
+  x3 = f.plus(f.mul(lmbd, lmbd), f.plus(x1, x2).plusInv())
+  y3 = f.plus(f.mul(lmbd, f.plus(x1, x3.plusInv())), y1.plusInv())
+  return (x3, y3)
+
+
+def _tangentFormula(f, A, B, x, y):
+  """2 (x, y) for y != 0."""
+  # Slope of the tangent (3 x^2 + A) / 2 y.
+  x2 = f.mul(x, x)
+  lmbd = f.mul(f.plus(f.plus(f.plus(x2, x2), x2), A), f.plus(y, y).mulInv())
+  x3 = f.plus(f.mul(lmbd, lmbd), f.plus(x, x).plusInv())
+  y3 = f.plus(f.mul(lmbd, f.plus(x, x3.plusInv())), y.plusInv())
+  return (x3, y3)
+
+
+def _jacobianDoubleFormula(f, A, B, x, y, z):
+  """2 (x, y, z) in Jacobian coordinates, for y, z != 0."""
+  y2 = f.mul(y, y)
+  # S = 4 x y^2
+  s = f.mul(x, y2)
+  s = f.plus(s, s)
+  s = f.plus(s, s)
+  # M = 3 x^2 + A z^4
+  x2 = f.mul(x, x)
+  z2 = f.mul(z, z)
+  m = f.plus(f.plus(f.plus(x2, x2), x2), f.mul(A, f.mul(z2, z2)))
+  # x3 = M^2 - 2 S
+  x3 = f.plus(f.mul(m, m), f.plus(s, s).plusInv())
+  # y3 = M (S - x3) - 8 y^4
+  y4_8 = f.mul(y2, y2)
+  y4_8 = f.plus(y4_8, y4_8)
+  y4_8 = f.plus(y4_8, y4_8)
+  y4_8 = f.plus(y4_8, y4_8)
+  y3 = f.plus(f.mul(m, f.plus(s, x3.plusInv())), y4_8.plusInv())
+  # z3 = 2 y z
+  yz = f.mul(y, z)
+  return (x3, y3, f.plus(yz, yz))
+
+
+def _jacobianPlusFormula(f, A, B, x1, y1, z1, x2, y2, z2):
+  """(x1, y1, z1) + (x2, y2, z2) in Jacobian coordinates, plus h and r.
+
+  The sum is only valid for non-zero z1, z2 and h, if h is zero, the points
+  are equal for zero r, and inverse otherwise.
+  """
+  # Bring both points to the common denominator z1^2 z2^2 (z1^3 z2^3).
+  z1z1 = f.mul(z1, z1)
+  z2z2 = f.mul(z2, z2)
+  u1 = f.mul(x1, z2z2)
+  u2 = f.mul(x2, z1z1)
+  s1 = f.mul(y1, f.mul(z2, z2z2))
+  s2 = f.mul(y2, f.mul(z1, z1z1))
+  h = f.plus(u2, u1.plusInv())
+  r = f.plus(s2, s1.plusInv())
+  h2 = f.mul(h, h)
+  h3 = f.mul(h2, h)
+  u1h2 = f.mul(u1, h2)
+  # x3 = r^2 - h^3 - 2 u1 h^2
+  x3 = f.plus(f.mul(r, r), f.plus(h3, f.plus(u1h2, u1h2)).plusInv())
+  # y3 = r (u1 h^2 - x3) - s1 h^3
+  y3 = f.plus(f.mul(r, f.plus(u1h2, x3.plusInv())), f.mul(s1, h3).plusInv())
+  return (x3, y3, f.mul(h, f.mul(z1, z2)), h, r)
+
+
+def _jacobianMixedPlusFormula(f, A, B, x1, y1, z1, x2, y2):
+  """(x1, y1, z1) + (x2, y2, 1), plus h and r as in _jacobianPlusFormula.
+
+  With z2 = 1, u1 = x1 and s1 = y1, which saves four multiplications.
+  """
+  z1z1 = f.mul(z1, z1)
+  u2 = f.mul(x2, z1z1)
+  s2 = f.mul(y2, f.mul(z1, z1z1))
+  h = f.plus(u2, x1.plusInv())
+  r = f.plus(s2, y1.plusInv())
+  h2 = f.mul(h, h)
+  h3 = f.mul(h2, h)
+  u1h2 = f.mul(x1, h2)
+  x3 = f.plus(f.mul(r, r), f.plus(h3, f.plus(u1h2, u1h2)).plusInv())
+  y3 = f.plus(f.mul(r, f.plus(u1h2, x3.plusInv())), f.mul(y1, h3).plusInv())
+  return (x3, y3, f.mul(h, z1), h, r)
 
 
 class EC(Group):
@@ -14,68 +110,354 @@ class EC(Group):
     self.A = A
     self.B = B
     self.O = EC.Element(self, None, None)
+    # Compiled formulas by their function, see _formula.
+    self._formulas: Dict[Callable[..., Any], Callable[..., Any]] = {}
 
   def __eq__(self, other: object) -> bool:
     return self.field == other.field and self.A == other.A and self.B == other.B
 
-  def fromX(self, x: 'Field.Element') -> Optional['EC.Element']:
-    y = self.field.plus(x.scalarPow(3),
-                        self.field.plus(self.field.mul(self.A, x),
-                                        self.B)).sqrt()
+  def __hash__(self) -> int:
+    return hash((self.field, self.A, self.B))
+
+  def __reduce__(self) -> Tuple[Any, ...]:
+    return (interned, (type(self), self.field, self.A, self.B))
+
+  def fromX(self,
+            x: 'Field.Element',
+            odd: Optional[bool] = None) -> Optional['EC.Element']:
+    """Returns a point with the given x-coordinate, if there is one.
+
+    Both (x, y) and (x, -y) are on the curve. If odd is given, we pick the
+    y with the requested parity, otherwise whichever root sqrt returns.
+    """
+    y = self._rhs(x).sqrt()
     if not y:
       return None
 
+    if odd is not None and bool(int(y) & 1) != odd:
+      y = y.plusInv()
     return self.Element(self, x, y)
 
+  def _rhs(self, x: 'Field.Element') -> 'Field.Element':
+    """x^3 + a x + b"""
+    return self.field.plus(x.scalarPow(3),
+                           self.field.plus(self.field.mul(self.A, x), self.B))
+
+  def byteLength(self) -> int:
+    """Length of a SEC1 encoded coordinate."""
+    return (self.field.getOrder().bit_length() + 7) // 8
+
+  def decode(self, data: bytes) -> 'EC.Element':
+    """Decodes a SEC1 compressed, uncompressed or infinity encoded point."""
+    (point, end) = self._decodeAt(memoryview(data), 0)
+    if end != len(data):
+      raise ValueError("Trailing bytes after encoded point")
+    return point
+
+  def decodeMany(self, buf: Union[bytes, memoryview]) -> Iterator['EC.Element']:
+    """Decodes concatenated SEC1 encoded points, yielding them in order.
+
+    The leading byte of every record tells its length, so compressed,
+    uncompressed and infinity encodings can be freely mixed. We only take
+    memoryview slices of buf, hence no record gets copied.
+    """
+    mv = memoryview(buf)
+    pos = 0
+    while pos < len(mv):
+      (point, pos) = self._decodeAt(mv, pos)
+      yield point
+
+  def _decodeAt(self, mv: memoryview, pos: int) -> Tuple['EC.Element', int]:
+    """Decodes the point starting at mv[pos] returning it and its end."""
+    n = self.byteLength()
+    prefix = mv[pos]
+    if prefix == 0:
+      return (self.O, pos + 1)
+    if prefix in (2, 3):
+      end = pos + 1 + n
+    elif prefix == 4:
+      end = pos + 1 + 2 * n
+    else:
+      raise ValueError("Unknown point encoding %#x at offset %d" %
+                       (prefix, pos))
+    if end > len(mv):
+      raise ValueError("Truncated point at offset %d" % pos)
+
+    order = self.field.getOrder()
+    xi = int.from_bytes(mv[pos + 1:pos + 1 + n], 'big')
+    if xi >= order:
+      raise ValueError("Invalid x-coordinate at offset %d" % pos)
+    x = self.field.make(xi)
+    rhs = self._rhs(x)
+
+    if prefix == 4:
+      yi = int.from_bytes(mv[pos + 1 + n:end], 'big')
+      y = self.field.make(yi)
+      if yi >= order or self.field.mul(y, y) != rhs:
+        raise ValueError("Point at offset %d is not on the curve" % pos)
+      return (self.Element(self, x, y), end)
+
+    # The Jacobi symbol rejects x-coordinates without a point quickly, so we
+    # only pay for the square root when there is one.
+    if rhs.jacobi() == -1:
+      raise ValueError("Invalid x-coordinate at offset %d" % pos)
+    y = rhs.sqrt()
+    if y is None:
+      raise ValueError("Invalid x-coordinate at offset %d" % pos)
+    if int(y) & 1 != prefix & 1:
+      y = y.plusInv()
+    return (self.Element(self, x, y), end)
+
   def plusID(self) -> 'EC.Element':
     return self.O
 
   def plus(self, a: 'EC.Element', b: Group.Element) -> 'EC.Element':
     # Implemented according to
     # https://www.math.brown.edu/~jhs/Presentations/WyomingEllipticCurve.pdf
-    f = self.field
-
     if a.isPlusID():
       return b
 
     if b.isPlusID():
       return a
 
-    if a.x == b.x and a.y == b.y:
-      if a.y == f.plusID():
+    if a.x == b.x:
+      # Either b = -a, or b = a with a vertical tangent.
+      if a.y != b.y or a.y.isPlusID():
         return self.plusID()
-      else:
-        # This is the tangency case
-        # x^2
-        x2 = f.mul(a.x, a.x)
-        # 3x^2
-        x23 = f.plus(f.plus(x2, x2), x2)
-        # y^2
-        twoy = f.plus(a.y, a.y)
-        # y^-2
-        twoy_inv = twoy.mulInv()
-        lmbd = f.mul(f.plus(x23, self.A), twoy_inv)
-
-        minus_x3 = f.mul(a.x, x2).plusInv()
-        vu = f.mul(
-            f.plus(minus_x3, f.plus(f.mul(self.A, a.x),
-                                    f.plus(self.B, self.B))), twoy_inv)
+      (x, y) = self._formula(_tangentFormula, 2)(a.x, a.y)
     else:
-      # As This implies a.y != b.y, which can only happen when a.y = -b.y. Hence, return O.
-      if a.x == b.x:
-        return self.plusID()
+      (x, y) = self._formula(_chordFormula, 4)(a.x, a.y, b.x, b.y)
+    return self.Element(self, x, y)
+
+  def _formula(self, fn: Callable[..., Any], nargs: int) -> Callable[..., Any]:
+    """fn(f, A, B, *args) compiled for this curve, see formula.Formula."""
+    compiled = self._formulas.get(fn)
+    if compiled is None:
+      traced = Formula.trace(fn, nargs, (self.A, self.B))
+      compiled = self._formulas[fn] = traced.compile(self.field)
+    return compiled
+
+  def plusMany(self,
+               pairs: Iterable[Tuple['EC.Element', 'EC.Element']],
+               chunkSize: int = 256) -> Iterator['EC.Element']:
+    """Adds many pairs of points, yielding a + b for every (a, b) in order.
+
+    Every affine addition needs a field inversion to compute the slope of
+    the chord or tangent. We consume the pairs in chunks of chunkSize and
+    invert all slope denominators of a chunk together via
+    Field.batchMulInv, so a chunk costs a single inversion.
+    """
+    it = iter(pairs)
+    while True:
+      chunk = list(itertools.islice(it, chunkSize))
+      if not chunk:
+        return
+      yield from self._plusChunk(chunk)
+
+  def _plusChunk(
+      self, chunk: List[Tuple['EC.Element',
+                              'EC.Element']]) -> List['EC.Element']:
+    f = self.field
+    results: List['EC.Element'] = [self.O] * len(chunk)
+    # (index into chunk, slope numerator, slope denominator)
+    pending = []
+    for i, (a, b) in enumerate(chunk):
+      if a.isPlusID():
+        results[i] = b
+      elif b.isPlusID():
+        results[i] = a
+      elif a.x == b.x:
+        if a.y == b.y and a.y != f.plusID():
+          # Tangency case, the slope is (3x^2 + A) / 2y
+          x2 = f.mul(a.x, a.x)
+          pending.append((i, f.plus(f.plus(f.plus(x2, x2), x2),
+                                    self.A), f.plus(a.y, a.y)))
+        # Otherwise a = -b and the result stays O.
       else:
-        lmbd = f.mul(f.plus(b.y, a.y.plusInv()),
-                     f.plus(b.x, a.x.plusInv()).mulInv())
-        vu = f.mul(f.plus(f.mul(a.y, b.x),
-                          f.mul(b.y, a.x).plusInv()),
-                   f.plus(b.x, a.x.plusInv()).mulInv())
-    lmbd2 = f.mul(lmbd, lmbd)
-    return self.Element(
-        self, f.plus(lmbd2,
-                     f.plus(a.x, b.x).plusInv()),
-        f.plus(f.mul(lmbd, f.plus(a.x, b.x)),
-               f.plus(vu, f.mul(lmbd2, lmbd)).plusInv()))
+        # Chord case, the slope is (y_b - y_a) / (x_b - x_a)
+        pending.append((i, f.plus(b.y,
+                                  a.y.plusInv()), f.plus(b.x, a.x.plusInv())))
+
+    inverses = f.batchMulInv([d for (_, _, d) in pending])
+    for (i, num, _), inv in zip(pending, inverses):
+      a, b = chunk[i]
+      lmbd = f.mul(num, inv)
+      x = f.plus(f.mul(lmbd, lmbd), f.plus(a.x, b.x).plusInv())
+      y = f.plus(f.mul(lmbd, f.plus(a.x, x.plusInv())), a.y.plusInv())
+      results[i] = self.Element(self, x, y)
+    return results
+
+  def scalarMulMany(self,
+                    point: 'EC.Element',
+                    scalars: Iterable[int],
+                    chunkSize: int = 256) -> Iterator['EC.Element']:
+    """Multiplies point with every scalar, yielding the results in order.
+
+    This is double-and-add run in lockstep over a chunk of scalars. The
+    doublings 2^i point are shared by all scalars, and in round i all
+    scalars with bit i set add 2^i point to their accumulator. The additions
+    of a round go through _plusChunk and hence share one inversion.
+    """
+    doublings = [point]
+    it = iter(scalars)
+    while True:
+      chunk = list(itertools.islice(it, chunkSize))
+      if not chunk:
+        return
+      for n in chunk:
+        if n < 0:
+          raise ValueError("Scalar %d can't be negative" % n)
+
+      bits = max(n.bit_length() for n in chunk)
+      while len(doublings) < bits:
+        doublings.append(self.plus(doublings[-1], doublings[-1]))
+
+      acc = [self.O] * len(chunk)
+      for i in range(bits):
+        idx = [j for j, n in enumerate(chunk) if (n >> i) & 1]
+        sums = self._plusChunk([(acc[j], doublings[i]) for j in idx])
+        for j, s in zip(idx, sums):
+          acc[j] = s
+      yield from acc
+
+  # Jacobian coordinates
+  #
+  # Affine addition needs an inversion for the slope. In Jacobian
+  # coordinates, a point (X, Y, Z) stands for the affine point
+  # (X / Z^2, Y / Z^3), and the denominators are carried along in Z instead
+  # of being divided out. Chains of additions then only need a single
+  # inversion at the very end to get back to affine coordinates. The point
+  # at infinity is any point with Z = 0.
+
+  def _toJacobian(self, a: 'EC.Element') -> 'JacobianPoint':
+    f = self.field
+    if a.isPlusID():
+      return (f.mulID(), f.mulID(), f.plusID())
+    return (a.x, a.y, f.mulID())
+
+  def _fromJacobian(self, a: 'JacobianPoint') -> 'EC.Element':
+    return self._fromJacobianMany([a])[0]
+
+  def _fromJacobianMany(self,
+                        points: List['JacobianPoint']) -> List['EC.Element']:
+    """Converts back to affine, sharing one inversion across all points."""
+    f = self.field
+    finite = [i for (i, a) in enumerate(points) if not a[2].isPlusID()]
+    inverses = f.batchMulInv([points[i][2] for i in finite])
+    result = [self.O] * len(points)
+    for (i, zinv) in zip(finite, inverses):
+      (x, y, _) = points[i]
+      zinv2 = f.mul(zinv, zinv)
+      result[i] = self.Element(self, f.mul(x, zinv2),
+                               f.mul(y, f.mul(zinv2, zinv)))
+    return result
+
+  def _jacobianDouble(self, a: 'JacobianPoint') -> 'JacobianPoint':
+    f = self.field
+    (x, y, z) = a
+    if z.isPlusID() or y.isPlusID():
+      return (f.mulID(), f.mulID(), f.plusID())
+    return self._formula(_jacobianDoubleFormula, 3)(x, y, z)
+
+  def _jacobianPlus(self, a: 'JacobianPoint',
+                    b: 'JacobianPoint') -> 'JacobianPoint':
+    f = self.field
+    if a[2].isPlusID():
+      return b
+    if b[2].isPlusID():
+      return a
+    (x3, y3, z3, h, r) = self._formula(_jacobianPlusFormula, 6)(*a, *b)
+    if h.isPlusID():
+      # Same x, so a = b or a = -b.
+      if r.isPlusID():
+        return self._jacobianDouble(a)
+      return (f.mulID(), f.mulID(), f.plusID())
+    return (x3, y3, z3)
+
+  def _jacobianPlusAffine(self, a: 'JacobianPoint',
+                          b: 'EC.Element') -> 'JacobianPoint':
+    """_jacobianPlus for an affine b, via the cheaper mixed addition."""
+    f = self.field
+    if b.isPlusID():
+      return a
+    if a[2].isPlusID():
+      return self._toJacobian(b)
+    (x3, y3, z3, h, r) = self._formula(_jacobianMixedPlusFormula, 5)(*a, b.x,
+                                                                     b.y)
+    if h.isPlusID():
+      if r.isPlusID():
+        return self._jacobianDouble(a)
+      return (f.mulID(), f.mulID(), f.plusID())
+    return (x3, y3, z3)
+
+  def _jacobianSum(self, points: Iterable['EC.Element']) -> 'JacobianPoint':
+    acc = self._toJacobian(self.O)
+    for p in points:
+      acc = self._jacobianPlusAffine(acc, p)
+    return acc
+
+  def sum(self, points: Iterable['EC.Element']) -> 'EC.Element':
+    """The sum of all points, with a single inversion at the end."""
+    return self._fromJacobian(self._jacobianSum(points))
+
+  def _jacobianScalarMul(self, a: 'EC.Element', n: int) -> 'JacobianPoint':
+    """Double-and-add like opN, but staying in Jacobian coordinates."""
+    if n < 0:
+      raise ValueError("Scalar %d can't be negative" % n)
+    acc = self._toJacobian(self.O)
+    w = self._toJacobian(a)
+    while n:
+      if n % 2:
+        acc = self._jacobianPlus(acc, w)
+      w = self._jacobianDouble(w)
+      n = n // 2
+    return acc
+
+  def multiScalarMul(self,
+                     pairs: Iterable[Tuple[int, 'EC.Element']]) -> 'EC.Element':
+    """Computes the sum of n_i P_i over all (n_i, P_i) in pairs.
+
+    This is Pippenger's bucket method. The scalars are cut into c-bit
+    windows. For every window, the points are sorted into 2^c - 1 buckets by
+    their window digit d, one addition per point. The weighted bucket sum
+    sum d B_d is then formed with running sums
+
+      B_top + (B_top + B_top-1) + ... + (B_top + ... + B_1)
+
+    which takes two additions per bucket. The windows are combined from the
+    top like in double-and-add, with c doublings per window. Everything runs
+    in Jacobian coordinates, so the whole sum needs a single inversion.
+    """
+    pairs = [(n, self._toJacobian(p)) for (n, p) in pairs if n]
+    for (n, _) in pairs:
+      if n < 0:
+        raise ValueError("Scalar %d can't be negative" % n)
+    if not pairs:
+      return self.O
+
+    bits = max(n.bit_length() for (n, _) in pairs)
+    # Pick the window size minimizing the number of additions.
+    c = min(range(1, 17),
+            key=lambda c: math.ceil(bits / c) * (len(pairs) + 2**(c + 1) + c))
+    mask = (1 << c) - 1
+    O = self._toJacobian(self.O)
+
+    acc = O
+    for w in range((bits - 1) // c, -1, -1):
+      for i in range(c):
+        acc = self._jacobianDouble(acc)
+      buckets = [O] * (1 << c)
+      for (n, p) in pairs:
+        d = (n >> (w * c)) & mask
+        if d:
+          buckets[d] = self._jacobianPlus(buckets[d], p)
+      running = O
+      total = O
+      for d in range(mask, 0, -1):
+        running = self._jacobianPlus(running, buckets[d])
+        total = self._jacobianPlus(total, running)
+      acc = self._jacobianPlus(acc, total)
+    return self._fromJacobian(acc)
 
   def __repr__(self) -> str:
     return "EC: x^3 + %r x + %r" % (self.A, self.B)
@@ -99,6 +481,21 @@ class EC(Group):
     def __repr__(self) -> str:
       return "ECElement: %(x)r %(y)r" % {'x': self.x, 'y': self.y}
 
+    def encode(self, compressed: bool = True) -> bytes:
+      """SEC1 encoding of the point.
+
+      The point at infinity is a single zero byte. Compressed points are
+      0x02 or 0x03, depending on the parity of y, followed by x. Uncompressed
+      points are 0x04 followed by x and y.
+      """
+      if self.isPlusID():
+        return b'\x00'
+      n = self.field.byteLength()
+      x = int(self.x).to_bytes(n, 'big')
+      if compressed:
+        return bytes([2 + (int(self.y) & 1)]) + x
+      return b'\x04' + x + int(self.y).to_bytes(n, 'big')
+
     def __eq__(self, a) -> str:
       return type(self) == type(
           a) and self.field == a.field and self.x == a.x and self.y == a.y
@@ -106,6 +503,13 @@ class EC(Group):
     def __hash__(self) -> int:
       return hash((self.x, self.y))
 
+    def __reduce__(self) -> Tuple[Any, ...]:
+      return (type(self), (self.field, self.x, self.y))
+
+
+# Jacobian coordinates (X, Y, Z) of a point, see EC._toJacobian.
+JacobianPoint = Tuple['Field.Element', 'Field.Element', 'Field.Element']
+
 
 class ECSubfield(Group):
 
@@ -114,9 +518,159 @@ class ECSubfield(Group):
     self.g = g
     self.order = order
 
+  def __reduce__(self) -> Tuple[Any, ...]:
+    return (interned, (type(self), self.ec, self.g, self.order))
+
+  def plusID(self):
+    return self.ec.plusID()
+
   def plus(self, a, b):
     return self.ec.plus(a, b)
 
+  def plusMany(self,
+               pairs: Iterable[Tuple[EC.Element, EC.Element]],
+               chunkSize: int = 256) -> Iterator[EC.Element]:
+    return self.ec.plusMany(pairs, chunkSize)
+
   def make(self, n):
     # FIXME type
     return self.g.scalarMul(n)
+
+  def makeMany(self,
+               scalars: Iterable[int],
+               chunkSize: int = 256) -> Iterator[EC.Element]:
+    """Batched version of make, yielding g * n for every n in scalars."""
+    return self.ec.scalarMulMany(self.g, (int(n) for n in scalars), chunkSize)
+
+
+class WindowTable(object):
+  """Precomputed multiples of a point for fast scalar multiplication.
+
+  With window size w, the table holds d 2^(w i) P for every digit
+  1 <= d < 2^w and every window position i below bits. n P is then the sum
+  of one table entry per non-zero w-bit digit of n, without any doublings.
+  The sum is accumulated in Jacobian coordinates and costs one inversion.
+  """
+
+  def __init__(self, point: EC.Element, bits: int, window: int = 4):
+    self.ec = point.field
+    self.point = point
+    self.bits = bits
+    self.window = window
+
+    ec = self.ec
+    rows = []
+    base = ec._toJacobian(point)
+    for i in range((bits + window - 1) // window):
+      row = [base]
+      for d in range(2, 1 << window):
+        row.append(ec._jacobianPlus(row[-1], base))
+      rows.append(row)
+      base = ec._jacobianPlus(row[-1], base)
+    # Convert all entries to affine with a single shared inversion.
+    flat = ec._fromJacobianMany([p for row in rows for p in row])
+    width = (1 << window) - 1
+    self.rows = [[ec._toJacobian(p)
+                  for p in flat[i * width:(i + 1) * width]]
+                 for i in range(len(rows))]
+
+  def nbytes(self) -> int:
+    """Approximate size of the table's coordinates in bytes."""
+    return WindowTable.size(self.ec, len(self.rows) * self.window, self.window)
+
+  @staticmethod
+  def size(ec: EC, bits: int, window: int = 4) -> int:
+    """nbytes of a table for bits and window on ec, without building it."""
+    rows = (bits + window - 1) // window
+    return rows * ((1 << window) - 1) * 2 * ec.byteLength()
+
+  def scalarMul(self, n: int) -> EC.Element:
+    if n.bit_length() > self.bits:
+      return self.point.scalarMul(n)
+    return self.ec._fromJacobian(self._jacobianScalarMul(n))
+
+  def _jacobianScalarMul(self, n: int) -> JacobianPoint:
+    if n < 0:
+      raise ValueError("Scalar %d can't be negative" % n)
+    if n.bit_length() > self.bits:
+      return self.ec._jacobianScalarMul(self.point, n)
+    ec = self.ec
+    mask = (1 << self.window) - 1
+    acc = ec._toJacobian(ec.O)
+    for row in self.rows:
+      if n & mask:
+        acc = ec._jacobianPlus(acc, row[(n & mask) - 1])
+      n >>= self.window
+    return acc
+
+
+class WindowTableCache(object):
+  """LRU cache of WindowTables for frequently used points.
+
+  Building a table costs about as much as a dozen scalar multiplications,
+  so only points that were asked for promoteAfter times get one. Sightings
+  of points without a table are tracked in a bounded LRU of their own.
+  Tables are evicted least recently used first, whenever there are more
+  than maxEntries of them or they take more than maxBytes.
+  """
+
+  def __init__(self,
+               bits: int,
+               maxEntries: int = 64,
+               maxBytes: Optional[int] = None,
+               promoteAfter: int = 2,
+               window: int = 4):
+    self.bits = bits
+    self.maxEntries = maxEntries
+    self.maxBytes = maxBytes
+    self.promoteAfter = promoteAfter
+    self.window = window
+    self.tables: 'collections.OrderedDict[EC.Element, WindowTable]' = (
+        collections.OrderedDict())
+    self.sightings: 'collections.OrderedDict[EC.Element, int]' = (
+        collections.OrderedDict())
+    self.nbytes = 0
+    self.hits = 0
+    self.misses = 0
+    self.promotions = 0
+    self.evictions = 0
+
+  def __len__(self) -> int:
+    return len(self.tables)
+
+  def get(self, point: EC.Element) -> Optional[WindowTable]:
+    """Returns the table for point, building it once point is hot enough."""
+    table = self.tables.get(point)
+    if table is not None:
+      self.hits += 1
+      self.tables.move_to_end(point)
+      return table
+
+    self.misses += 1
+    seen = self.sightings.pop(point, 0) + 1
+    # A table that could never stay in the cache isn't worth building.
+    fits = self.maxEntries > 0 and (self.maxBytes is None or WindowTable.size(
+        point.field, self.bits, self.window) <= self.maxBytes)
+    if seen < self.promoteAfter or not fits:
+      self.sightings[point] = seen
+      while len(self.sightings) > max(1, 4 * self.maxEntries):
+        self.sightings.popitem(last=False)
+      return None
+
+    table = WindowTable(point, self.bits, self.window)
+    self.promotions += 1
+    self.tables[point] = table
+    self.nbytes += table.nbytes()
+    while self.tables and (len(self.tables) > self.maxEntries or
+                           (self.maxBytes is not None and
+                            self.nbytes > self.maxBytes)):
+      (_, evicted) = self.tables.popitem(last=False)
+      self.nbytes -= evicted.nbytes()
+      self.evictions += 1
+    return self.tables.get(point)
+
+  def scalarMul(self, point: EC.Element, n: int) -> EC.Element:
+    table = self.get(point)
+    if table is None:
+      return point.scalarMul(n)
+    return table.scalarMul(n)
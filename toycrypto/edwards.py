@@ -0,0 +1,247 @@
+"""Twisted Edwards curves a x^2 + y^2 = 1 + d x^2 y^2.
+
+Points are kept in extended coordinates (X, Y, Z, T), standing for the
+affine point (X / Z, Y / Z) with T = X Y / Z, so no operation inverts.
+The addition law of Hisil, Wong, Carter and Dawson is unified: the same
+formula adds distinct points, doubles, and handles the neutral element
+(0, 1) and inverses, without a single comparison. For a square a and a
+non-square d, as for Ed25519, it is also complete, i.e. correct for all
+inputs. Doubling has a cheaper dedicated formula, which plus picks when
+both arguments are the same object, as in opN's doublings, so scalar
+multiplication is opN as for any group.
+
+Every twisted Edwards curve is birationally equivalent to the Montgomery
+curve B v^2 = u^3 + A u^2 + u with A = 2 (a + d) / (a - d) and
+B = 4 / (a - d), via (u, v) = ((1 + y) / (1 - y), u / x), and through it
+to a short Weierstrass curve. If B is a square, v is scaled to make B = 1,
+which for Ed25519 gives Curve25519 and the Weierstrass curve in curves.
+"""
+from toycrypto.base import Field, Group, interned
+from toycrypto.ec import EC
+from toycrypto.formula import Formula
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+# Formulas for EdwardsCurve, see formula.Formula. They take the field f, the
+# curve coefficients a and d and the extended coordinates.
+
+
+def _plusFormula(f, a, d, x1, y1, z1, t1, x2, y2, z2, t2):
+  """(x1, y1, z1, t1) + (x2, y2, z2, t2), unified."""
+  A = f.mul(x1, x2)
+  B = f.mul(y1, y2)
+  C = f.mul(d, f.mul(t1, t2))
+  D = f.mul(z1, z2)
+  E = f.plus(f.mul(f.plus(x1, y1), f.plus(x2, y2)), f.plus(A, B).plusInv())
+  F = f.plus(D, C.plusInv())
+  G = f.plus(D, C)
+  H = f.plus(B, f.mul(a, A).plusInv())
+  return (f.mul(E, F), f.mul(G, H), f.mul(F, G), f.mul(E, H))
+
+
+def _doubleFormula(f, a, d, x, y, z, t):
+  """2 (x, y, z, t), which doesn't need t."""
+  A = f.mul(x, x)
+  B = f.mul(y, y)
+  zz = f.mul(z, z)
+  C = f.plus(zz, zz)
+  D = f.mul(a, A)
+  xy = f.plus(x, y)
+  E = f.plus(f.mul(xy, xy), f.plus(A, B).plusInv())
+  G = f.plus(D, B)
+  F = f.plus(G, C.plusInv())
+  H = f.plus(D, B.plusInv())
+  return (f.mul(E, F), f.mul(G, H), f.mul(F, G), f.mul(E, H))
+
+
+class EdwardsCurve(Group):
+  """Twisted Edwards curve group.
+
+  a x^2 + y^2 = 1 + d x^2 y^2
+  """
+
+  def __init__(self, field: Field, a: 'Field.Element', d: 'Field.Element'):
+    self.field = field
+    self.a = a
+    self.d = d
+    one = field.mulID()
+    zero = field.plusID()
+    self.O = EdwardsCurve.Element(self, zero, one, one, zero)
+    # Compiled formulas by their function, see _formula.
+    self._formulas: Dict[Callable[..., Any], Callable[..., Any]] = {}
+    # The Montgomery form, see the module documentation.
+    aMinusD = field.plus(a, d.plusInv()).mulInv()
+    two = field.plus(one, one)
+    self.A = field.mul(field.mul(two, field.plus(a, d)), aMinusD)
+    self.B = field.mul(field.plus(two, two), aMinusD)
+    scale = self.B.sqrt()
+    # v is multiplied by scale, so that the Montgomery B is 1.
+    self._scale = scale if scale is not None else one
+    if scale is not None:
+      self.B = one
+
+  def __eq__(self, other: object) -> bool:
+    return (isinstance(other, EdwardsCurve) and self.field == other.field and
+            self.a == other.a and self.d == other.d)
+
+  def __hash__(self) -> int:
+    return hash((self.field, self.a, self.d))
+
+  def __reduce__(self) -> Tuple[Any, ...]:
+    return (interned, (type(self), self.field, self.a, self.d))
+
+  def __repr__(self) -> str:
+    return "Edwards: %r x^2 + y^2 = 1 + %r x^2 y^2" % (self.a, self.d)
+
+  def point(self, x: 'Field.Element',
+            y: 'Field.Element') -> 'EdwardsCurve.Element':
+    """The point with affine coordinates (x, y), which must be on the curve."""
+    f = self.field
+    xx = f.mul(x, x)
+    yy = f.mul(y, y)
+    if f.plus(f.mul(self.a, xx), yy) != f.plus(f.mulID(),
+                                               f.mul(self.d, f.mul(xx, yy))):
+      raise ValueError("(%r, %r) is not on the curve" % (x, y))
+    return self.Element(self, x, y, f.mulID(), f.mul(x, y))
+
+  def plusID(self) -> 'EdwardsCurve.Element':
+    return self.O
+
+  def plus(self, a: 'EdwardsCurve.Element',
+           b: 'EdwardsCurve.Element') -> 'EdwardsCurve.Element':
+    if a is b:
+      return self.double(a)
+    return self.Element(
+        self,
+        *self._formula(_plusFormula, 8)(a.X, a.Y, a.Z, a.T, b.X, b.Y, b.Z, b.T))
+
+  def double(self, a: 'EdwardsCurve.Element') -> 'EdwardsCurve.Element':
+    return self.Element(self,
+                        *self._formula(_doubleFormula, 4)(a.X, a.Y, a.Z, a.T))
+
+  def _formula(self, fn: Callable[..., Any], nargs: int) -> Callable[..., Any]:
+    """fn(f, a, d, *args) compiled for this curve, see formula.Formula."""
+    compiled = self._formulas.get(fn)
+    if compiled is None:
+      traced = Formula.trace(fn, nargs, (self.a, self.d))
+      compiled = self._formulas[fn] = traced.compile(self.field)
+    return compiled
+
+  def plusMany(self,
+               pairs: Iterable[Tuple['EdwardsCurve.Element',
+                                     'EdwardsCurve.Element']],
+               chunkSize: int = 256) -> Iterator['EdwardsCurve.Element']:
+    """Like EC.plusMany. Without inversions, there is nothing to share."""
+    for (a, b) in pairs:
+      yield self.plus(a, b)
+
+  def scalarMulMany(self,
+                    point: 'EdwardsCurve.Element',
+                    scalars: Iterable[int],
+                    chunkSize: int = 256) -> Iterator['EdwardsCurve.Element']:
+    for n in scalars:
+      yield point.scalarMul(n)
+
+  # Birational maps, see the module documentation. The neutral element
+  # (0, 1) maps to the point at infinity, and (0, -1) to (0, 0).
+
+  def toMontgomery(
+      self, p: 'EdwardsCurve.Element'
+  ) -> Optional[Tuple['Field.Element', 'Field.Element']]:
+    """(u, v) on B v^2 = u^3 + A u^2 + u, or None for infinity."""
+    f = self.field
+    (x, y) = p.affine()
+    if x.isPlusID():
+      return None if y.isMulID() else (f.plusID(), f.plusID())
+    one = f.mulID()
+    u = f.mul(f.plus(one, y), f.plus(one, y.plusInv()).mulInv())
+    return (u, f.mul(f.mul(u, x.mulInv()), self._scale))
+
+  def fromMontgomery(
+      self, uv: Optional[Tuple['Field.Element', 'Field.Element']]
+  ) -> 'EdwardsCurve.Element':
+    f = self.field
+    if uv is None:
+      return self.O
+    (u, v) = uv
+    if u.isPlusID():
+      return self.point(f.plusID(), f.mulID().plusInv())
+    one = f.mulID()
+    x = f.mul(f.mul(u, self._scale), v.mulInv())
+    y = f.mul(f.plus(u, one.plusInv()), f.plus(u, one).mulInv())
+    return self.point(x, y)
+
+  def weierstrass(self) -> EC:
+    """The short Weierstrass curve of the Montgomery form.
+
+    With x = u / B + A / (3 B) and y = v / B, it is
+    y^2 = x^3 + (3 - A^2) / (3 B^2) x + (2 A^3 - 9 A) / (27 B^3).
+    """
+    f = self.field
+    (A, B) = (self.A, self.B)
+    three = f.make(3)
+    A2 = f.mul(A, A)
+    B2 = f.mul(B, B)
+    a = f.mul(f.plus(three, A2.plusInv()), f.mul(three, B2).mulInv())
+    b = f.mul(
+        f.plus(f.mul(f.make(2), f.mul(A2, A)),
+               f.mul(f.make(9), A).plusInv()),
+        f.mul(f.make(27), f.mul(B2, B)).mulInv())
+    return interned(EC, f, a, b)
+
+  def toWeierstrass(self, p: 'EdwardsCurve.Element') -> EC.Element:
+    ec = self.weierstrass()
+    uv = self.toMontgomery(p)
+    if uv is None:
+      return ec.O
+    f = self.field
+    binv = self.B.mulInv()
+    shift = f.mul(self.A, f.mul(f.make(3), self.B).mulInv())
+    return ec.Element(ec, f.plus(f.mul(uv[0], binv), shift), f.mul(uv[1], binv))
+
+  def fromWeierstrass(self, p: EC.Element) -> 'EdwardsCurve.Element':
+    if p.isPlusID():
+      return self.O
+    f = self.field
+    u = f.plus(f.mul(p.x, self.B), f.mul(self.A, f.make(3).mulInv()).plusInv())
+    return self.fromMontgomery((u, f.mul(p.y, self.B)))
+
+  class Element(Group.Element):
+    """Point in extended coordinates, see the module documentation."""
+
+    def __init__(self, curve: 'EdwardsCurve', X: 'Field.Element',
+                 Y: 'Field.Element', Z: 'Field.Element', T: 'Field.Element'):
+      super(EdwardsCurve.Element, self).__init__(curve)
+      self.curve = curve
+      self.X = X
+      self.Y = Y
+      self.Z = Z
+      self.T = T
+
+    def affine(self) -> Tuple['Field.Element', 'Field.Element']:
+      f = self.curve.field
+      zinv = self.Z.mulInv()
+      return (f.mul(self.X, zinv), f.mul(self.Y, zinv))
+
+    def plusInv(self) -> 'EdwardsCurve.Element':
+      return EdwardsCurve.Element(self.curve, self.X.plusInv(), self.Y, self.Z,
+                                  self.T.plusInv())
+
+    def isPlusID(self) -> bool:
+      return self.X.isPlusID() and self.Y == self.Z
+
+    def __eq__(self, other: object) -> bool:
+      if not isinstance(other, EdwardsCurve.Element):
+        return False
+      f = self.curve.field
+      return (self.curve == other.curve and
+              f.mul(self.X, other.Z) == f.mul(other.X, self.Z) and
+              f.mul(self.Y, other.Z) == f.mul(other.Y, self.Z))
+
+    def __hash__(self) -> int:
+      return hash(self.affine())
+
+    def __repr__(self) -> str:
+      return "EdwardsElement: %r %r" % self.affine()
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+      return (type(self), (self.curve, self.X, self.Y, self.Z, self.T))
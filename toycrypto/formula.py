@@ -0,0 +1,300 @@
+"""Straight-line field formulas, traced once and compiled to integer code.
+
+A formula is a Python function fn(f, *args) that only does field arithmetic
+through f.plus, f.mul, f.plusID, f.mulID, plusInv and mulInv, and never
+branches on values. Formula.trace runs it once with f being a Tracer, which
+records the operations as a DAG instead of computing them:
+
+  * identical subexpressions are shared, so nothing is computed twice,
+  * x + -y becomes x - y, and - -x becomes x,
+  * additions of zero and multiplications by zero or one are folded away.
+
+Formula.compile then schedules the DAG such that inversions come after
+everything that doesn't depend on them. Inversions that become ready
+together share a single inversion via Montgomery's trick. For Z it emits a
+specialised Python function over the raw values, where every operation is
+one line of integer arithmetic, and no intermediate elements are created.
+Other fields get an interpreter running the same schedule.
+"""
+import collections
+
+from toycrypto.base import Field
+from toycrypto.primefields import Z
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+
+class Tracer(Field['Node']):
+  """Field that records the operations done on its elements as Nodes."""
+
+  def __init__(self) -> None:
+    self.nodes: List[Node] = []
+    self._known: Dict[Tuple[Any, ...], Node] = {}
+
+  def node(self,
+           op: str,
+           args: Tuple['Node', ...] = (),
+           value: Any = None) -> 'Node':
+    if op in ('add', 'mul'):
+      args = tuple(sorted(args, key=lambda a: a.index))
+    key = (op, tuple(a.index for a in args), value)
+    if key not in self._known:
+      self._known[key] = Node(self, op, args, value, len(self.nodes))
+      self.nodes.append(self._known[key])
+    return self._known[key]
+
+  def const(self, value: Any) -> 'Node':
+    return self.node('const', value=value)
+
+  def plusID(self) -> 'Node':
+    return self.const(0)
+
+  def mulID(self) -> 'Node':
+    return self.const(1)
+
+  def make(self, i: int) -> 'Node':
+    return self.const(i)
+
+  def plus(self, a: 'Node', b: 'Node') -> 'Node':
+    if a.isConst(0):
+      return b
+    if b.isConst(0):
+      return a
+    if b.op == 'neg':
+      return self.sub(a, b.args[0])
+    if a.op == 'neg':
+      return self.sub(b, a.args[0])
+    return self.node('add', (a, b))
+
+  def sub(self, a: 'Node', b: 'Node') -> 'Node':
+    if b.isConst(0):
+      return a
+    if a.isConst(0):
+      return b.plusInv()
+    return self.node('sub', (a, b))
+
+  def mul(self, a: 'Node', b: 'Node') -> 'Node':
+    if a.isConst(0) or b.isConst(1):
+      return a
+    if b.isConst(0) or a.isConst(1):
+      return b
+    return self.node('mul', (a, b))
+
+
+class Node(Field.Element):
+  """A value in a traced formula.
+
+  op is one of const, input, add, sub, neg, mul and inv. const nodes hold
+  their value, input nodes their argument position.
+  """
+
+  def __init__(self, tracer: Tracer, op: str, args: Tuple['Node', ...],
+               value: Any, index: int):
+    super(Node, self).__init__(tracer)
+    self.tracer = tracer
+    self.op = op
+    self.args = args
+    self.value = value
+    self.index = index
+
+  def isConst(self, i: int) -> bool:
+    return self.op == 'const' and int(self.value) == i
+
+  def plusInv(self) -> 'Node':
+    # An unused neg node costs nothing, as only the nodes needed for the
+    # outputs are scheduled, but keeping it lets plus fuse it into a sub.
+    if self.op == 'neg':
+      return self.args[0]
+    if self.isConst(0):
+      return self
+    return self.tracer.node('neg', (self,))
+
+  def mulInv(self) -> 'Node':
+    return self.tracer.node('inv', (self,))
+
+  def isPlusID(self) -> bool:
+    raise TypeError("Formulas can't branch on values")
+
+  def __eq__(self, other: object) -> bool:
+    raise TypeError("Formulas can't branch on values")
+
+  def __hash__(self) -> int:
+    return self.index
+
+  def __repr__(self) -> str:
+    return "t%d = %s%r" % (self.index, self.op, tuple(
+        a.index for a in self.args))
+
+
+class Formula(object):
+  """A traced formula, see the module documentation."""
+
+  def __init__(self, tracer: Tracer, outputs: Sequence[Node],
+               nargs: int) -> None:
+    self.tracer = tracer
+    self.outputs = list(outputs)
+    self.nargs = nargs
+    self.schedule = self._schedule()
+
+  @classmethod
+  def trace(cls,
+            fn: Callable[..., Sequence[Any]],
+            nargs: int,
+            constants: Sequence[Any] = ()) -> 'Formula':
+    """Traces fn(f, *constants, *args) with nargs inputs.
+
+    constants are values of the field the formula will run over, like the
+    coefficients of a curve, and are baked into the compiled code.
+    """
+    tracer = Tracer()
+    consts = [tracer.const(c) for c in constants]
+    inputs = [tracer.node('input', value=i) for i in range(nargs)]
+    return cls(tracer, fn(tracer, *consts, *inputs), nargs)
+
+  def _schedule(self) -> List[List[Node]]:
+    """Orders the nodes needed for the outputs into steps.
+
+    A step is either a single non-inversion node, or all inversions that
+    are ready when nothing else is. Inputs and constants are left out.
+    """
+    needed: Dict[int, Node] = {}
+    todo = list(self.outputs)
+    while todo:
+      n = todo.pop()
+      if n.index not in needed:
+        needed[n.index] = n
+        todo.extend(n.args)
+
+    users: Dict[int, List[Node]] = collections.defaultdict(list)
+    missing = {}
+    for n in needed.values():
+      missing[n.index] = len(set(a.index for a in n.args))
+      for i in set(a.index for a in n.args):
+        users[i].append(n)
+
+    ready = [n for n in needed.values() if not missing[n.index]]
+    steps: List[List[Node]] = []
+    while ready:
+      ready.sort(key=lambda n: (n.op == 'inv', n.index))
+      if ready[0].op == 'inv':
+        (step, ready) = (ready, [])
+      else:
+        step = [ready.pop(0)]
+      for n in step:
+        for u in users[n.index]:
+          missing[u.index] -= 1
+          if not missing[u.index]:
+            ready.append(u)
+      if step[0].op not in ('const', 'input'):
+        steps.append(step)
+    return steps
+
+  def counts(self) -> Dict[str, int]:
+    """Number of operations per kind, and of actual inversions."""
+    result: Dict[str, int] = collections.Counter()
+    for step in self.schedule:
+      for n in step:
+        result[n.op] += 1
+      if step[0].op == 'inv':
+        result['inversions'] += 1
+    return dict(result)
+
+  def source(self, name: str = 'formula', ints: bool = False) -> str:
+    """Python source of the compiled function, see compile.
+
+    The code refers to the globals p, the modulus, inv, its modular inverse,
+    and unless ints is set, E and F, the element class and field.
+    """
+
+    def ref(n: Node) -> str:
+      if n.op == 'const':
+        return '%d' % int(n.value)
+      return 't%d' % n.index
+
+    args = ', '.join('a%d' % i for i in range(self.nargs))
+    lines = ['def %s(%s):' % (name, args)]
+    for n in self.tracer.nodes:
+      if n.op == 'input':
+        get = '' if ints else '.value'
+        lines.append('  t%d = a%d%s' % (n.index, n.value, get))
+    for step in self.schedule:
+      if step[0].op == 'inv':
+        lines += ['  ' + l for l in self._emitInversions(step, ref)]
+        continue
+      n = step[0]
+      a = [ref(x) for x in n.args]
+      expr = {
+          'add': '(%s + %s) %% p',
+          'sub': '(%s - %s) %% p',
+          'neg': '-%s %% p',
+          'mul': '%s * %s %% p',
+      }[n.op] % tuple(a)
+      lines.append('  t%d = %s' % (n.index, expr))
+    outs = [ref(n) for n in self.outputs]
+    if not ints:
+      outs = ['E(%s, F)' % o for o in outs]
+    lines.append('  return (%s,)' % ', '.join(outs))
+    return '\n'.join(lines) + '\n'
+
+  def _emitInversions(self, step: List[Node], ref: Callable[[Node],
+                                                            str]) -> List[str]:
+    if len(step) == 1:
+      return ['t%d = inv(%s)' % (step[0].index, ref(step[0].args[0]))]
+    # Montgomery's trick, like Field.batchMulInv.
+    ds = [ref(n.args[0]) for n in step]
+    lines = ['m0 = %s' % ds[0]]
+    for i in range(1, len(ds)):
+      lines.append('m%d = m%d * %s %% p' % (i, i - 1, ds[i]))
+    lines.append('i = inv(m%d)' % (len(ds) - 1))
+    for i in range(len(ds) - 1, 0, -1):
+      lines.append('t%d = i * m%d %% p' % (step[i].index, i - 1))
+      lines.append('i = i * %s %% p' % ds[i])
+    lines.append('t%d = i' % step[0].index)
+    return lines
+
+  def compile(self, field: Any, ints: bool = False) -> Callable[..., Tuple]:
+    """Returns the formula as a function over field elements.
+
+    For Z, ints makes the function take and return raw values reduced
+    modulo the order instead of elements. Other fields get an interpreter.
+    """
+    if not isinstance(field, Z):
+      if ints:
+        raise ValueError("Only Z formulas can run on ints")
+      return lambda *args: self.evaluate(field, *args)
+    namespace = {
+        'p': field.modulus,
+        'inv': lambda a: field.backend.invert(a, field.modulus),
+        'E': field.Element,
+        'F': field,
+    }
+    exec(self.source(ints=ints), namespace)
+    return namespace['formula']
+
+  def evaluate(self, field: Field, *args: Any) -> Tuple:
+    """Runs the formula with field's own arithmetic."""
+    values: Dict[int, Any] = {}
+
+    def get(n: Node) -> Any:
+      if n.op == 'const':
+        return n.value if not isinstance(n.value, int) else field.make(n.value)
+      return values[n.index]
+
+    for n in self.tracer.nodes:
+      if n.op == 'input':
+        values[n.index] = args[n.value]
+    for step in self.schedule:
+      if step[0].op == 'inv':
+        inverses = field.batchMulInv([get(n.args[0]) for n in step])
+        values.update((n.index, i) for (n, i) in zip(step, inverses))
+        continue
+      n = step[0]
+      a = [get(x) for x in n.args]
+      if n.op == 'add':
+        values[n.index] = field.plus(a[0], a[1])
+      elif n.op == 'sub':
+        values[n.index] = field.plus(a[0], a[1].plusInv())
+      elif n.op == 'neg':
+        values[n.index] = a[0].plusInv()
+      else:
+        values[n.index] = field.mul(a[0], a[1])
+    return tuple(get(n) for n in self.outputs)
@@ -1,5 +1,7 @@
 from toycrypto import pof
 from toycrypto import base
+from toycrypto import zvector
+from toycrypto.primefields import Z
 
 
 class GFPOF(pof.POF, base.Field):
@@ -9,6 +11,9 @@ class GFPOF(pof.POF, base.Field):
     # Field is coefficent field.
     super(GFPOF, self).__init__(field)
     self.rp = rp
+    # zvector.PolyMod for rp and Frobenius matrices, see _ring and frobenius.
+    self._polyMod = None
+    self._frobenius = {}
 
   def plusID(self):
     return self.Element(self)
@@ -61,7 +66,18 @@ class GFPOF(pof.POF, base.Field):
     # FIXME: Lift this into the superclass POF and give the superclass an xtime
     #        implementation, as this algorithm is not GF specific.
 
+    # Over Z, a product of dense coefficient lists reduced by Barrett's
+    # method beats the loop below for any size, see zvector.PolyMod.
+    if isinstance(self.field, Z) and a.c and b.c:
+      ring = self._ring()
+      dense = ring.mul(
+          zvector.ZVector.fromPOF(a).ints(),
+          zvector.ZVector.fromPOF(b).ints())
+      return zvector.ZVector(self.field, dense).toPOF(self)
+
     result = self.plusID()
+    if b.getDegree() is None:
+      return result
     for b_p in range(b.getDegree(), -1, -1):
       result = result.xtime()
       for a_p in a.nonZeroCoefficients():
@@ -69,6 +85,40 @@ class GFPOF(pof.POF, base.Field):
             a_p, self.field.mul(b.getCoefficient(b_p), a.getCoefficient(a_p)))
     return result
 
+  def _ring(self):
+    """rp as a zvector.PolyMod, for fields over Z."""
+    if self._polyMod is None:
+      self._polyMod = zvector.PolyMod(
+          zvector.ZVector.fromPOF(self.rp).ints(), self.field.order)
+    return self._polyMod
+
+  def frobenius(self, a, k=1):
+    """a^(p^k) for a field over Z(p).
+
+    As c^p = c for the coefficients, this is the sum of c_i (x^(p^k))^i,
+    a linear map. Its matrix is computed once per k, after which every
+    application costs n^2 coefficient products rather than a power.
+    """
+    if not isinstance(self.field, Z):
+      raise ValueError("Frobenius maps need a field over Z")
+    p = self.field.order
+    ring = self._ring()
+    n = ring.n
+    k %= n
+    if k not in self._frobenius:
+      power = ring.frobenius(k)
+      rows = [ring.one()]
+      for i in range(n - 1):
+        rows.append(ring.mul(rows[-1], power))
+      self._frobenius[k] = rows
+    rows = self._frobenius[k]
+    result = [0] * n
+    for (i, c) in a.c.items():
+      c = int(c.value)
+      for (j, x) in enumerate(rows[i]):
+        result[j] += c * x
+    return zvector.ZVector(self.field, [x % p for x in result]).toPOF(self)
+
   class Element(pof.POF.Element):
 
     def __init__(self, pof):
@@ -84,8 +134,12 @@ class GFPOF(pof.POF, base.Field):
       return super(GFPOF.Element, self).setCoefficient(n, c)
 
     def mulInv(self):
-      pof_element = ExtEuclidean(pof.POF(self.pof.field), self.pof.rp, self)[2]
-      return self.pof.make(pof_element.c)
+      (gcd, _, pof_element) = ExtEuclidean(pof.POF(self.pof.field), self.pof.rp,
+                                           self)
+      # The gcd is a non-zero constant, but only one in characteristic 2.
+      c = gcd.getCoefficient(0).mulInv()
+      return self.pof.make(
+          {k: self.pof.field.mul(c, v) for (k, v) in pof_element.c.items()})
 
     def xtime(self):
       """Multiplies the polynomial by x.
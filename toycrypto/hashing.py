@@ -0,0 +1,82 @@
+"""Hashing of messages that don't fit into memory.
+
+A message source can be a file path, a binary file object, a bytes-like
+object or an iterable of bytes-like buffers. Regular files are memory mapped
+and hashed in place, everything else is read in chunks, so memory use stays
+bounded by the chunk size.
+"""
+import hashlib
+import io
+import mmap
+import os
+import stat
+
+from typing import Any
+
+CHUNK_SIZE = 1 << 20
+
+
+def digestStream(source: Any,
+                 hashName: str = 'sha512',
+                 prefix: bytes = b'',
+                 chunkSize: int = CHUNK_SIZE) -> bytes:
+  """Returns the hashName digest of prefix followed by the message."""
+  h = hashlib.new(hashName)
+  h.update(prefix)
+  updateStream(h, source, chunkSize)
+  return h.digest()
+
+
+def updateStream(h: Any, source: Any, chunkSize: int = CHUNK_SIZE) -> None:
+  """Feeds the message from source into the hash object h."""
+  if isinstance(source, (str, os.PathLike)):
+    with open(source, 'rb') as f:
+      updateStream(h, f, chunkSize)
+    return
+
+  if isinstance(source, (bytes, bytearray, memoryview)):
+    _updateBuffer(h, source, chunkSize)
+    return
+
+  if hasattr(source, 'read'):
+    if not _updateMapped(h, source, chunkSize):
+      while True:
+        chunk = source.read(chunkSize)
+        if not chunk:
+          break
+        h.update(chunk)
+    return
+
+  for buf in source:
+    _updateBuffer(h, buf, chunkSize)
+
+
+def _updateBuffer(h: Any, buf: Any, chunkSize: int) -> None:
+  with memoryview(buf) as mv:
+    with mv.cast('B') as flat:
+      for off in range(0, len(flat), chunkSize):
+        with flat[off:off + chunkSize] as piece:
+          h.update(piece)
+
+
+def _updateMapped(h: Any, f: Any, chunkSize: int) -> bool:
+  """Hashes the rest of a regular file via mmap, if f is one.
+
+  Returns False if f can't be mapped and has to be read instead.
+  """
+  try:
+    fileno = f.fileno()
+    pos = f.tell()
+  except (AttributeError, OSError, io.UnsupportedOperation):
+    return False
+  st = os.fstat(fileno)
+  if not stat.S_ISREG(st.st_mode):
+    return False
+
+  # mmap refuses empty files, and then there is nothing to hash anyway.
+  if st.st_size > pos:
+    with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as mm:
+      with memoryview(mm) as mv, mv[pos:] as rest:
+        _updateBuffer(h, rest, chunkSize)
+    f.seek(st.st_size)
+  return True
@@ -0,0 +1,390 @@
+"""Hashing to elliptic curves as in RFC 9380.
+
+EC.fromX maps data to a point by trying x values until x^3 + A x + B is a
+square, which costs a square root per try and a random number of tries.
+The maps here take every field element u to a point with a fixed sequence
+of operations:
+
+  * SSWU is the simplified Shallue-van de Woestijne-Ulas map to a curve
+    with A B != 0. For curves with A = 0 like secp256k1 it maps to an
+    isogenous curve with A B != 0 first, and then along the isogeny.
+  * SVDW is the Shallue-van de Woestijne map, which works for every
+    short Weierstrass curve but needs three exponentiations, not one.
+
+Both have a mapMany, which inverts all denominators of a batch together
+via Field.batchMulInv. For p = 3 mod 4, SSWU needs a single
+exponentiation: if g(x1) is not a square, x1^((p+1)/4) still gives the
+root for the other candidate after multiplying by a constant.
+
+HashToCurve turns messages into field elements with expandMessageXmd and
+hashes them with a map, as hash_to_curve of the RFC. secp256k1 and p256
+are its suites secp256k1_XMD:SHA-256_SSWU_RO_ and P256_XMD:SHA-256_SSWU_RO_.
+"""
+import collections
+import hashlib
+import itertools
+
+from toycrypto import curves, hashing
+from toycrypto.base import interned
+from toycrypto.ec import EC
+from toycrypto.pof import POF
+from toycrypto.polyfactor import isIrreducible
+from toycrypto.primefields import Z
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+def expandMessageXmd(msg: Any,
+                     dst: bytes,
+                     length: int,
+                     hashName: str = 'sha256') -> bytes:
+  """expand_message_xmd of RFC 9380 with the hashlib hash hashName.
+
+  msg is anything hashing.updateStream accepts, e.g. bytes or a file.
+  """
+  if len(dst) > 255:
+    dst = hashlib.new(hashName, b'H2C-OVERSIZE-DST-' + dst).digest()
+  h = hashlib.new(hashName)
+  ell = -(-length // h.digest_size)
+  if ell > 255 or length > 65535:
+    raise ValueError("Can't expand to %d bytes" % length)
+  dstPrime = dst + bytes([len(dst)])
+  h.update(bytes(h.block_size))
+  hashing.updateStream(h, msg)
+  h.update(length.to_bytes(2, 'big') + b'\0' + dstPrime)
+  b0 = h.digest()
+  b = [hashlib.new(hashName, b0 + b'\1' + dstPrime).digest()]
+  for i in range(2, ell + 1):
+    xored = bytes(x ^ y for (x, y) in zip(b0, b[-1]))
+    b.append(hashlib.new(hashName, xored + bytes([i]) + dstPrime).digest())
+  return b''.join(b)[:length]
+
+
+def hashToField(msg: Any,
+                dst: bytes,
+                field: Z,
+                count: int,
+                k: int = 128,
+                hashName: str = 'sha256') -> List[Z.Element]:
+  """hash_to_field of RFC 9380, count elements with k bits of security."""
+  L = (field.order.bit_length() + k + 7) // 8
+  uniform = expandMessageXmd(msg, dst, count * L, hashName)
+  return [
+      field.make(int.from_bytes(uniform[i * L:(i + 1) * L], 'big'))
+      for i in range(count)
+  ]
+
+
+def _sgn0(a: Z.Element) -> int:
+  return int(a) & 1
+
+
+def _rhs(ec: EC, x: Z.Element) -> Z.Element:
+  f = ec.field
+  return f.plus(f.mul(f.plus(f.mul(x, x), ec.A), x), ec.B)
+
+
+def _inv0(field: Z, elements: List[Z.Element]) -> List[Z.Element]:
+  """Field.batchMulInv, but mapping zero to zero."""
+  nonZero = [i for (i, a) in enumerate(elements) if not a.isPlusID()]
+  result = [field.plusID()] * len(elements)
+  for (i, inv) in zip(nonZero,
+                      field.batchMulInv([elements[i] for i in nonZero])):
+    result[i] = inv
+  return result
+
+
+def findZSswu(ec: EC) -> Z.Element:
+  """The Z of RFC 9380's find_z_sswu, ordered by size and then sign."""
+  f = ec.field
+  pof = POF(f)
+  ctr = 1
+  while True:
+    for z in (f.make(ctr), f.make(-ctr)):
+      if z.jacobi() != -1 or z == f.make(-1):
+        continue
+      if not isIrreducible(
+          pof.make({
+              3: 1,
+              1: int(ec.A),
+              0: int(f.plus(ec.B, z.plusInv()))
+          })):
+        continue
+      if _rhs(ec, f.mul(ec.B, f.mul(z, ec.A).mulInv())).jacobi() == 1:
+        return z
+    ctr += 1
+
+
+def findZSvdw(ec: EC) -> Z.Element:
+  """The Z of RFC 9380's find_z_svdw."""
+  f = ec.field
+  ctr = 1
+  while True:
+    for z in (f.make(ctr), f.make(-ctr)):
+      gz = _rhs(ec, z)
+      if gz.isPlusID():
+        continue
+      h = f.mul(
+          f.plus(f.mul(f.make(3), f.mul(z, z)), f.mul(f.make(4),
+                                                      ec.A)).plusInv(),
+          f.mul(f.make(4), gz).mulInv())
+      if h.jacobi() != 1:
+        continue
+      half = f.mul(z, f.make(-2).mulInv())
+      if gz.jacobi() == 1 or _rhs(ec, half).jacobi() == 1:
+        return z
+    ctr += 1
+
+
+# A rational map from source to another curve, as the coefficient tuples of
+# (xNum / xDen, y yNum / yDen) in x, x^0 first.
+Isogeny = collections.namedtuple("Isogeny",
+                                 ["source", "xNum", "xDen", "yNum", "yDen"])
+
+
+def _poly(f: Z, coefficients: Sequence[int], x: Z.Element) -> Z.Element:
+  """Horner's scheme."""
+  result = f.make(coefficients[-1])
+  for c in reversed(coefficients[:-1]):
+    result = f.plus(f.mul(result, x), f.make(c))
+  return result
+
+
+class SSWU(object):
+  """Simplified SWU map to ec, via isogeny if given.
+
+  The map itself targets ec or the isogeny's source, which needs A B != 0.
+  Z defaults to findZSswu's.
+  """
+
+  def __init__(self,
+               ec: EC,
+               Z: Optional[Z.Element] = None,
+               isogeny: Optional[Isogeny] = None):
+    self.ec = ec
+    self.isogeny = isogeny
+    curve = self.curve = isogeny.source if isogeny else ec
+    if curve.A.isPlusID() or curve.B.isPlusID():
+      raise ValueError("SSWU needs A B != 0, use an isogeny")
+    f = curve.field
+    self.Z = Z if Z is not None else findZSswu(curve)
+    self._minusBOverA = f.mul(curve.B, curve.A.mulInv()).plusInv()
+    self._exceptionalX = f.mul(curve.B, f.mul(self.Z, curve.A).mulInv())
+    # sqrt(-Z^3), for the single exponentiation variant, see mapMany.
+    self._c = None
+    if f.order % 4 == 3:
+      self._c = f.mul(self.Z, f.mul(self.Z, self.Z)).plusInv().sqrt()
+
+  def __reduce__(self) -> Tuple[Any, ...]:
+    return (interned, (type(self), self.ec, self.Z, self.isogeny))
+
+  def map(self, u: Z.Element) -> EC.Element:
+    return self.mapMany([u])[0]
+
+  def mapMany(self, us: Sequence[Z.Element]) -> List[EC.Element]:
+    """Maps every u, with one inversion for all and one per isogeny.
+
+    With tv = Z u^2, x1 = -B / A (1 + 1 / (tv^2 + tv)) and x2 = tv x1 we
+    have g(x2) = tv^3 g(x1), so one of both is a square as Z isn't. For
+    p = 3 mod 4, r = g(x1)^((p+1)/4) has r^2 = -g(x1) if g(x1) isn't a
+    square, and then sqrt(-Z^3) u^3 r is a root of g(x2).
+    """
+    curve = self.curve
+    f = curve.field
+    tvs = [f.mul(self.Z, f.mul(u, u)) for u in us]
+    invs = _inv0(f, [f.mul(tv, f.plus(tv, f.mulID())) for tv in tvs])
+    points = []
+    for (u, tv, inv) in zip(us, tvs, invs):
+      if inv.isPlusID():
+        x1 = self._exceptionalX
+      else:
+        x1 = f.mul(self._minusBOverA, f.plus(f.mulID(), inv))
+      gx1 = _rhs(curve, x1)
+      x2 = f.mul(tv, x1)
+      if self._c is not None:
+        r = gx1.scalarPow((f.order + 1) // 4)
+        if f.mul(r, r) == gx1:
+          (x, y) = (x1, r)
+        else:
+          (x, y) = (x2, f.mul(self._c, f.mul(u, f.mul(u, f.mul(u, r)))))
+      elif gx1.jacobi() >= 0:
+        (x, y) = (x1, gx1.sqrt())
+      else:
+        (x, y) = (x2, _rhs(curve, x2).sqrt())
+      if _sgn0(u) != _sgn0(y):
+        y = y.plusInv()
+      points.append((x, y))
+    if self.isogeny is None:
+      return [curve.Element(curve, x, y) for (x, y) in points]
+    return self._isogenyMany(points)
+
+  def _isogenyMany(
+      self, points: List[Tuple[Z.Element, Z.Element]]) -> List[EC.Element]:
+    """Applies the isogeny, inverting xDen yDen of all points together."""
+    (ec, iso) = (self.ec, self.isogeny)
+    f = ec.field
+    dens = [(_poly(f, iso.xDen, x), _poly(f, iso.yDen, x)) for (x, _) in points]
+    invs = _inv0(f, [f.mul(xd, yd) for (xd, yd) in dens])
+    result = []
+    for ((x, y), (xd, yd), inv) in zip(points, dens, invs):
+      if inv.isPlusID():
+        # The kernel of the isogeny.
+        result.append(ec.O)
+        continue
+      result.append(
+          ec.Element(ec, f.mul(_poly(f, iso.xNum, x), f.mul(yd, inv)),
+                     f.mul(f.mul(y, _poly(f, iso.yNum, x)), f.mul(xd, inv))))
+    return result
+
+
+class SVDW(object):
+  """Shallue-van de Woestijne map to any short Weierstrass curve ec.
+
+  Z defaults to findZSvdw's.
+  """
+
+  def __init__(self, ec: EC, Z: Optional[Z.Element] = None):
+    self.ec = ec
+    f = ec.field
+    z = self.Z = Z if Z is not None else findZSvdw(ec)
+    # The constants c1 to c4 of RFC 9380, section 6.6.1.
+    self._c1 = _rhs(ec, z)
+    self._c2 = f.mul(z, f.make(-2).mulInv())
+    t = f.plus(f.mul(f.make(3), f.mul(z, z)), f.mul(f.make(4), ec.A))
+    c3 = f.mul(self._c1, t).plusInv().sqrt()
+    assert c3 is not None
+    self._c3 = c3.plusInv() if _sgn0(c3) else c3
+    self._c4 = f.mul(f.mul(f.make(-4), self._c1), t.mulInv())
+
+  def __reduce__(self) -> Tuple[Any, ...]:
+    return (interned, (type(self), self.ec, self.Z))
+
+  def map(self, u: Z.Element) -> EC.Element:
+    return self.mapMany([u])[0]
+
+  def mapMany(self, us: Sequence[Z.Element]) -> List[EC.Element]:
+    """Maps every u, with one inversion for all of them.
+
+    Of the three candidates x1, x2 and x3, at least one has a square g(x).
+    Both Legendre symbols are always computed, followed by a square root.
+    """
+    ec = self.ec
+    f = ec.field
+    one = f.mulID()
+    tvs = []
+    for u in us:
+      tv = f.mul(f.mul(u, u), self._c1)
+      tvs.append((f.plus(one, tv), f.plus(one, tv.plusInv())))
+    invs = _inv0(f, [f.mul(plus, minus) for (plus, minus) in tvs])
+    result = []
+    for (u, (plus, minus), inv) in zip(us, tvs, invs):
+      tv4 = f.mul(f.mul(u, minus), f.mul(inv, self._c3))
+      x1 = f.plus(self._c2, tv4.plusInv())
+      x2 = f.plus(self._c2, tv4)
+      e1 = _rhs(ec, x1).jacobi() >= 0
+      e2 = _rhs(ec, x2).jacobi() >= 0
+      if e1:
+        x = x1
+      elif e2:
+        x = x2
+      else:
+        s = f.mul(f.mul(plus, plus), inv)
+        x = f.plus(f.mul(f.mul(s, s), self._c4), self.Z)
+      y = _rhs(ec, x).sqrt()
+      assert y is not None
+      if _sgn0(u) != _sgn0(y):
+        y = y.plusInv()
+      result.append(ec.Element(ec, x, y))
+    return result
+
+
+class HashToCurve(object):
+  """hash_to_curve and encode_to_curve of RFC 9380 with a map like SSWU.
+
+  cofactor clears the cofactor by multiplication, as h_eff.
+  """
+
+  def __init__(self,
+               mapping: Any,
+               dst: bytes,
+               cofactor: int = 1,
+               k: int = 128,
+               hashName: str = 'sha256'):
+    self.mapping = mapping
+    self.ec = mapping.ec
+    self.dst = dst
+    self.cofactor = cofactor
+    self.k = k
+    self.hashName = hashName
+
+  def _field(self, msg: Any, count: int) -> List[Z.Element]:
+    return hashToField(msg, self.dst, self.ec.field, count, self.k,
+                       self.hashName)
+
+  def _clear(self, p: EC.Element) -> EC.Element:
+    return p if self.cofactor == 1 else p.scalarMul(self.cofactor)
+
+  def hash(self, msg: Any) -> EC.Element:
+    """hash_to_curve, a uniformly distributed point."""
+    return next(self.hashMany([msg]))
+
+  def encode(self, msg: Any) -> EC.Element:
+    """encode_to_curve, only half as costly, but not uniformly distributed."""
+    return self._clear(self.mapping.map(self._field(msg, 1)[0]))
+
+  def hashMany(self,
+               msgs: Iterable[Any],
+               chunkSize: int = 256) -> Iterator[EC.Element]:
+    """hash for every message, yielding the points in order.
+
+    The two maps per message and the additions of a chunk share their
+    inversions, see mapMany and EC.plusMany.
+    """
+    it = iter(msgs)
+    while True:
+      chunk = list(itertools.islice(it, chunkSize))
+      if not chunk:
+        return
+      us = [u for msg in chunk for u in self._field(msg, 2)]
+      q = self.mapping.mapMany(us)
+      for p in self.ec.plusMany(zip(q[0::2], q[1::2]), chunkSize):
+        yield self._clear(p)
+
+
+# The 3-isogeny from y^2 = x^3 + A' x + 1771 to secp256k1, RFC 9380 E.1.
+SECP256K1_ISOGENY_A = (
+    0x3F8731ABDD661ADCA08A5558F0F5D272E953D363CB6F0E5D405447C01A444533)
+SECP256K1_ISOGENY_B = 1771
+SECP256K1_ISOGENY_X_NUM = (
+    0x8E38E38E38E38E38E38E38E38E38E38E38E38E38E38E38E38E38E38DAAAAA8C7,
+    0x07D3D4C80BC321D5B9F315CEA7FD44C5D595D2FC0BF63B92DFFF1044F17C6581,
+    0x534C328D23F234E6E2A413DECA25CAECE4506144037C40314ECBD0B53D9DD262,
+    0x8E38E38E38E38E38E38E38E38E38E38E38E38E38E38E38E38E38E38DAAAAA88C)
+SECP256K1_ISOGENY_X_DEN = (
+    0xD35771193D94918A9CA34CCBB7B640DD86CD409542F8487D9FE6B745781EB49B,
+    0xEDADC6F64383DC1DF7C4B2D51B54225406D36B641F5E41BBC52A56612A8C6D14, 1)
+SECP256K1_ISOGENY_Y_NUM = (
+    0x4BDA12F684BDA12F684BDA12F684BDA12F684BDA12F684BDA12F684B8E38E23C,
+    0xC75E0C32D5CB7C0FA9D0A54B12A0A6D5647AB046D686DA6FDFFC90FC201D71A3,
+    0x29A6194691F91A73715209EF6512E576722830A201BE2018A765E85A9ECEE931,
+    0x2F684BDA12F684BDA12F684BDA12F684BDA12F684BDA12F684BDA12F38E38D84)
+SECP256K1_ISOGENY_Y_DEN = (
+    0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFF93B,
+    0x7A06534BB8BDB49FD5E9E6632722C2989467C1BFC8E8D978DFB425D2685C2573,
+    0x6484AA716545CA2CF3A70C3FA8FE337E0A3D21162F0D6299A7BF8192BFD2A76F, 1)
+
+
+def secp256k1(dst: bytes) -> HashToCurve:
+  """secp256k1_XMD:SHA-256_SSWU_RO_ with domain separation tag dst."""
+  ec = curves.get('secp256k1').ec
+  z = ec.field
+  source = interned(EC, z, z.make(SECP256K1_ISOGENY_A),
+                    z.make(SECP256K1_ISOGENY_B))
+  isogeny = Isogeny(source, SECP256K1_ISOGENY_X_NUM, SECP256K1_ISOGENY_X_DEN,
+                    SECP256K1_ISOGENY_Y_NUM, SECP256K1_ISOGENY_Y_DEN)
+  return HashToCurve(interned(SSWU, ec, z.make(-11), isogeny), dst)
+
+
+def p256(dst: bytes) -> HashToCurve:
+  """P256_XMD:SHA-256_SSWU_RO_ with domain separation tag dst."""
+  ec = curves.get('P-256').ec
+  return HashToCurve(interned(SSWU, ec, ec.field.make(-10)), dst)
@@ -0,0 +1,171 @@
+"""Opt-in operation counters and timings for the arithmetic layers.
+
+  with instrument.Counters() as counters:
+    Signature.sign(e, x)
+  print(counters.toJSON())
+
+While the context is active, the methods listed in PATCHES are replaced by
+wrappers that count every call per field or group, and the timed ones also
+record their wall time in a histogram when they are called at the top
+level, i.e. not from within another timed operation. On exit the original
+methods are put back, so there is no cost at all outside of the context.
+"""
+import collections
+import json
+import time
+
+from toycrypto import gfpof
+from toycrypto.base import Group
+from toycrypto.ec import EC
+from toycrypto.edwards import EdwardsCurve
+from toycrypto.gfpof import GFPOF
+from toycrypto.pairing import Pairing
+from toycrypto.pof import POF
+from toycrypto.primefields import Z
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def _self(args: Tuple[Any, ...]) -> Any:
+  return args[0]
+
+
+def _group(args: Tuple[Any, ...]) -> Any:
+  return args[0].group
+
+
+# (owner, attribute, counter name, function from the call's arguments to
+# the field or group to count it for, whether to time top-level calls).
+PATCHES: List[Tuple[Any, str, str, Callable[[Tuple[Any, ...]], Any], bool]] = [
+    (Z, 'plus', 'plus', _self, False),
+    (Z, 'mul', 'mul', _self, False),
+    (Z.Element, '__init__', 'new', lambda args: args[2], False),
+    (Z.Element, 'mulInv', 'mulInv', _group, False),
+    (Z.Element, 'scalarPow', 'pow', _group, False),
+    (Z.Element, 'sqrt', 'sqrt', _group, False),
+    (POF, 'plus', 'plus', _self, False),
+    (POF, 'mul', 'mul', _self, True),
+    (POF, 'longDiv', 'longDiv', _self, True),
+    (POF.Element, '__init__', 'new', lambda args: args[1], False),
+    (GFPOF, 'mul', 'mul', _self, True),
+    (GFPOF.Element, 'mulInv', 'mulInv', _group, True),
+    (gfpof, 'ExtEuclidean', 'ExtEuclidean', lambda args: args[0], True),
+    (EC, 'plus', 'plus', _self, True),
+    (EC, 'multiScalarMul', 'multiScalarMul', _self, True),
+    (EC, '_jacobianPlus', 'jacobianPlus', _self, False),
+    (EC, '_jacobianDouble', 'jacobianDouble', _self, False),
+    (EC.Element, '__init__', 'new', lambda args: args[1], False),
+    (EdwardsCurve, 'plus', 'plus', _self, True),
+    (EdwardsCurve, 'double', 'double', _self, False),
+    (Group.Element, 'scalarMul', 'scalarMul', _group, True),
+    (Pairing, 'miller', 'miller', _self, True),
+    (Pairing, 'finalExponentiation', 'finalExponentiation', _self, True),
+]
+
+
+def label(obj: Any) -> str:
+  """A stable name for a field or group, to key the counters by."""
+  if isinstance(obj, GFPOF):
+    return "GFPOF(%s, %s)" % (label(obj.field), obj.rp)
+  if isinstance(obj, POF):
+    return "POF(%s)" % label(obj.field)
+  if isinstance(obj, EC):
+    return "EC(%s, %s, %s)" % (label(obj.field), obj.A, obj.B)
+  if isinstance(obj, EdwardsCurve):
+    return "Edwards(%s, %s, %s)" % (label(obj.field), obj.a, obj.d)
+  return str(obj)
+
+
+class Counters(object):
+  """Context manager counting and timing field and group operations.
+
+  counts maps field or group labels to operation names to call counts.
+  histograms maps "<type>.<operation>" of the top-level timed operations to
+  a histogram of their durations: bucket b counts calls taking between
+  2^(b-1) and 2^b nanoseconds.
+  """
+
+  # The active instance, only one can be active at a time.
+  active: Optional['Counters'] = None
+
+  def __init__(self) -> None:
+    counter = collections.Counter
+    self.counts: Dict[str, Dict[str, int]] = collections.defaultdict(counter)
+    self.histograms: Dict[str, Dict[int,
+                                    int]] = collections.defaultdict(counter)
+    self._labels: Dict[int, Tuple[Any, str]] = {}
+    self._saved: List[Tuple[Any, str, Any]] = []
+    self._depth = 0
+
+  def __enter__(self) -> 'Counters':
+    if Counters.active is not None:
+      raise RuntimeError("Counters are already active")
+    Counters.active = self
+    for (owner, name, op, which, timed) in PATCHES:
+      original = owner.__dict__[name]
+      self._saved.append((owner, name, original))
+      setattr(owner, name, self._wrap(original, op, which, timed))
+    return self
+
+  def __exit__(self, *args: Any) -> None:
+    for (owner, name, original) in reversed(self._saved):
+      setattr(owner, name, original)
+    self._saved = []
+    Counters.active = None
+
+  def _label(self, obj: Any) -> str:
+    # Labels can be expensive to build, so we cache them by object id, and
+    # keep the object alive so that its id doesn't get reused.
+    cached = self._labels.get(id(obj))
+    if cached is None:
+      cached = self._labels[id(obj)] = (obj, label(obj))
+    return cached[1]
+
+  def _wrap(self, original: Any, op: str,
+            which: Callable[[Tuple[Any, ...]], Any], timed: bool) -> Any:
+    counts = self.counts
+
+    if not timed:
+
+      def counting(*args: Any, **kwargs: Any) -> Any:
+        counts[self._label(which(args))][op] += 1
+        return original(*args, **kwargs)
+
+      return counting
+
+    histograms = self.histograms
+
+    def timing(*args: Any, **kwargs: Any) -> Any:
+      obj = which(args)
+      counts[self._label(obj)][op] += 1
+      if self._depth:
+        return original(*args, **kwargs)
+      self._depth += 1
+      start = time.perf_counter_ns()
+      try:
+        return original(*args, **kwargs)
+      finally:
+        elapsed = time.perf_counter_ns() - start
+        self._depth -= 1
+        histograms["%s.%s" %
+                   (type(obj).__name__, op)][elapsed.bit_length()] += 1
+
+    return timing
+
+  def total(self, op: str) -> int:
+    """Number of op calls summed over all fields and groups."""
+    return sum(c.get(op, 0) for c in self.counts.values())
+
+  def toDict(self) -> Dict[str, Any]:
+    return {
+        'counts': {
+            k: dict(v) for (k, v) in self.counts.items()
+        },
+        'histograms': {
+            k: {
+                str(b): n for (b, n) in sorted(v.items())
+            } for (k, v) in self.histograms.items()
+        },
+    }
+
+  def toJSON(self, **kwargs: Any) -> str:
+    return json.dumps(self.toDict(), sort_keys=True, **kwargs)
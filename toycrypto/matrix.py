@@ -0,0 +1,376 @@
+"""Matrices and linear algebra over any Field.
+
+Entries are stored row-major in one flat list. For Z the list holds the raw
+values rather than elements, and all arithmetic runs on plain ints: dot
+products sum the unreduced products and reduce once at the end. Other
+fields store their elements and go through the field's plus and mul.
+"""
+import operator
+
+from toycrypto.base import Field
+from toycrypto.primefields import Z
+from typing import Any, List, Optional, Sequence, Tuple
+
+# Products with all sides at least this long use Strassen's algorithm,
+# recursing until the blocks are smaller. Python's per-element overhead makes
+# the extra block additions expensive, so on 256-bit entries it breaks even at
+# 128 and saves a quarter at 256, see benchmarks/matrix_bench.py.
+STRASSEN_THRESHOLD = 128
+
+
+class _Ints(object):
+  """Entry arithmetic on raw values of Z."""
+
+  def __init__(self, field: Z):
+    self.field = field
+    self.p = field.modulus
+    self.zero = 0
+    self.one = 1
+
+  def raw(self, x: Any) -> Any:
+    return int(x) % self.p
+
+  def element(self, v: Any) -> Z.Element:
+    return self.field.Element(v, self.field)
+
+  def isZero(self, v: Any) -> bool:
+    return not v
+
+  def add(self, a: Any, b: Any) -> Any:
+    return (a + b) % self.p
+
+  def sub(self, a: Any, b: Any) -> Any:
+    return (a - b) % self.p
+
+  def mul(self, a: Any, b: Any) -> Any:
+    return a * b % self.p
+
+  def inv(self, a: Any) -> Any:
+    return self.field.backend.invert(a, self.p)
+
+  def dot(self, a: Sequence[Any], b: Sequence[Any]) -> Any:
+    return sum(map(operator.mul, a, b)) % self.p
+
+  def addRows(self, a: Sequence[Any], b: Sequence[Any]) -> List[Any]:
+    p = self.p
+    return [(x + y) % p for (x, y) in zip(a, b)]
+
+  def subRows(self, a: Sequence[Any], b: Sequence[Any]) -> List[Any]:
+    p = self.p
+    return [(x - y) % p for (x, y) in zip(a, b)]
+
+  def scaleRow(self, a: Sequence[Any], f: Any) -> List[Any]:
+    p = self.p
+    return [x * f % p for x in a]
+
+  def axpyRow(self, a: Sequence[Any], f: Any, b: Sequence[Any]) -> List[Any]:
+    """a - f b"""
+    p = self.p
+    return [(x - f * y) % p for (x, y) in zip(a, b)]
+
+
+class _Elements(object):
+  """Entry arithmetic on the elements of any field."""
+
+  def __init__(self, field: Field):
+    self.field = field
+    self.zero = field.plusID()
+    self.one = field.mulID()
+
+  def raw(self, x: Any) -> Any:
+    return self.field.make(x) if isinstance(x, int) else x
+
+  def element(self, v: Any) -> Any:
+    return v
+
+  def isZero(self, v: Any) -> bool:
+    return v.isPlusID()
+
+  def add(self, a: Any, b: Any) -> Any:
+    return self.field.plus(a, b)
+
+  def sub(self, a: Any, b: Any) -> Any:
+    return self.field.plus(a, b.plusInv())
+
+  def mul(self, a: Any, b: Any) -> Any:
+    return self.field.mul(a, b)
+
+  def inv(self, a: Any) -> Any:
+    return a.mulInv()
+
+  def dot(self, a: Sequence[Any], b: Sequence[Any]) -> Any:
+    result = self.zero
+    for (x, y) in zip(a, b):
+      result = self.field.plus(result, self.field.mul(x, y))
+    return result
+
+  def addRows(self, a: Sequence[Any], b: Sequence[Any]) -> List[Any]:
+    return [self.add(x, y) for (x, y) in zip(a, b)]
+
+  def subRows(self, a: Sequence[Any], b: Sequence[Any]) -> List[Any]:
+    return [self.sub(x, y) for (x, y) in zip(a, b)]
+
+  def scaleRow(self, a: Sequence[Any], f: Any) -> List[Any]:
+    return [self.mul(x, f) for x in a]
+
+  def axpyRow(self, a: Sequence[Any], f: Any, b: Sequence[Any]) -> List[Any]:
+    return [self.sub(x, self.mul(f, y)) for (x, y) in zip(a, b)]
+
+
+def _ops(field: Field) -> Any:
+  return _Ints(field) if isinstance(field, Z) else _Elements(field)
+
+
+class Matrix(object):
+  """A rows x cols matrix over field."""
+
+  def __init__(self,
+               field: Field,
+               rows: int,
+               cols: int,
+               data: Optional[List[Any]] = None,
+               ops: Any = None):
+    self.field = field
+    self.nrows = rows
+    self.ncols = cols
+    self.ops = ops or _ops(field)
+    if data is None:
+      data = [self.ops.zero] * (rows * cols)
+    if len(data) != rows * cols:
+      raise ValueError("Expected %d entries, got %d" % (rows * cols, len(data)))
+    self.data = data
+
+  @classmethod
+  def fromRows(cls, field: Field, rows: Sequence[Sequence[Any]]) -> 'Matrix':
+    """Builds a matrix from rows of elements or ints."""
+    ops = _ops(field)
+    cols = len(rows[0]) if rows else 0
+    if any(len(r) != cols for r in rows):
+      raise ValueError("Rows differ in length")
+    return cls(field, len(rows), cols, [ops.raw(x) for r in rows for x in r],
+               ops)
+
+  @classmethod
+  def identity(cls, field: Field, n: int) -> 'Matrix':
+    m = cls(field, n, n)
+    for i in range(n):
+      m.data[i * n + i] = m.ops.one
+    return m
+
+  def _new(self, rows: int, cols: int, data: List[Any]) -> 'Matrix':
+    return Matrix(self.field, rows, cols, data, self.ops)
+
+  def _rowLists(self) -> List[List[Any]]:
+    c = self.ncols
+    return [self.data[i * c:(i + 1) * c] for i in range(self.nrows)]
+
+  def _fromRowLists(self, rows: List[List[Any]]) -> 'Matrix':
+    cols = len(rows[0]) if rows else self.ncols
+    return self._new(len(rows), cols, [x for r in rows for x in r])
+
+  def __getitem__(self, ij: Tuple[int, int]) -> Any:
+    (i, j) = ij
+    return self.ops.element(self.data[i * self.ncols + j])
+
+  def __setitem__(self, ij: Tuple[int, int], value: Any) -> None:
+    (i, j) = ij
+    self.data[i * self.ncols + j] = self.ops.raw(value)
+
+  def rows(self) -> List[List[Any]]:
+    """The entries as lists of elements."""
+    return [[self.ops.element(v) for v in r] for r in self._rowLists()]
+
+  def __eq__(self, other: object) -> bool:
+    if not isinstance(other, Matrix):
+      return False
+    return (self.field == other.field and self.nrows == other.nrows and
+            self.ncols == other.ncols and self.data == other.data)
+
+  def __repr__(self) -> str:
+    return "Matrix(%r, %r)" % (self.field, self.rows())
+
+  def transpose(self) -> 'Matrix':
+    c = self.ncols
+    return self._new(
+        c, self.nrows,
+        [self.data[i * c + j] for j in range(c) for i in range(self.nrows)])
+
+  def plus(self, other: 'Matrix') -> 'Matrix':
+    if (self.nrows, self.ncols) != (other.nrows, other.ncols):
+      raise ValueError("Can't add matrices of different shapes")
+    return self._new(self.nrows, self.ncols,
+                     self.ops.addRows(self.data, other.data))
+
+  def mul(self, other: 'Matrix') -> 'Matrix':
+    if self.ncols != other.nrows:
+      raise ValueError("Can't multiply %dx%d by %dx%d" %
+                       (self.nrows, self.ncols, other.nrows, other.ncols))
+    # Strassen pads to a square, which only pays when no side is thin.
+    if min(self.nrows, self.ncols, other.ncols) >= STRASSEN_THRESHOLD:
+      return self._strassen(other)
+    return self._fromRowLists(
+        _classic(self.ops, self._rowLists(), other._rowLists()))
+
+  def mulVector(self, v: Sequence[Any]) -> List[Any]:
+    """The product with the column vector v, as a list of elements."""
+    if len(v) != self.ncols:
+      raise ValueError("Vector of length %d for %d columns" %
+                       (len(v), self.ncols))
+    raw = [self.ops.raw(x) for x in v]
+    return [self.ops.element(self.ops.dot(r, raw)) for r in self._rowLists()]
+
+  def _strassen(self, other: 'Matrix') -> 'Matrix':
+    # Pad both to the next power of two.
+    n = 1
+    while n < max(self.nrows, self.ncols, other.ncols):
+      n *= 2
+    z = self.ops.zero
+
+    def pad(m: Matrix) -> List[List[Any]]:
+      rows = [r + [z] * (n - m.ncols) for r in m._rowLists()]
+      return rows + [[z] * n for i in range(n - m.nrows)]
+
+    product = _strassen(self.ops, pad(self), pad(other))
+    return self._fromRowLists([r[:other.ncols] for r in product[:self.nrows]])
+
+  def _eliminate(self, reduced: bool) -> Tuple[List[List[Any]], List[int], Any]:
+    """Gaussian elimination on a copy of the rows.
+
+    Returns the rows in row echelon form, the pivot column of each non-zero
+    row, and the determinant for square matrices. With reduced, the pivots
+    are scaled to one and the entries above them cleared as well.
+    """
+    ops = self.ops
+    rows = self._rowLists()
+    pivots: List[int] = []
+    inverses: List[Any] = []
+    det = ops.one
+    r = 0
+    for c in range(self.ncols):
+      if r == len(rows):
+        break
+      k = next((i for i in range(r, len(rows)) if not ops.isZero(rows[i][c])),
+               None)
+      if k is None:
+        det = ops.zero
+        continue
+      if k != r:
+        (rows[r], rows[k]) = (rows[k], rows[r])
+        det = ops.sub(ops.zero, det)
+      pivot = rows[r][c]
+      det = ops.mul(det, pivot)
+      # Each pivot's inverse is needed before the next pivot is known.
+      inv = ops.inv(pivot)
+      pivots.append(c)
+      inverses.append(inv)
+      # Entries left of column c are zero in the rows from r on.
+      tail = rows[r][c:]
+      for i in range(r + 1, len(rows)):
+        if not ops.isZero(rows[i][c]):
+          f = ops.mul(rows[i][c], inv)
+          rows[i] = rows[i][:c] + ops.axpyRow(rows[i][c:], f, tail)
+      r += 1
+    if r < self.nrows:
+      det = ops.zero
+
+    if reduced:
+      for (i, c) in reversed(list(enumerate(pivots))):
+        rows[i] = rows[i][:c] + ops.scaleRow(rows[i][c:], inverses[i])
+        tail = rows[i][c:]
+        for j in range(i):
+          if not ops.isZero(rows[j][c]):
+            rows[j] = rows[j][:c] + ops.axpyRow(rows[j][c:], rows[j][c], tail)
+    return (rows, pivots, det)
+
+  def echelon(self, reduced: bool = False) -> Tuple['Matrix', List[int]]:
+    """Row echelon form and the pivot column of each non-zero row."""
+    (rows, pivots, _) = self._eliminate(reduced)
+    return (self._fromRowLists(rows), pivots)
+
+  def rank(self) -> int:
+    return len(self._eliminate(False)[1])
+
+  def determinant(self) -> Any:
+    if self.nrows != self.ncols:
+      raise ValueError("Only square matrices have a determinant")
+    return self.ops.element(self._eliminate(False)[2])
+
+  def inverse(self) -> 'Matrix':
+    """Raises ZeroDivisionError for singular matrices."""
+    n = self.nrows
+    if n != self.ncols:
+      raise ValueError("Only square matrices have an inverse")
+    one = self.ops.one
+    z = self.ops.zero
+    augmented = self._new(n, 2 * n, [
+        x for (i, r) in enumerate(self._rowLists())
+        for x in r + [one if j == i else z for j in range(n)]
+    ])
+    (rows, pivots, _) = augmented._eliminate(True)
+    if len(pivots) < n or pivots[n - 1] != n - 1:
+      raise ZeroDivisionError("Matrix is singular")
+    return self._fromRowLists([r[n:] for r in rows])
+
+  def solve(self, b: Sequence[Any]) -> Optional[List[Any]]:
+    """Returns an x with self x = b, or None if there is none.
+
+    If there are many solutions, the free variables are zero.
+    """
+    if len(b) != self.nrows:
+      raise ValueError("Vector of length %d for %d rows" % (len(b), self.nrows))
+    ops = self.ops
+    augmented = self._new(
+        self.nrows, self.ncols + 1,
+        [x for (r, y) in zip(self._rowLists(), b) for x in r + [ops.raw(y)]])
+    (rows, pivots, _) = augmented._eliminate(True)
+    if pivots and pivots[-1] == self.ncols:
+      return None
+    x = [ops.zero] * self.ncols
+    for (i, c) in enumerate(pivots):
+      x[c] = rows[i][self.ncols]
+    return [ops.element(v) for v in x]
+
+
+def _classic(ops: Any, a: List[List[Any]],
+             b: List[List[Any]]) -> List[List[Any]]:
+  columns = [list(c) for c in zip(*b)]
+  return [[ops.dot(r, c) for c in columns] for r in a]
+
+
+def _strassen(ops: Any, a: List[List[Any]],
+              b: List[List[Any]]) -> List[List[Any]]:
+  """Strassen's algorithm on square matrices of power of two size.
+
+  Splitting both into 2x2 blocks, seven block products instead of eight
+  suffice, at the cost of 18 block additions.
+  """
+  n = len(a)
+  if n < STRASSEN_THRESHOLD or n % 2:
+    return _classic(ops, a, b)
+  h = n // 2
+
+  def split(m: List[List[Any]]) -> Tuple[List[List[Any]], ...]:
+    return ([r[:h] for r in m[:h]], [r[h:] for r in m[:h]],
+            [r[:h] for r in m[h:]], [r[h:] for r in m[h:]])
+
+  def add(x: List[List[Any]], y: List[List[Any]]) -> List[List[Any]]:
+    return [ops.addRows(r, s) for (r, s) in zip(x, y)]
+
+  def sub(x: List[List[Any]], y: List[List[Any]]) -> List[List[Any]]:
+    return [ops.subRows(r, s) for (r, s) in zip(x, y)]
+
+  (a11, a12, a21, a22) = split(a)
+  (b11, b12, b21, b22) = split(b)
+  m1 = _strassen(ops, add(a11, a22), add(b11, b22))
+  m2 = _strassen(ops, add(a21, a22), b11)
+  m3 = _strassen(ops, a11, sub(b12, b22))
+  m4 = _strassen(ops, a22, sub(b21, b11))
+  m5 = _strassen(ops, add(a11, a12), b22)
+  m6 = _strassen(ops, sub(a21, a11), add(b11, b12))
+  m7 = _strassen(ops, sub(a12, a22), add(b21, b22))
+  c11 = add(sub(add(m1, m4), m5), m7)
+  c12 = add(m3, m5)
+  c21 = add(m2, m4)
+  c22 = add(sub(add(m1, m3), m2), m6)
+  return ([r + s for (r, s) in zip(c11, c12)] +
+          [r + s for (r, s) in zip(c21, c22)])
@@ -0,0 +1,348 @@
+"""Pairings on elliptic curves, by Miller's algorithm.
+
+A pairing maps a point P of G1 and a point Q of G2, both of prime order r,
+to the r-th roots of unity in an extension K of degree k of Z(p), such
+that e(a P, b Q) = e(P, Q)^(a b). Miller's loop runs double-and-add over a
+loop scalar on one of the points, and multiplies up the lines of every
+step, evaluated at the other point. The final exponentiation raises the
+result to (p^k - 1) / r.
+
+  * The moving point T stays in Jacobian coordinates. The new T and the
+    line of a step come out of one traced formula, see formula, and the
+    lines are scaled by their Jacobian denominators instead of divided.
+  * Lines are built directly as sparse elements of K.
+  * Vertical lines, and factors in a proper subfield of K, are mapped to
+    one by the final exponentiation, so they are left out.
+  * The final exponentiation has an easy part,
+    (p^(k/2) - 1) (p^(k/2) + 1) / Phi_k(p), which takes a Frobenius map
+    and one inversion, and a hard part, Phi_k(p) / r. Both are applied
+    via their base p digits to the Frobenius images of f at once, which
+    share all squarings.
+
+TatePairing is the Tate pairing on the supersingular y^2 = x^3 + x over
+Z(p) for p = 3 mod 4, with embedding degree 2 and the distortion map
+(x, y) -> (-x, i y) into K = Z(p)[i] / (i^2 + 1). AtePairing is the
+optimal ate pairing on BN curves. There G2 lives on a sextic twist over
+Z(p)[i], where T is cheap to move, and K is a single degree 12 extension
+Z(p)[w] / (w^12 - 2 x0 w^6 + x0^2 + 1), for w^6 = x0 + i.
+"""
+import collections
+
+from toycrypto.base import interned
+from toycrypto.ec import EC, ECSubfield
+from toycrypto.ec import _jacobianDoubleFormula, _jacobianPlusFormula
+from toycrypto.gfpof import GFPOF
+from toycrypto.pof import POF
+from toycrypto.primefields import Z
+from typing import Any, Iterable, Tuple
+
+# y^2 = x^3 + x over Z(p) for p = 80 r - 1, r = 2^127 - 1, with a generator
+# (gx, gy) of order r.
+SupersingularParams = collections.namedtuple("SupersingularParams",
+                                             ["p", "r", "gx", "gy"])
+
+SUPERSINGULAR = SupersingularParams(p=80 * (2**127 - 1) - 1,
+                                    r=2**127 - 1,
+                                    gx=3407605647569900020243833642559879703572,
+                                    gy=5632924337552689712598600388060850120540)
+
+# The BN curve y^2 = x^3 + b for the parameter u, with p and r the values
+# of 36 u^4 + 36 u^3 + 24 u^2 + 6 u + 1 and 36 u^4 + 36 u^3 + 18 u^2 + 6 u +
+# 1. The twist is y^2 = x^3 + b / xi over Z(p)[i] for xi = x0 + i, and the
+# generators g2x, g2y are pairs of coefficients of 1 and i.
+BNParams = collections.namedtuple("BNParams",
+                                  ["u", "b", "x0", "g1x", "g1y", "g2x", "g2y"])
+
+BN254 = BNParams(
+    u=4965661367192848881,
+    b=3,
+    x0=9,
+    g1x=1,
+    g1y=2,
+    g2x=(0x1800DEEF121F1E76426A00665E5C4479674322D4F75EDADD46DEBD5CD992F6ED,
+         0x198E9393920D483A7260BFB731FB5D25F1AA493335A9E71297E485B7AEF312C2),
+    g2y=(0x12C85EA5DB8C6DEB4AAB71808DCB408FE3D1E7690C43D37B4CE6CC0166FA7DAA,
+         0x090689D0585FF075EC9E99AD690C3395BC4B313370B38EF355ACDADCD122975B))
+
+
+def _doubleLineFormula(f, A, B, x, y, z):
+  """2 (x, y, z) in Jacobian coordinates, and the tangent line there.
+
+  The tangent, scaled by 2 y z^3, is c0 + cx X + cy Y at a point (X, Y).
+  """
+  (x3, y3, z3) = _jacobianDoubleFormula(f, A, B, x, y, z)
+  # The tracer shares these with the doubling.
+  x2 = f.mul(x, x)
+  z2 = f.mul(z, z)
+  m = f.plus(f.plus(f.plus(x2, x2), x2), f.mul(A, f.mul(z2, z2)))
+  y2 = f.mul(y, y)
+  c0 = f.plus(f.mul(m, x), f.plus(y2, y2).plusInv())
+  return (x3, y3, z3, c0, f.mul(m, z2).plusInv(), f.mul(z3, z2))
+
+
+def _addLineFormula(f, A, B, x1, y1, z1, x2, y2):
+  """(x1, y1, z1) + (x2, y2) in Jacobian coordinates, and the line through
+  both, scaled by z3, like _doubleLineFormula, plus h and r, see
+  ec._jacobianPlusFormula."""
+  (x3, y3, z3, h, r) = _jacobianPlusFormula(f, A, B, x1, y1, z1, x2, y2,
+                                            f.mulID())
+  c0 = f.plus(f.mul(r, x2), f.mul(z3, y2).plusInv())
+  return (x3, y3, z3, c0, r.plusInv(), z3, h, r)
+
+
+def _mobius(n: int) -> int:
+  result = 1
+  d = 2
+  while d * d <= n:
+    if not n % d:
+      n //= d
+      if not n % d:
+        return 0
+      result = -result
+    d += 1
+  return -result if n > 1 else result
+
+
+def _cyclotomic(k: int, p: int) -> int:
+  """Phi_k(p), the product of (p^d - 1)^mu(k / d) over all d dividing k."""
+  (num, den) = (1, 1)
+  for d in range(1, k + 1):
+    if not k % d:
+      mu = _mobius(k // d)
+      if mu == 1:
+        num *= p**d - 1
+      elif mu == -1:
+        den *= p**d - 1
+  return num // den
+
+
+class _Step(object):
+  """The state of Miller's loop for one pair: the Jacobian point T moving
+  from base, and the point at which lines are evaluated."""
+
+  def __init__(self, base: Tuple[Any, Any], at: Any):
+    self.base = base
+    self.at = at
+    self.t = base + (base[0].field.mulID(),)
+
+
+class Pairing(object):
+  """A pairing G1 x G2 -> GT, see the module documentation.
+
+  Subclasses set ec, the curve T moves on, and loop, the scalar Miller's
+  loop runs over, and build lines in gt from their coefficients.
+  """
+
+  def __init__(self, g1: ECSubfield, g2: ECSubfield, gt: GFPOF, k: int, ec: EC,
+               loop: int):
+    self.g1 = g1
+    self.g2 = g2
+    self.gt = gt
+    self.k = k
+    self.r = g1.order
+    self.ec = ec
+    self.loop = loop
+    p = gt.field.order
+    phi = _cyclotomic(k, p)
+    if phi % self.r:
+      raise ValueError("r doesn't have embedding degree %d" % k)
+    self._easy = (p**(k // 2) + 1) // phi
+    self._hard = phi // self.r
+    self._double = ec._formula(_doubleLineFormula, 3)
+    self._add = ec._formula(_addLineFormula, 5)
+
+  def __repr__(self) -> str:
+    return "%s(%s)" % (type(self).__name__, self.gt.field)
+
+  def pair(self, P: EC.Element, Q: EC.Element) -> GFPOF.Element:
+    return self.finalExponentiation(self.miller([(P, Q)]))
+
+  def pairProduct(
+      self, pairs: Iterable[Tuple[EC.Element, EC.Element]]) -> GFPOF.Element:
+    """The product of e(P, Q) over all (P, Q) in pairs.
+
+    All pairs share the squarings of one Miller loop and a single final
+    exponentiation, which is what checking BLS-style signatures needs.
+    """
+    return self.finalExponentiation(self.miller(pairs))
+
+  def miller(self, pairs: Iterable[Tuple[EC.Element,
+                                         EC.Element]]) -> GFPOF.Element:
+    """The product of Miller's loop over pairs, to be finally exponentiated."""
+    gt = self.gt
+    steps = [
+        self._start(P, Q)
+        for (P, Q) in pairs
+        if not P.isPlusID() and not Q.isPlusID()
+    ]
+    f = gt.mulID()
+    for i in range(self.loop.bit_length() - 2, -1, -1):
+      f = gt.mul(f, f)
+      for s in steps:
+        f = self._doubleStep(f, s)
+      if self.loop >> i & 1:
+        for s in steps:
+          f = self._addStep(f, s, s.base)
+    for s in steps:
+      f = self._finish(f, s)
+    return f
+
+  def _doubleStep(self, f: GFPOF.Element, s: _Step) -> GFPOF.Element:
+    (x, y, z, c0, cx, cy) = self._double(*s.t)
+    s.t = (x, y, z)
+    return self.gt.mul(f, self._line(c0, cx, cy, s.at))
+
+  def _addStep(self, f: GFPOF.Element, s: _Step,
+               point: Tuple[Any, Any]) -> GFPOF.Element:
+    (x, y, z, c0, cx, cy, h, r) = self._add(*s.t, *point)
+    if h.isPlusID():
+      if r.isPlusID():
+        return self._doubleStep(f, s)
+      # T = -point, the line is vertical, and T + point = O.
+      one = z.field.mulID()
+      s.t = (one, one, z.field.plusID())
+      return f
+    s.t = (x, y, z)
+    return self.gt.mul(f, self._line(c0, cx, cy, s.at))
+
+  def finalExponentiation(self, f: GFPOF.Element) -> GFPOF.Element:
+    gt = self.gt
+    f = gt.mul(gt.frobenius(f, self.k // 2), f.mulInv())
+    return self._frobeniusPow(self._frobeniusPow(f, self._easy), self._hard)
+
+  def _frobeniusPow(self, f: GFPOF.Element, e: int) -> GFPOF.Element:
+    """f^e as the product of frobenius(f, i)^e_i for the base p digits e_i
+    of e, by simultaneous square-and-multiply."""
+    gt = self.gt
+    p = gt.field.order
+    digits = []
+    while e:
+      (e, d) = divmod(e, p)
+      digits.append(d)
+    # Products of all subsets of the Frobenius images, by bit mask.
+    table = [gt.mulID()]
+    for i in range(len(digits)):
+      image = gt.frobenius(f, i)
+      table += [gt.mul(t, image) if j else image for (j, t) in enumerate(table)]
+    result = None
+    for b in range(max(d.bit_length() for d in digits) - 1, -1, -1):
+      if result is not None:
+        result = gt.mul(result, result)
+      mask = sum((d >> b & 1) << i for (i, d) in enumerate(digits))
+      if mask:
+        result = table[mask] if result is None else gt.mul(result, table[mask])
+    return result
+
+  def _start(self, P: EC.Element, Q: EC.Element) -> _Step:
+    raise NotImplementedError
+
+  def _line(self, c0: Any, cx: Any, cy: Any, at: Any) -> GFPOF.Element:
+    """c0 + cx X + cy Y, the line at the point at, in gt."""
+    raise NotImplementedError
+
+  def _finish(self, f: GFPOF.Element, s: _Step) -> GFPOF.Element:
+    return f
+
+
+class TatePairing(Pairing):
+  """The reduced Tate pairing on y^2 = x^3 + x, with G1 = G2.
+
+  e(P, Q) is f_(r, P) evaluated at the distortion (-Q.x, i Q.y) of Q. The
+  distorted x is in Z(p), so the vertical lines are in Z(p) as well.
+  """
+
+  def __init__(self, params: SupersingularParams):
+    if params.p % 4 != 3:
+      raise ValueError("The curve is only supersingular for p = 3 mod 4")
+    z = interned(Z, params.p)
+    ec = interned(EC, z, z.mulID(), z.plusID())
+    g = interned(ECSubfield, ec,
+                 ec.Element(ec, z.make(params.gx), z.make(params.gy)), params.r)
+    gt = interned(GFPOF, z, POF(z).make([1, 0, 1]))
+    super(TatePairing, self).__init__(g, g, gt, 2, ec, params.r)
+
+  def _start(self, P: EC.Element, Q: EC.Element) -> _Step:
+    return _Step((P.x, P.y), (Q.x.plusInv(), Q.y))
+
+  def _line(self, c0: Z.Element, cx: Z.Element, cy: Z.Element,
+            at: Tuple[Z.Element, Z.Element]) -> GFPOF.Element:
+    z = self.gt.field
+    line = self.gt.Element(self.gt)
+    line.setCoefficient(0, z.plus(c0, z.mul(cx, at[0])))
+    line.setCoefficient(1, z.mul(cy, at[1]))
+    return line
+
+
+class AtePairing(Pairing):
+  """The optimal ate pairing on a BN curve.
+
+  Miller's loop runs over 6 u + 2 on Q, on the twist, with lines at P.
+  With psi(x, y) = (x w^2, y w^3) from the twist, the line of a step
+  through psi(T) is cy P.y + cx P.x w + c0 w^3, with the coefficients of
+  the line on the twist. Two more lines through the Frobenius images
+  pi(Q) and -pi^2(Q) complete the loop.
+  """
+
+  def __init__(self, params: BNParams):
+    u = params.u
+    p = 36 * u**4 + 36 * u**3 + 24 * u**2 + 6 * u + 1
+    r = 36 * u**4 + 36 * u**3 + 18 * u**2 + 6 * u + 1
+    z = interned(Z, p)
+    ec = interned(EC, z, z.plusID(), z.make(params.b))
+    g1 = interned(ECSubfield, ec,
+                  ec.Element(ec, z.make(params.g1x), z.make(params.g1y)), r)
+    fp2 = interned(GFPOF, z, POF(z).make([1, 0, 1]))
+    xi = fp2.make([params.x0, 1])
+    twist = interned(EC, fp2, fp2.plusID(),
+                     fp2.mul(fp2.make([params.b]), xi.mulInv()))
+    g2 = interned(
+        ECSubfield, twist,
+        twist.Element(twist, fp2.make(list(params.g2x)),
+                      fp2.make(list(params.g2y))), r)
+    x0 = params.x0
+    gt = interned(
+        GFPOF, z,
+        POF(z).make([x0 * x0 + 1, 0, 0, 0, 0, 0, -2 * x0 % p, 0, 0, 0, 0, 0,
+                     1]))
+    self.x0 = z.make(x0)
+    # psi^-1 pi psi (x, y) = (x^p xi^((p - 1) / 3), y^p xi^((p - 1) / 2)).
+    self._gamma = (xi.scalarPow((p - 1) // 3), xi.scalarPow((p - 1) // 2))
+    super(AtePairing, self).__init__(g1, g2, gt, 12, twist, 6 * u + 2)
+
+  def _start(self, P: EC.Element, Q: EC.Element) -> _Step:
+    return _Step((Q.x, Q.y), (P.x, P.y))
+
+  def _frobenius(self, Q: Tuple[Any, Any]) -> Tuple[Any, Any]:
+    fp2 = self.ec.field
+    return (fp2.mul(fp2.frobenius(Q[0]),
+                    self._gamma[0]), fp2.mul(fp2.frobenius(Q[1]),
+                                             self._gamma[1]))
+
+  def _finish(self, f: GFPOF.Element, s: _Step) -> GFPOF.Element:
+    q1 = self._frobenius(s.base)
+    q2 = self._frobenius(q1)
+    f = self._addStep(f, s, q1)
+    return self._addStep(f, s, (q2[0], q2[1].plusInv()))
+
+  def _line(self, c0: GFPOF.Element, cx: GFPOF.Element, cy: GFPOF.Element,
+            at: Tuple[Z.Element, Z.Element]) -> GFPOF.Element:
+    z = self.gt.field
+    line = self.gt.Element(self.gt)
+    for (power, c, scale) in ((0, cy, at[1]), (1, cx, at[0]), (3, c0, None)):
+      (a, b) = (c.getCoefficient(0), c.getCoefficient(1))
+      if scale is not None:
+        (a, b) = (z.mul(a, scale), z.mul(b, scale))
+      # a + b i = a - x0 b + b w^6
+      line.setCoefficient(power, z.plus(a, z.mul(self.x0, b).plusInv()))
+      line.setCoefficient(power + 6, b)
+    return line
+
+
+def supersingular() -> TatePairing:
+  """The Tate pairing on the SUPERSINGULAR test curve."""
+  return interned(TatePairing, SUPERSINGULAR)
+
+
+def bn254() -> AtePairing:
+  """The optimal ate pairing on BN254, also known as alt_bn128."""
+  return interned(AtePairing, BN254)
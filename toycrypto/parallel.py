@@ -0,0 +1,157 @@
+"""Scalar multiplication and summation spread over a process pool.
+
+Elements pickle as a few ints plus their interned field, see base.interned,
+so shipping chunks of work to other processes is cheap compared to the
+scalar multiplications themselves.
+"""
+import collections
+import concurrent.futures
+import itertools
+import os
+
+from toycrypto.base import Group, opN
+from toycrypto.ec import EC, WindowTable
+from typing import Any, Iterable, List, Optional, Sequence, Tuple, Union
+
+
+def scalarMulMany(group: Any,
+                  scalars: Sequence[int],
+                  points: Union[Group.Element, Sequence[Group.Element]],
+                  workers: Optional[int] = None,
+                  chunkSize: Optional[int] = None) -> List[Group.Element]:
+  """Returns [n * P for (n, P) in zip(scalars, points)], in order.
+
+  points may also be a single element, which is then multiplied with every
+  scalar, as in key generation. group is an EC, an ECSubfield or any other
+  group, which then uses plain double-and-add. workers defaults to the
+  number of CPUs, and with a single worker no pool is started.
+  """
+  scalars = [int(n) for n in scalars]
+  if isinstance(points, Group.Element):
+    single = True
+  else:
+    points = list(points)
+    single = False
+    if len(points) != len(scalars):
+      raise ValueError("Got %d scalars but %d points" %
+                       (len(scalars), len(points)))
+
+  if workers is None:
+    workers = os.cpu_count() or 1
+  if chunkSize is None:
+    # A few chunks per worker, so that a slow chunk doesn't hold up the rest.
+    chunkSize = max(1, -(-len(scalars) // (4 * workers)))
+
+  def chunk(start: int) -> Any:
+    end = start + chunkSize
+    return (scalars[start:end], points if single else points[start:end])
+
+  starts = range(0, len(scalars), chunkSize)
+  if workers == 1 or len(starts) <= 1:
+    return [P for s in starts for P in _mulChunk(group, single, *chunk(s))]
+
+  with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+    futures = [pool.submit(_mulChunk, group, single, *chunk(s)) for s in starts]
+    return [P for f in futures for P in f.result()]
+
+
+def _mulChunk(group: Any, single: bool, scalars: List[int],
+              points: Any) -> List[Group.Element]:
+  ec = getattr(group, 'ec', group)
+  if not isinstance(ec, EC):
+    if single:
+      points = [points] * len(scalars)
+    return [
+        opN(P, n, group.plusID(), group.plus)
+        for (n, P) in zip(scalars, points)
+    ]
+
+  # Stay in Jacobian coordinates and convert back with a single inversion.
+  # A window table only pays off for more than a handful of scalars.
+  if single and len(scalars) >= 4:
+    table = WindowTable(points, max(scalars, default=0).bit_length())
+    jacobians = [table._jacobianScalarMul(n) for n in scalars]
+  else:
+    if single:
+      points = [points] * len(scalars)
+    jacobians = [ec._jacobianScalarMul(P, n) for (n, P) in zip(scalars, points)]
+  return ec._fromJacobianMany(jacobians)
+
+
+def sumPoints(group: Any,
+              points: Iterable[Group.Element],
+              workers: Optional[int] = None,
+              chunkSize: int = 4096) -> Group.Element:
+  """Returns the sum of all points, consumed as a stream.
+
+  Each chunk of chunkSize points is summed by a worker, on an EC in
+  Jacobian coordinates with mixed additions, so without any inversion. The
+  partial sums are combined as they arrive in a binary tree that keeps one
+  pending partial per level, like a binary counter. At most two chunks per
+  worker are in flight, so memory stays bounded for any number of points.
+  workers is as for scalarMulMany, and a single chunk never starts a pool.
+  """
+  if workers is None:
+    workers = os.cpu_count() or 1
+  it = iter(points)
+  chunks = iter(lambda: list(itertools.islice(it, chunkSize)), [])
+  head = list(itertools.islice(chunks, 2))
+  tree = _SumTree(group)
+  if workers == 1 or len(head) <= 1:
+    for chunk in itertools.chain(head, chunks):
+      tree.push(_sumChunk(group, chunk))
+    return tree.result()
+
+  with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+    pending: Any = collections.deque()
+    for chunk in itertools.chain(head, chunks):
+      pending.append(pool.submit(_sumChunk, group, chunk))
+      if len(pending) >= 2 * workers:
+        tree.push(pending.popleft().result())
+    while pending:
+      tree.push(pending.popleft().result())
+  return tree.result()
+
+
+def _sumChunk(group: Any, points: List[Group.Element]) -> Any:
+  """The sum of points, in Jacobian coordinates on an EC."""
+  ec = getattr(group, 'ec', group)
+  if isinstance(ec, EC):
+    return ec._jacobianSum(points)
+  acc = group.plusID()
+  for P in points:
+    acc = group.plus(acc, P)
+  return acc
+
+
+class _SumTree(object):
+  """Pairwise summation of a stream of partial sums, see sumPoints."""
+
+  def __init__(self, group: Any):
+    self.group = group
+    ec = getattr(group, 'ec', group)
+    self.ec = ec if isinstance(ec, EC) else None
+    # (level, partial sum of 2^level pushed partials), levels decreasing.
+    self.stack: List[Tuple[int, Any]] = []
+
+  def _plus(self, a: Any, b: Any) -> Any:
+    if self.ec is not None:
+      return self.ec._jacobianPlus(a, b)
+    return self.group.plus(a, b)
+
+  def push(self, partial: Any) -> None:
+    level = 0
+    while self.stack and self.stack[-1][0] == level:
+      partial = self._plus(self.stack.pop()[1], partial)
+      level += 1
+    self.stack.append((level, partial))
+
+  def result(self) -> Group.Element:
+    if not self.stack:
+      return self.group.plusID()
+    acc = self.stack[-1][1]
+    for (_, partial) in reversed(self.stack[:-1]):
+      acc = self._plus(partial, acc)
+    if self.ec is not None:
+      return self.ec._fromJacobian(acc)
+    return acc
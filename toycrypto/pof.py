@@ -1,8 +1,19 @@
 # Remove Field super-class as polynomials don't form a field.
 from toycrypto.base import *
+from toycrypto.primefields import Z
+from toycrypto import zvector
 from functools import reduce
 from typing import Union, Dict, List, Any, Tuple
 
+# Polynomials over Z with at least this many non-zero coefficients, that
+# are at least a quarter dense, are multiplied as zvector.ZVectors.
+DENSE_THRESHOLD = 4
+
+
+def _dense(a: 'POF.Element') -> bool:
+  n = len(a.c)
+  return n >= DENSE_THRESHOLD and a.getDegree() < 4 * n
+
 
 class POF(Field):
   """Implementation of a polynomial over an arbitrary field.
@@ -25,6 +36,9 @@ class POF(Field):
   def mul(self, a: Field.Element, b: Field.Element) -> 'POF.Element':
     assert isinstance(a, POF.Element)
     assert isinstance(b, POF.Element)
+    if isinstance(self.field, Z) and _dense(a) and _dense(b):
+      return zvector.ZVector.fromPOF(a).convolve(
+          zvector.ZVector.fromPOF(b)).toPOF(self)
     # Get new result polynomial with all zero coefficients.
     newp = self.plusID()
     for k1 in a.nonZeroCoefficients():
@@ -71,8 +85,8 @@ class POF(Field):
     reminder = dividend.clone()
     quotient = self.plusID()
 
-    while reminder.getDegree(
-    ) is not None and reminder.getDegree() >= divisor.getDegree():
+    while reminder.getDegree() is not None and reminder.getDegree(
+    ) >= divisor.getDegree():
       xtimes = reminder.getDegree() - divisor.getDegree()
 
       #while True:
@@ -222,15 +236,33 @@ class POF(Field):
       assert isinstance(other, POF.Element)
       return self.pof == other.pof and self.c == other.c
 
+    def powMod(self, e: int, m: 'POF.Element') -> 'POF.Element':
+      """self^e modulo m, by sliding windows.
+
+      Over Z, this runs on dense coefficient lists with Barrett reduction,
+      see zvector.PolyMod, converting only the input and the result.
+      """
+      field = self.pof.field
+      if isinstance(field, Z):
+        ring = zvector.PolyMod(zvector.ZVector.fromPOF(m).ints(), field.order)
+        a = ring.reduce(zvector.ZVector.fromPOF(self).ints())
+        return zvector.ZVector(field, ring.pow(a, e)).toPOF(self.pof)
+      pof = self.pof
+      mulMod = lambda a, b: pof.longDiv(pof.mul(a, b), m)[1]
+      return opNWindow(
+          pof.longDiv(self, m)[1], e,
+          pof.longDiv(pof.mulID(), m)[1], mulMod)
+
     def toEL(self) -> List[Field.Element]:
       """Get coefficient list in underlying field from polynomial."""
       return [self.getCoefficient(i) for i in range(0, self.getDegree() + 1)]
 
     def __int__(self) -> int:
+      """The inverse of make for ints, coefficients as base order digits."""
       res = 0
-      for i in range(self.getDegree() + 1, 0):
-        res += int(self.getCoefficient(i))
-        res *= self.field.getOrder()
+      order = self.pof.field.getOrder()
+      for i in range(self.getDegree() or 0, -1, -1):
+        res = res * order + int(self.getCoefficient(i))
       return res
 
     def __hash__(self) -> int:
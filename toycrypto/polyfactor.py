@@ -0,0 +1,386 @@
+"""Irreducibility tests, factorisation and polynomial search over Z(p).
+
+All polynomials are POFs over a Z(p) with p prime. Internally they are
+dense coefficient lists, x^0 first, and everything modulo a polynomial f
+runs on a zvector.PolyMod. Its cached Frobenius powers x^(p^i) mod f are
+shared between the steps of an algorithm:
+
+  * isIrreducible is Rabin's test, f of degree n is irreducible iff f
+    divides x^(p^n) - x but is coprime to x^(p^(n/r)) - x for every
+    prime r dividing n.
+  * randomIrreducible uses Ben-Or's test, checking gcd(f, x^(p^i) - x)
+    for i = 1, 2, ..., n / 2, which rejects most random polynomials after
+    the first few i. The lowest weight searches use it as well.
+  * factor is Cantor-Zassenhaus: square-free, distinct-degree and then
+    equal-degree factorisation.
+
+lowestWeightIrreducible and lowestWeightPrimitive search the polynomials
+with the fewest terms, and cache their results in a JSON file, by default
+in ~/.cache/toycrypto.
+"""
+import json
+import os
+import random
+
+from toycrypto.pof import POF
+from toycrypto.primefields import Z, factorize
+from toycrypto.zvector import PolyMod, ZVector
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_CACHE = os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')),
+    'toycrypto', 'polynomials.json')
+
+
+def _trim(a: List[int]) -> List[int]:
+  while a and not a[-1]:
+    a.pop()
+  return a
+
+
+def _dense(f: POF.Element) -> Tuple[List[int], int]:
+  field = f.pof.field
+  if not isinstance(field, Z):
+    raise ValueError("Only polynomials over Z(p) are supported")
+  return (_trim(ZVector.fromPOF(f).ints()), field.order)
+
+
+def _monic(a: List[int], p: int) -> List[int]:
+  lead = pow(a[-1], -1, p)
+  return [x * lead % p for x in a]
+
+
+def _divmod(a: List[int], b: List[int], p: int) -> Tuple[List[int], List[int]]:
+  r = list(a)
+  n = len(b) - 1
+  if len(r) <= n:
+    return ([], _trim(r))
+  lead = pow(b[-1], -1, p)
+  q = [0] * (len(r) - n)
+  for top in range(len(r) - 1, n - 1, -1):
+    c = r[top] * lead % p
+    if c:
+      q[top - n] = c
+      shift = top - n
+      for (i, y) in enumerate(b):
+        if y:
+          r[shift + i] = (r[shift + i] - c * y) % p
+  return (q, _trim(r[:n]))
+
+
+def _gcd(a: List[int], b: List[int], p: int) -> List[int]:
+  """The monic gcd, [] if both are zero."""
+  (a, b) = (_trim(list(a)), _trim(list(b)))
+  while b:
+    (a, b) = (b, _divmod(a, b, p)[1])
+  return _monic(a, p) if a else a
+
+
+def _minusX(a: Sequence[int], p: int) -> List[int]:
+  a = list(a) + [0] * (2 - len(a))
+  a[1] = (a[1] - 1) % p
+  return _trim(a)
+
+
+def _rabin(ring: PolyMod) -> bool:
+  n = ring.n
+  p = ring.p
+  if _minusX(ring.frobenius(n), p):
+    return False
+  for r in sorted(factorize(n)):
+    if _gcd(_minusX(ring.frobenius(n // r), p), ring.m, p) != [1]:
+      return False
+  return True
+
+
+def _benOr(ring: PolyMod) -> bool:
+  # f has a factor in common with one of several x^(p^i) - x iff it has
+  # one with their product modulo f. So rather than a gcd per i, we take
+  # one per block of i, with blocks doubling in size, as small factors are
+  # the most likely ones.
+  (n, p) = (ring.n, ring.p)
+  i = 1
+  while i <= n // 2:
+    block = ring.reduce(_minusX(ring.frobenius(i), p))
+    for j in range(i + 1, min(2 * i, n // 2 + 1)):
+      block = ring.mul(block, ring.reduce(_minusX(ring.frobenius(j), p)))
+    if _gcd(block, ring.m, p) != [1]:
+      return False
+    i *= 2
+  return True
+
+
+def isIrreducible(f: POF.Element) -> bool:
+  """Rabin's test, see the module documentation."""
+  (a, p) = _dense(f)
+  if len(a) < 2:
+    return False
+  return len(a) == 2 or _rabin(PolyMod(a, p))
+
+
+def isPrimitive(f: POF.Element) -> bool:
+  """Whether f is irreducible and x generates the multiplicative group of
+  Z(p)[x] / f.
+
+  This factors p^n - 1, which gets slow for large p^n without small
+  factors.
+  """
+  if not isIrreducible(f):
+    return False
+  (a, p) = _dense(f)
+  return _primitive(PolyMod(a, p))
+
+
+def _primitive(ring: PolyMod, primes: Optional[List[int]] = None) -> bool:
+  """Whether x has order p^n - 1, given the prime factors of that."""
+  order = ring.p**ring.n - 1
+  x = ring.reduce([0, 1])
+  one = ring.one()
+  return all(
+      ring.pow(x, order // r) != one
+      for r in primes or sorted(factorize(order)))
+
+
+def randomIrreducible(pof: POF,
+                      n: int,
+                      rng: Optional[random.Random] = None) -> POF.Element:
+  """A random monic irreducible polynomial of degree n."""
+  if n < 1:
+    raise ValueError("Degree %d is not positive" % n)
+  rng = rng or random.Random()
+  p = pof.field.order
+  while True:
+    a = [rng.randrange(p) for i in range(n)] + [1]
+    if n == 1 or a[0] and _benOr(PolyMod(a, p)):
+      return pof.make(a)
+
+
+def factor(f: POF.Element) -> List[Tuple[POF.Element, int]]:
+  """The monic irreducible factors of f with their multiplicities.
+
+  The leading coefficient of f is dropped. Factors are sorted by degree
+  and then coefficients.
+  """
+  (a, p) = _dense(f)
+  if not a:
+    raise ValueError("Can't factor zero")
+  rng = random.Random(0)
+  result: Dict[Tuple[int, ...], int] = {}
+  for (g, multiplicity) in _squareFree(_monic(a, p), p):
+    for (h, degree) in _distinctDegree(g, p):
+      for u in _equalDegree(h, degree, p, rng):
+        key = tuple(u)
+        result[key] = result.get(key, 0) + multiplicity
+  return [
+      (f.pof.make(list(k)), m)
+      for (k,
+           m) in sorted(result.items(), key=lambda x: (len(x[0]), x[0][::-1]))
+  ]
+
+
+def _squareFree(a: List[int], p: int) -> List[Tuple[List[int], int]]:
+  """Monic square-free g_i with a = prod g_i^m_i, for a monic a."""
+  if len(a) < 2:
+    return []
+  derivative = _trim([i * c % p for (i, c) in enumerate(a)][1:])
+  if not derivative:
+    # a(x) = b(x^p) = b(x)^p, as c^p = c in Z(p).
+    return [(g, m * p) for (g, m) in _squareFree(a[::p], p)]
+  result = []
+  c = _gcd(a, derivative, p)
+  w = _divmod(a, c, p)[0]
+  i = 1
+  while len(w) > 1:
+    y = _gcd(w, c, p)
+    z = _divmod(w, y, p)[0]
+    if len(z) > 1:
+      result.append((z, i))
+    i += 1
+    (w, c) = (y, _divmod(c, y, p)[0])
+  if len(c) > 1:
+    result += [(g, m * p) for (g, m) in _squareFree(c[::p], p)]
+  return result
+
+
+def _distinctDegree(a: List[int], p: int) -> List[Tuple[List[int], int]]:
+  """Splits the square-free monic a into products of the irreducible
+  factors of the same degree, with their degree."""
+  ring = PolyMod(a, p)
+  result = []
+  rest = a
+  i = 1
+  while len(rest) - 1 >= 2 * i:
+    g = _gcd(rest, _minusX(ring.frobenius(i), p), p)
+    if len(g) > 1:
+      result.append((g, i))
+      rest = _divmod(rest, g, p)[0]
+    i += 1
+  if len(rest) > 1:
+    result.append((rest, len(rest) - 1))
+  return result
+
+
+def _equalDegree(a: List[int], d: int, p: int,
+                 rng: random.Random) -> List[List[int]]:
+  """The irreducible factors of a, all of which have degree d."""
+  n = len(a) - 1
+  if n == d:
+    return [a]
+  ring = PolyMod(a, p)
+  factors = [a]
+  while len(factors) < n // d:
+    h = ring.reduce([rng.randrange(p) for i in range(n)])
+    if p == 2:
+      # The trace h + h^2 + ... + h^(2^(d-1)) is 0 or 1 on every factor.
+      g = h
+      power = h
+      for i in range(d - 1):
+        power = ring.mul(power, power)
+        g = [x ^ y for (x, y) in zip(g, power)]
+    else:
+      # h^((p^d - 1) / 2) is +-1 on every factor not dividing h.
+      g = ring.pow(h, (p**d - 1) // 2)
+      g[0] = (g[0] - 1) % p
+    g = _trim(g)
+    split = []
+    for u in factors:
+      common = _gcd(g, u, p) if len(u) - 1 > d else [1]
+      if 1 < len(common) < len(u):
+        split += [common, _monic(_divmod(u, common, p)[0], p)]
+      else:
+        split.append(u)
+    factors = split
+  return factors
+
+
+def _candidates(n: int, p: int, primitive: bool) -> Iterator[List[int]]:
+  """Monic polynomials of degree n with a non-zero constant term, by
+  increasing weight, then by their middle exponents in colex order, i.e.
+  with the highest one as small as possible, then by coefficients."""
+  for weight in range(2 if _binomials(n, p, primitive) else 3, n + 2):
+    for middle in _colex(weight - 2, 1, n):
+      exponents = (0,) + middle
+      for coefficients in _nonZeroTuples(len(exponents), p):
+        a = [0] * n + [1]
+        for (e, c) in zip(exponents, coefficients):
+          a[e] = c
+        yield a
+
+
+def _binomials(n: int, p: int, primitive: bool) -> bool:
+  """Whether some x^n - c is irreducible, or primitive, over Z(p).
+
+  Skipping them otherwise matters for large p, where there are too many
+  to try. x^n - c is irreducible for some c iff every prime factor of n
+  divides p - 1, and 4 divides p - 1 if it divides n. It is never
+  primitive for n > 1, as x^n = c has an order dividing p - 1.
+  """
+  if n == 1:
+    return True
+  if primitive:
+    return False
+  return (all(not (p - 1) % r for r in sorted(factorize(n))) and
+          (n % 4 or not (p - 1) % 4))
+
+
+def _nonZeroTuples(k: int, p: int) -> Iterator[Tuple[int, ...]]:
+  """All k-tuples over 1, ..., p - 1, lazily, as p may be huge."""
+  for t in range((p - 1)**k):
+    digits = []
+    for i in range(k):
+      (t, d) = divmod(t, p - 1)
+      digits.append(d + 1)
+    yield tuple(digits)
+
+
+def _colex(k: int, low: int, high: int) -> Iterator[Tuple[int, ...]]:
+  """k-subsets of range(low, high) as sorted tuples, in colex order."""
+  if not k:
+    yield ()
+    return
+  for top in range(low + k - 1, high):
+    for rest in _colex(k - 1, low, top):
+      yield rest + (top,)
+
+
+def _hasRoot(a: Sequence[int], p: int) -> bool:
+  """Whether a has a root in Z(p), by trying all of them.
+
+  Over Z(2) this rejects all candidates with an even number of terms,
+  which would otherwise take as long as the others to rule out.
+  """
+  terms = [(e, c) for (e, c) in enumerate(a) if c]
+  return any(
+      not sum(c * pow(x, e, p) for (e, c) in terms) % p for x in range(p))
+
+
+def _loadCache(path: Optional[str]) -> Dict[str, Any]:
+  if path is None:
+    return {}
+  try:
+    with open(path) as f:
+      return json.load(f)
+  except (OSError, ValueError):
+    return {}
+
+
+def _storeCache(path: Optional[str], key: str, value: Any) -> None:
+  """Adds key to the cache file. The cache is best effort, so write errors
+  are ignored."""
+  if path is None:
+    return
+  cache = _loadCache(path)
+  cache[key] = value
+  try:
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmp, 'w') as f:
+      json.dump(cache, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+  except OSError:
+    pass
+
+
+def _search(field: Z, n: int, primitive: bool,
+            cache: Optional[str]) -> POF.Element:
+  if n < 1:
+    raise ValueError("Degree %d is not positive" % n)
+  p = field.order
+  key = '%s/%d/%d' % ('primitive' if primitive else 'irreducible', p, n)
+  pof = POF(field)
+  cached = _loadCache(cache).get(key)
+  if cached is not None:
+    return pof.make({int(e): c for (e, c) in cached.items()})
+  primes = sorted(factorize(p**n - 1)) if primitive else []
+  for a in _candidates(n, p, primitive):
+    if n == 1 and not primitive:
+      break
+    if n > 1 and p <= 64 and _hasRoot(a, p):
+      continue
+    ring = PolyMod(a, p)
+    if (n == 1 or _benOr(ring)) and (not primitive or _primitive(ring, primes)):
+      break
+  else:
+    raise AssertionError("There are irreducible polynomials of any degree")
+  _storeCache(cache, key, {str(e): c for (e, c) in enumerate(a) if c})
+  return pof.make(a)
+
+
+def lowestWeightIrreducible(field: Z,
+                            n: int,
+                            cache: Optional[str] = DEFAULT_CACHE
+                           ) -> POF.Element:
+  """The first irreducible monic polynomial of degree n over field, in the
+  order of _candidates, like x^8 + x^4 + x^3 + x + 1 for Z(2) and 8.
+
+  cache is the path of the JSON cache file, or None to always search.
+  """
+  return _search(field, n, False, cache)
+
+
+def lowestWeightPrimitive(field: Z,
+                          n: int,
+                          cache: Optional[str] = DEFAULT_CACHE) -> POF.Element:
+  """Like lowestWeightIrreducible, but for primitive polynomials, such as
+  the x^8 + x^4 + x^3 + x^2 + 1 of Reed-Solomon codes."""
+  return _search(field, n, True, cache)
@@ -1,13 +1,111 @@
+import math
+import numbers
+import os
+import random
+
 from toycrypto.base import *
-from typing import Any, Union, Tuple
+from typing import Any, Dict, Optional, Union, Tuple
+
+try:
+  import gmpy2
+except ImportError:
+  gmpy2 = None
+
+
+class PythonBackend(object):
+  """Big integer arithmetic on Python ints.
+
+  A backend supplies the number type Z stores values in, and the operations
+  whose cost grows fastest with the operand size: modular exponentiation
+  and inversion, and the Jacobi symbol. Numbers of the backend's type mix
+  freely with Python ints.
+  """
+  name = 'python'
+
+  def number(self, n: int) -> Any:
+    return n
+
+  def pow(self, a: Any, e: int, n: Any) -> Any:
+    return pow(a, e, n)
+
+  def invert(self, a: Any, n: Any) -> Any:
+    try:
+      return pow(a, -1, n)
+    except ValueError:
+      raise ZeroDivisionError("%d is not invertible modulo %d" % (a, n))
+
+  def jacobi(self, a: Any, n: Any) -> int:
+    result = 1
+    while a:
+      # Pull out factors of two: (2/n) = -1 iff n = 3, 5 mod 8
+      while a % 2 == 0:
+        a //= 2
+        if n % 8 in (3, 5):
+          result = -result
+      # Reciprocity: (a/n) = -(n/a) iff a = n = 3 mod 4
+      a, n = n, a
+      if a % 4 == 3 and n % 4 == 3:
+        result = -result
+      a %= n
+    return result if n == 1 else 0
+
+
+class GMPBackend(PythonBackend):
+  """Big integer arithmetic on gmpy2's mpz, several times faster than
+  Python ints from about a thousand bits on."""
+  name = 'gmp'
+
+  def __init__(self) -> None:
+    if gmpy2 is None:
+      raise ImportError("GMPBackend needs gmpy2")
+
+  def number(self, n: int) -> Any:
+    return gmpy2.mpz(n)
+
+  def pow(self, a: Any, e: int, n: Any) -> Any:
+    return gmpy2.powmod(a, e, n)
+
+  def invert(self, a: Any, n: Any) -> Any:
+    return gmpy2.invert(a, n)
+
+  def jacobi(self, a: Any, n: Any) -> int:
+    return int(gmpy2.jacobi(a, n))
+
+
+BACKENDS: Dict[str, PythonBackend] = {'python': PythonBackend()}
+if gmpy2 is not None:
+  BACKENDS['gmp'] = GMPBackend()
+
+# Used by every Z without an explicit backend. TOYCRYPTO_BACKEND overrides
+# it, e.g. to run the test suite on the pure Python backend with gmpy2
+# installed.
+DEFAULT_BACKEND = BACKENDS[os.environ.get(
+    'TOYCRYPTO_BACKEND', 'gmp' if gmpy2 is not None else 'python')]
 
 
 class Z(Field['Z.Element']):
-  """Implementation of the mathemical set Z/nZ."""
+  """Implementation of the mathemical set Z/nZ.
 
-  def __init__(self, order: int):
+  Values are stored in the number type of backend, which may be a backend
+  object or a name from BACKENDS, and defaults to DEFAULT_BACKEND. Sums,
+  products and reductions use the number type's own operators, as a method
+  call would cost more than the arithmetic at typical sizes; powers,
+  inverses and Jacobi symbols go through the backend. Fields of the same
+  order but different backends are different fields.
+  """
+
+  def __init__(self,
+               order: int,
+               backend: Union[None, str, PythonBackend] = None):
     super(Z, self).__init__()
+    if backend is None:
+      backend = DEFAULT_BACKEND
+    elif isinstance(backend, str):
+      backend = BACKENDS[backend]
+    self.backend = backend
     self.order = order
+    # The order in the backend's number type, to reduce values with.
+    self.modulus = backend.number(order)
 
   def getOrder(self) -> int:
     return self.order
@@ -36,16 +134,20 @@ class Z(Field['Z.Element']):
   def __repr__(self) -> str:
     return "Z(%d)" % self.order
 
-  def make(self, i: Union['Z.Element', int]) -> 'Z.Element':
+  def make(self, i: Union['Z.Element', int, Any]) -> 'Z.Element':
     if type(i) == self.Element:
       assert isinstance(i, Z.Element)
-      # Copy and return new element in my field
-      return self.Element(i.value, self)
+      # Copy into my field, converting the value if it has another backend.
+      i = i.value
 
-    if type(i) == int:
-      assert isinstance(i, int)
+    if type(i) == int or type(i) == type(self.modulus):
       return self.Element(i, self)
 
+    # Numbers of other backends, e.g. the values of elements of a Z with
+    # another backend. bool is an Integral, too, but not a number here.
+    if isinstance(i, numbers.Integral) and not isinstance(i, bool):
+      return self.Element(int(i), self)
+
     raise ValueError("Unknown object type to make from: %s" % type(i))
 
   def enum(self, i: int) -> Tuple['Z.Element', int]:
@@ -56,19 +158,24 @@ class Z(Field['Z.Element']):
       return False
 
     assert isinstance(a, Z)
-    return self.order == a.order
+    return self.order == a.order and self.backend.name == a.backend.name
 
   def __hash__(self) -> int:
-    return hash(self.order)
+    return hash((self.order, self.backend.name))
+
+  def __reduce__(self) -> Tuple[Any, ...]:
+    if self.backend is DEFAULT_BACKEND:
+      return (interned, (type(self), self.order))
+    return (interned, (type(self), self.order, self.backend.name))
 
   class Element(Field.Element):
 
     def __init__(self, value: int, field: 'Z'):
       super(Z.Element, self).__init__(field)
       self.z_field = field
-      if type(value) != int:
+      if type(value) != int and type(value) != type(field.modulus):
         raise ValueError("value must be an int")
-      self.value = value % field.order
+      self.value = value % field.modulus
 
     def __str__(self) -> str:
       return "%(v)d" % {'v': self.value, 's': self.z_field}
@@ -77,16 +184,22 @@ class Z(Field['Z.Element']):
       return "%(v)x" % {'v': self.value, 's': self.z_field}
 
     def setValue(self, value: int) -> 'Z.Element':
-      self.value = value % self.z_field.order
+      self.value = value % self.z_field.modulus
       return self
 
     def plusInv(self) -> 'Z.Element':
       return Z.Element(self.z_field.order - self.value, self.z_field)
 
     def mulInv(self) -> 'Z.Element':
-      r = self.scalarPow(self.z_field.order - 2)
-      assert isinstance(r, Z.Element)
-      return r
+      field = self.z_field
+      return Z.Element(field.backend.invert(self.value, field.modulus), field)
+
+    def scalarPow(self, scalar: int) -> 'Z.Element':
+      if scalar < 0:
+        raise ValueError("Scalar %d can't be negative" % scalar)
+      field = self.z_field
+      return Z.Element(field.backend.pow(self.value, scalar, field.modulus),
+                       field)
 
     def clone(self) -> 'Z.Element':
       return self.z_field.Element(self.value, self.z_field)
@@ -98,7 +211,10 @@ class Z(Field['Z.Element']):
       return self.z_field == a.z_field and self.value == a.value
 
     def __int__(self) -> int:
-      return self.value
+      return int(self.value)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+      return (type(self), (int(self.value), self.z_field))
 
     def sqrt(self) -> Union[None, 'Z.Element']:
       if self.z_field.order % 4 == 3:
@@ -110,9 +226,156 @@ class Z(Field['Z.Element']):
           return s
         else:
           return None
-      else:
-        # Implement https://en.wikipedia.org/wiki/Tonelli%E2%80%93Shanks_algorithm here.
-        raise ValueError("Unsupport sqrt")
+      return self._tonelliShanks()
+
+    def _tonelliShanks(self) -> Union[None, 'Z.Element']:
+      """Square root for a prime order p = 1 mod 4.
+
+      With p - 1 = q 2^s for an odd q, r = x^((q+1)/2) is a root of x t for
+      t = x^q, whose order divides 2^s. Multiplying r by powers of c^q for
+      a non-square c, whose order is exactly 2^s, halves t's order until
+      t = 1.
+      """
+      field = self.z_field
+      p = field.order
+      x = int(self.value)
+      if not x:
+        return self
+      if self.jacobi() != 1:
+        return None
+      (q, s) = (p - 1, 0)
+      while not q % 2:
+        (q, s) = (q // 2, s + 1)
+      c = 2
+      while field.backend.jacobi(c, field.modulus) != -1:
+        c += 1
+      (m, z) = (s, pow(c, q, p))
+      (t, r) = (pow(x, q, p), pow(x, (q + 1) // 2, p))
+      while t != 1:
+        # The least i with t^(2^i) = 1.
+        (i, u) = (0, t)
+        while u != 1:
+          (i, u) = (i + 1, u * u % p)
+        b = pow(z, 1 << (m - i - 1), p)
+        (m, z) = (i, b * b % p)
+        (t, r) = (t * z % p, r * b % p)
+      return Z.Element(r, field)
+
+    def jacobi(self) -> int:
+      """Jacobi symbol (value / order) for odd orders.
+
+      For a prime order this is the Legendre symbol: 1 for non-zero
+      squares, -1 for non-squares and 0 for zero. Unlike Euler's criterion
+      it needs no exponentiation. We use quadratic reciprocity to swap
+      numerator and denominator and reduce both like in Euclid's algorithm.
+      """
+      n = self.z_field.order
+      if n % 2 == 0:
+        raise ValueError("Jacobi symbol needs an odd order")
+      return self.z_field.backend.jacobi(self.value, self.z_field.modulus)
 
     def __hash__(self) -> int:
       return hash((self.z_field, self.value))
+
+
+SMALL_PRIMES = [
+    p for p in range(2, 1000) if all(p % d for d in range(2,
+                                                          int(p**0.5) + 1))
+]
+
+
+def isProbablePrime(n: int, rounds: int = 32) -> bool:
+  """Miller-Rabin primality test.
+
+  Write n - 1 = d 2^s with d odd. For a prime n and any base a, the
+  sequence a^d, a^2d, ..., a^(2^s d) either starts with 1 or hits -1 before
+  reaching a^(n-1) = 1, as 1 has no other square roots modulo a prime. A
+  composite n fails this for at least 3/4 of all bases.
+  """
+  if n < 2:
+    return False
+  for p in SMALL_PRIMES:
+    if n % p == 0:
+      return n == p
+
+  d = n - 1
+  s = 0
+  while d % 2 == 0:
+    d //= 2
+    s += 1
+
+  # The first twelve primes as bases are deterministic below 3.3 * 10^24,
+  # for larger n we add random bases.
+  bases = list(SMALL_PRIMES[:12])
+  bases += [random.randrange(2, n - 1) for i in range(max(0, rounds - 12))]
+  for a in bases:
+    x = pow(a, d, n)
+    if x == 1 or x == n - 1:
+      continue
+    for i in range(s - 1):
+      x = x * x % n
+      if x == n - 1:
+        break
+    else:
+      return False
+  return True
+
+
+def factorize(n: int) -> Dict[int, int]:
+  """Factors n into a dictionary of primes and their multiplicities.
+
+  Small factors are found by trial division, the remaining cofactor is split
+  with Pollard-Brent rho until all parts are prime.
+  """
+  if n < 1:
+    raise ValueError("Can only factor positive integers, got %d" % n)
+  factors: Dict[int, int] = {}
+  for p in SMALL_PRIMES:
+    while n % p == 0:
+      factors[p] = factors.get(p, 0) + 1
+      n //= p
+
+  todo = [n] if n > 1 else []
+  while todo:
+    m = todo.pop()
+    if isProbablePrime(m):
+      factors[m] = factors.get(m, 0) + 1
+    else:
+      d = _pollardBrent(m)
+      todo += [d, m // d]
+  return factors
+
+
+def _pollardBrent(n: int) -> int:
+  """Finds a non-trivial factor of the composite n."""
+  if n % 2 == 0:
+    return 2
+  while True:
+    # Iterate x -> x^2 + c and look for a cycle modulo an unknown factor.
+    # Brent's variant compares against power-of-two checkpoints and batches
+    # the gcds by multiplying m differences together.
+    c = random.randrange(1, n)
+    y = random.randrange(0, n)
+    m = 128
+    g = r = q = 1
+    while g == 1:
+      x = y
+      for i in range(r):
+        y = (y * y + c) % n
+      k = 0
+      while k < r and g == 1:
+        ys = y
+        for i in range(min(m, r - k)):
+          y = (y * y + c) % n
+          q = q * abs(x - y) % n
+        g = math.gcd(q, n)
+        k += m
+      r *= 2
+    if g == n:
+      # The batch overshot, redo it one step at a time.
+      g = 1
+      while g == 1:
+        ys = (ys * ys + c) % n
+        g = math.gcd(abs(x - ys), n)
+    if g != n:
+      return g
@@ -0,0 +1,457 @@
+"""Systematic Reed-Solomon erasure and error correction over GF(2^8).
+
+A ReedSolomon(k, m) code turns k data shards into m parity shards of the
+same length, such that any m lost shards can be rebuilt, or up to m / 2
+corrupted ones corrected. Byte j of every shard forms one codeword c of
+length n = k + m, with c_i the coefficient of x^(n-1-i), and the
+generator polynomial having the roots 1, a, ..., a^(m-1) for a primitive a.
+
+The field is defined by a GFPOF(Z(2), rp) with rp of degree 8, but GFPOF
+is only used to build log and exp tables once. Everything that touches
+whole shards is a linear combination of shards, computed by the vectors
+backend: 'bytes' multiplies with bytes.translate and adds by XOR on ints,
+and 'numpy', if installed, does the same on uint8 arrays. Only codewords
+with errors at unknown positions go through the scalar Berlekamp-Massey,
+Chien search and Forney decoder, one byte column at a time.
+"""
+from toycrypto.gfpof import GFPOF
+from toycrypto.pof import POF
+from toycrypto.primefields import Z
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence, Tuple
+
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
+# x^8 + x^4 + x^3 + x^2 + 1, the usual Reed-Solomon polynomial, for which x
+# is primitive.
+DEFAULT_RP = 0x11d
+
+
+class Tables(object):
+  """Log and exp tables of GF(2^8) as defined by a GFPOF.
+
+  Field elements are bytes, bit i being the coefficient of x^i.
+  """
+
+  def __init__(self, field: GFPOF):
+    if field.rp.getDegree() != 8 or field.field.order != 2:
+      raise ValueError("Need a GF(2^8), got %s" % field.rp)
+    self.field = field
+    for g in range(2, 256):
+      exp = self._powers(g)
+      if len(exp) == 255:
+        break
+    else:
+      raise ValueError("%s is not irreducible" % field.rp)
+    self.generator = g
+    # Twice the length, so that exp[log[a] + log[b]] needs no reduction.
+    self.exp = exp + exp
+    self.log = [0] * 256
+    for (i, v) in enumerate(exp):
+      self.log[v] = i
+    self._mulTables: List[Optional[bytes]] = [None] * 256
+
+  def fromByte(self, b: int) -> GFPOF.Element:
+    return self.field.make({i: 1 for i in range(8) if b >> i & 1})
+
+  def toByte(self, e: GFPOF.Element) -> int:
+    return sum(int(e.getCoefficient(i)) << i for i in e.nonZeroCoefficients())
+
+  def _powers(self, g: int) -> List[int]:
+    """g^0, g^1, ... up to before the first repetition of one."""
+    ge = self.fromByte(g)
+    powers = [1]
+    e = self.field.mul(ge, self.fromByte(1))
+    while self.toByte(e) != 1:
+      if len(powers) > 255:
+        raise ValueError("%s is not irreducible" % self.field.rp)
+      powers.append(self.toByte(e))
+      e = self.field.mul(e, ge)
+    return powers
+
+  def mul(self, a: int, b: int) -> int:
+    if not a or not b:
+      return 0
+    return self.exp[self.log[a] + self.log[b]]
+
+  def div(self, a: int, b: int) -> int:
+    if not b:
+      raise ZeroDivisionError("Division by zero in GF(2^8)")
+    if not a:
+      return 0
+    return self.exp[self.log[a] + 255 - self.log[b]]
+
+  def pow(self, e: int) -> int:
+    """The generator to the e-th power."""
+    return self.exp[e % 255]
+
+  def mulTable(self, c: int) -> bytes:
+    """The 256 products with c, as a table for bytes.translate."""
+    table = self._mulTables[c]
+    if table is None:
+      table = self._mulTables[c] = bytes(self.mul(c, b) for b in range(256))
+    return table
+
+
+_TABLES: Dict[int, Tables] = {}
+
+
+def tables(rp: int = DEFAULT_RP) -> Tables:
+  """Tables of GFPOF(Z(2), rp), with rp given as bits, shared per rp."""
+  if rp not in _TABLES:
+    z2 = Z(2)
+    _TABLES[rp] = Tables(GFPOF(z2, POF(z2).make(rp)))
+  return _TABLES[rp]
+
+
+class ByteVectors(object):
+  """Linear combinations of equally long bytes, without any dependencies."""
+
+  name = 'bytes'
+
+  def __init__(self, tables: Tables):
+    self.tables = tables
+
+  def combine(self, terms: Sequence[Tuple[int, bytes]], size: int) -> bytes:
+    """The sum of c v over the (c, v) in terms."""
+    acc = 0
+    for (c, v) in terms:
+      if c == 1:
+        acc ^= int.from_bytes(v, 'little')
+      elif c:
+        acc ^= int.from_bytes(v.translate(self.tables.mulTable(c)), 'little')
+    return acc.to_bytes(size, 'little')
+
+  def nonZero(self, vectors: Sequence[bytes]) -> List[int]:
+    """The positions at which any of vectors is non-zero."""
+    acc = 0
+    for v in vectors:
+      acc |= int.from_bytes(v, 'little')
+    if not acc:
+      return []
+    return [
+        i for (i, b) in enumerate(acc.to_bytes(len(vectors[0]), 'little')) if b
+    ]
+
+
+class NumPyVectors(object):
+  """Linear combinations via a 256x256 product table lookup in NumPy."""
+
+  name = 'numpy'
+
+  def __init__(self, tables: Tables):
+    if numpy is None:
+      raise ImportError("NumPyVectors needs numpy")
+    self.tables = tables
+    self.products = numpy.array([list(tables.mulTable(c)) for c in range(256)],
+                                dtype=numpy.uint8)
+
+  def combine(self, terms: Sequence[Tuple[int, bytes]], size: int) -> bytes:
+    acc = numpy.zeros(size, dtype=numpy.uint8)
+    for (c, v) in terms:
+      if c == 1:
+        acc ^= numpy.frombuffer(v, dtype=numpy.uint8)
+      elif c:
+        acc ^= self.products[c][numpy.frombuffer(v, dtype=numpy.uint8)]
+    return acc.tobytes()
+
+  def nonZero(self, vectors: Sequence[bytes]) -> List[int]:
+    acc = numpy.zeros(len(vectors[0]), dtype=numpy.uint8)
+    for v in vectors:
+      acc |= numpy.frombuffer(v, dtype=numpy.uint8)
+    return numpy.flatnonzero(acc).tolist()
+
+
+VECTORS: Dict[str, Any] = {'bytes': ByteVectors}
+if numpy is not None:
+  VECTORS['numpy'] = NumPyVectors
+
+DEFAULT_VECTORS = 'numpy' if numpy is not None else 'bytes'
+
+
+class ReedSolomon(object):
+  """Code with k data and m parity shards, see the module documentation.
+
+  vectors is a name from VECTORS and defaults to DEFAULT_VECTORS.
+  """
+
+  def __init__(self,
+               k: int,
+               m: int,
+               rp: int = DEFAULT_RP,
+               vectors: Optional[str] = None):
+    if k < 1 or m < 1 or k + m > 255:
+      raise ValueError("Need k, m >= 1 and k + m <= 255")
+    self.k = k
+    self.m = m
+    self.n = k + m
+    self.tables = tables(rp)
+    self.vectors = VECTORS[vectors or DEFAULT_VECTORS](self.tables)
+    t = self.tables
+    # The generator polynomial, highest coefficient first.
+    g = [1]
+    for i in range(m):
+      root = t.pow(i)
+      g = [a ^ t.mul(root, b) for (a, b) in zip(g + [0], [0] + g)]
+    self.generator = g
+    # parity[j][i] is the coefficient of data shard i in parity shard j,
+    # obtained by encoding the unit vectors.
+    columns = [
+        self._encodeSymbols([int(i == j) for j in range(k)]) for i in range(k)
+    ]
+    self.parity = [[c[j] for c in columns] for j in range(m)]
+    self._erasures: Dict[Tuple[int, ...], List[List[int]]] = {}
+
+  def _encodeSymbols(self, data: Sequence[int]) -> List[int]:
+    """The parity symbols of one codeword, by polynomial division."""
+    t = self.tables
+    r = [0] * self.m
+    for d in data:
+      feedback = d ^ r[0]
+      r = r[1:] + [0]
+      if feedback:
+        for j in range(self.m):
+          r[j] ^= t.mul(feedback, self.generator[j + 1])
+    return r
+
+  def encode(self, data: Sequence[bytes]) -> List[bytes]:
+    """The m parity shards for the k equally long data shards."""
+    if len(data) != self.k:
+      raise ValueError("Expected %d data shards, got %d" % (self.k, len(data)))
+    size = len(data[0])
+    if any(len(d) != size for d in data):
+      raise ValueError("Shards differ in length")
+    return [
+        self.vectors.combine(list(zip(row, data)), size) for row in self.parity
+    ]
+
+  def _syndromes(self, shards: Sequence[bytes], size: int) -> List[bytes]:
+    t = self.tables
+    return [
+        self.vectors.combine([(t.pow(i * (self.n - 1 - j)), s)
+                              for (j, s) in enumerate(shards)], size)
+        for i in range(self.m)
+    ]
+
+  def _erasureCoefficients(self, erasures: Tuple[int, ...]) -> List[List[int]]:
+    """Row r holds the coefficients of all shards in shard erasures[r].
+
+    Forney's formula over the erasure locator gives each erased symbol as a
+    combination of the syndromes, which are themselves combinations of the
+    shards, with the erased ones taken as zero.
+    """
+    if erasures not in self._erasures:
+      t = self.tables
+      locator = self._locator(erasures)
+      rows = []
+      for e in erasures:
+        # coefficient of syndrome i in shard e.
+        perSyndrome = self._forneyCoefficients(locator, self.n - 1 - e)
+        rows.append([
+            0 if j in erasures else
+            _dot(t, perSyndrome,
+                 [t.pow(i * (self.n - 1 - j))
+                  for i in range(self.m)])
+            for j in range(self.n)
+        ])
+      self._erasures[erasures] = rows
+    return self._erasures[erasures]
+
+  def _locator(self, erasures: Sequence[int]) -> List[int]:
+    """prod (1 - X_e x) over the erasures, lowest coefficient first."""
+    t = self.tables
+    locator = [1]
+    for e in erasures:
+      x = t.pow(self.n - 1 - e)
+      locator = [
+          a ^ t.mul(x, b) for (a, b) in zip(locator + [0], [0] + locator)
+      ]
+    return locator
+
+  def _forneyCoefficients(self, locator: List[int], power: int) -> List[int]:
+    """c with e = sum c_i S_i for the error at X = a^power.
+
+    Forney gives e = X Omega(X^-1) / Lambda'(X^-1), with Omega(x) =
+    S(x) Lambda(x) mod x^m, which is linear in the syndromes.
+    """
+    t = self.tables
+    # The formal derivative only keeps the odd powers in characteristic 2.
+    derivative = 0
+    for i in range(1, len(locator), 2):
+      derivative ^= t.mul(locator[i], t.pow(-power * (i - 1)))
+    scale = t.div(t.pow(power), derivative)
+    # Omega_l = sum_{i <= l} Lambda_{l-i} S_i, evaluated at X^-1.
+    coefficients = []
+    for i in range(self.m):
+      c = 0
+      for l in range(i, min(self.m, i + len(locator))):
+        c ^= t.mul(locator[l - i], t.pow(-power * l))
+      coefficients.append(t.mul(scale, c))
+    return coefficients
+
+  def decode(self,
+             shards: Sequence[Optional[bytes]],
+             errors: bool = True) -> List[bytes]:
+    """The k data shards from n shards, with None for the lost ones.
+
+    Up to m lost shards are rebuilt from the others. Unless errors is off,
+    the result is checked, and byte columns that don't form a codeword are
+    corrected, which works as long as twice the errors plus the lost shards
+    are at most m. Raises ValueError when that fails.
+    """
+    if len(shards) != self.n:
+      raise ValueError("Expected %d shards, got %d" % (self.n, len(shards)))
+    erasures = tuple(i for (i, s) in enumerate(shards) if s is None)
+    if len(erasures) > self.m:
+      raise ValueError("%d shards lost, only %d can be rebuilt" %
+                       (len(erasures), self.m))
+    size = len(next(s for s in shards if s is not None))
+    if any(s is not None and len(s) != size for s in shards):
+      raise ValueError("Shards differ in length")
+    zero = bytes(size)
+    present = [zero if s is None else s for s in shards]
+    repaired = list(present)
+    if erasures:
+      rows = self._erasureCoefficients(erasures)
+      for (e, row) in zip(erasures, rows):
+        if errors or e < self.k:
+          repaired[e] = self.vectors.combine(list(zip(row, present)), size)
+    if not errors:
+      return repaired[:self.k]
+
+    columns = self.vectors.nonZero(self._syndromes(repaired, size))
+    if columns:
+      data = [bytearray(s) for s in repaired[:self.k]]
+      for j in columns:
+        symbols = self.decodeSymbols([s[j] for s in present], erasures)
+        for i in range(self.k):
+          data[i][j] = symbols[i]
+      repaired[:self.k] = [bytes(d) for d in data]
+    return repaired[:self.k]
+
+  def decodeSymbols(
+      self, codeword: Sequence[int], erasures: Sequence[int] = ()) -> List[int]:
+    """Corrects one codeword given as n ints, erased symbols being ignored.
+
+    Berlekamp-Massey, started from the erasure locator, finds the errata
+    locator, the Chien search its roots, and Forney the values.
+    """
+    t = self.tables
+    n = self.n
+    c = list(codeword)
+    for e in erasures:
+      c[e] = 0
+    syndromes = [_evaluate(t, c, t.pow(i)) for i in range(self.m)]
+    if not any(syndromes):
+      return c
+
+    # Berlekamp-Massey with erasures, polynomials lowest coefficient first.
+    locator = self._locator(erasures)
+    previous = list(locator)
+    length = len(erasures)
+    for r in range(len(erasures), self.m):
+      delta = 0
+      for i in range(min(len(locator), r + 1)):
+        delta ^= t.mul(locator[i], syndromes[r - i])
+      previous = [0] + previous
+      if delta:
+        update = _addScaled(t, locator, delta, previous)
+        if 2 * length <= r + len(erasures):
+          previous = [t.div(a, delta) for a in locator]
+          length = r + 1 + len(erasures) - length
+        locator = update
+    while len(locator) > 1 and not locator[-1]:
+      locator.pop()
+
+    # Chien search: position i is in error iff Lambda(X_i^-1) = 0.
+    positions = [
+        i for i in range(n) if not _evaluateLow(t, locator, t.pow(-(n - 1 - i)))
+    ]
+    if len(
+        positions) != len(locator) - 1 or 2 * length - len(erasures) > self.m:
+      raise ValueError("Too many errors to correct")
+
+    for i in positions:
+      coefficients = self._forneyCoefficients(locator, n - 1 - i)
+      c[i] ^= _dot(t, coefficients, syndromes)
+    if any(_evaluate(t, c, t.pow(i)) for i in range(self.m)):
+      raise ValueError("Too many errors to correct")
+    return c
+
+  def encodeBlock(self, data: bytes) -> bytes:
+    """Encodes k bytes to an n-byte codeword, data first."""
+    return data + bytes(self._encodeSymbols(data))
+
+  def decodeBlock(self, codeword: bytes, erasures: Sequence[int] = ()) -> bytes:
+    """The k data bytes of a possibly corrupted n-byte codeword."""
+    return bytes(self.decodeSymbols(codeword, erasures)[:self.k])
+
+  def encodeStream(self, src: BinaryIO, shards: Sequence[BinaryIO],
+                   shardSize: int) -> int:
+    """Splits src into stripes of k shardSize-byte shards, and writes each
+    of the n shards of every stripe to the corresponding file in shards.
+
+    The last stripe is padded with zeros. Returns the number of bytes read.
+    """
+    if len(shards) != self.n:
+      raise ValueError("Expected %d shard files, got %d" %
+                       (self.n, len(shards)))
+    total = 0
+    while True:
+      stripe = src.read(self.k * shardSize)
+      if not stripe:
+        return total
+      total += len(stripe)
+      stripe += bytes(self.k * shardSize - len(stripe))
+      data = [stripe[i * shardSize:(i + 1) * shardSize] for i in range(self.k)]
+      for (f, s) in zip(shards, data + self.encode(data)):
+        f.write(s)
+
+  def decodeStream(self,
+                   shards: Sequence[Optional[BinaryIO]],
+                   dst: BinaryIO,
+                   length: int,
+                   shardSize: int,
+                   errors: bool = True) -> None:
+    """Writes length bytes encoded by encodeStream to dst, from the shard
+    files, with None for lost ones."""
+    if len(shards) != self.n:
+      raise ValueError("Expected %d shard files, got %d" %
+                       (self.n, len(shards)))
+    while length > 0:
+      stripe = [f and f.read(shardSize) for f in shards]
+      if any(s is not None and len(s) != shardSize for s in stripe):
+        raise ValueError("Shard files end early")
+      data = b''.join(self.decode(stripe, errors))
+      dst.write(data[:length])
+      length -= len(data)
+
+
+def _evaluate(t: Tables, poly: Sequence[int], x: int) -> int:
+  """Horner's scheme, highest coefficient first."""
+  y = 0
+  for c in poly:
+    y = t.mul(y, x) ^ c
+  return y
+
+
+def _evaluateLow(t: Tables, poly: Sequence[int], x: int) -> int:
+  """Horner's scheme, lowest coefficient first."""
+  return _evaluate(t, poly[::-1], x)
+
+
+def _addScaled(t: Tables, a: List[int], c: int, b: List[int]) -> List[int]:
+  """a + c b, lowest coefficient first."""
+  size = max(len(a), len(b))
+  a = a + [0] * (size - len(a))
+  b = b + [0] * (size - len(b))
+  return [x ^ t.mul(c, y) for (x, y) in zip(a, b)]
+
+
+def _dot(t: Tables, a: Sequence[int], b: Sequence[int]) -> int:
+  y = 0
+  for (x, z) in zip(a, b):
+    y ^= t.mul(x, z)
+  return y
@@ -0,0 +1,343 @@
+"""Asyncio front-end batching Signature requests onto a process pool.
+
+  async with SignatureService(maxBatch=64, maxDelay=0.005) as service:
+    sig = await service.sign(e, x)
+    ok = await service.verify(sig, pubKey, e)
+
+Pure Python arithmetic holds the GIL, so a thread pool handles requests
+one at a time, and each on its own. SignatureService queues the requests
+and coalesces them into micro-batches, which run in a process pool:
+signatures via Signature.signMany, verifications via
+Signature.verifyBatch, so a batch shares its inversions and its
+multi-scalar multiplication.
+
+A batch is dispatched once it has maxBatch requests, or maxDelay seconds
+after its first request arrived, but only when one of the workers is
+free. Requests arriving while all workers are busy join the next batch,
+so batches grow with the load and stay small when it is light.
+
+Run as a program, the service speaks line-delimited JSON on stdin and
+stdout, or on a local socket, see main and Server.
+"""
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import json
+import os
+import sys
+import time
+
+from toycrypto import wire
+from toycrypto.asymmetric import Signature
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+# A queued request: (operation, arguments, future, enqueue time).
+Request = Tuple[str, Tuple[Any, ...], 'asyncio.Future[Any]', float]
+
+
+def _runBatch(ops: List[Tuple[str, Tuple[Any, ...]]]) -> List[Any]:
+  """Runs a batch in a worker, returning the results in order."""
+  signs = [i for (i, (op, _)) in enumerate(ops) if op == 'sign']
+  verifies = [i for (i, (op, _)) in enumerate(ops) if op == 'verify']
+  results: List[Any] = [None] * len(ops)
+  for (i, sig) in zip(signs, Signature.signMany(ops[i][1] for i in signs)):
+    results[i] = sig
+  for i in verifies:
+    results[i] = True
+  bad = Signature.verifyBatch(ops[i][1] for i in verifies)
+  for j in bad:
+    results[verifies[j]] = False
+  return results
+
+
+class Metrics(object):
+  """Queue depth, batch sizes and latencies of a SignatureService.
+
+  Latencies run from enqueuing a request to its result, and the
+  percentiles are over the last window requests.
+  """
+
+  def __init__(self, window: int = 10000):
+    self.requests = 0
+    self.batches = 0
+    self.maxBatchSize = 0
+    self.queueDepth = 0
+    self.latencies: Deque[float] = collections.deque(maxlen=window)
+
+  def percentile(self, q: float) -> Optional[float]:
+    """The q-th percentile latency in seconds, None before any request."""
+    if not self.latencies:
+      return None
+    ordered = sorted(self.latencies)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+  def toDict(self) -> Dict[str, Any]:
+    return {
+        'queueDepth': self.queueDepth,
+        'requests': self.requests,
+        'batches': self.batches,
+        'meanBatchSize': self.requests / self.batches if self.batches else 0,
+        'maxBatchSize': self.maxBatchSize,
+        'p50': self.percentile(50),
+        'p99': self.percentile(99),
+    }
+
+
+class SignatureService(object):
+  """Micro-batching sign and verify, see the module documentation.
+
+  executor defaults to a ProcessPoolExecutor with workers processes, and
+  workers to the number of CPUs. At most workers batches run at a time.
+  """
+
+  def __init__(self,
+               maxBatch: int = 64,
+               maxDelay: float = 0.005,
+               workers: Optional[int] = None,
+               executor: Optional[concurrent.futures.Executor] = None):
+    if maxBatch < 1:
+      raise ValueError("maxBatch must be positive")
+    self.maxBatch = maxBatch
+    self.maxDelay = maxDelay
+    self.workers = workers or os.cpu_count() or 1
+    self.metrics = Metrics()
+    self._executor = executor
+    self._ownExecutor = executor is None
+    self._queue: Optional['asyncio.Queue[Request]'] = None
+    self._slots: Optional[asyncio.Semaphore] = None
+    self._batcher: Optional['asyncio.Task[None]'] = None
+    self._running: Set['asyncio.Task[None]'] = set()
+
+  async def start(self) -> None:
+    if self._batcher is not None:
+      raise RuntimeError("The service is already running")
+    if self._executor is None:
+      self._executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+    self._queue = asyncio.Queue()
+    self._slots = asyncio.Semaphore(self.workers)
+    self._batcher = asyncio.get_running_loop().create_task(self._batch())
+
+  async def close(self) -> None:
+    """Finishes all queued requests and shuts the executor down."""
+    if self._batcher is None:
+      return
+    assert self._queue is not None
+    await self._queue.join()
+    self._batcher.cancel()
+    try:
+      await self._batcher
+    except asyncio.CancelledError:
+      pass
+    self._batcher = None
+    if self._ownExecutor and self._executor is not None:
+      self._executor.shutdown()
+      self._executor = None
+
+  async def __aenter__(self) -> 'SignatureService':
+    await self.start()
+    return self
+
+  async def __aexit__(self, *args: Any) -> None:
+    await self.close()
+
+  async def sign(self, e: int, x: Any) -> Signature:
+    """Signature.sign(e, x)."""
+    return await self._submit('sign', (e, x))
+
+  async def verify(self, sig: Signature, pubKey: Any, e: int) -> bool:
+    """sig.verify(pubKey, e)."""
+    return await self._submit('verify', (sig, pubKey, e))
+
+  async def _submit(self, op: str, args: Tuple[Any, ...]) -> Any:
+    if self._queue is None or self._batcher is None:
+      raise RuntimeError("The service isn't running")
+    future = asyncio.get_running_loop().create_future()
+    self._queue.put_nowait((op, args, future, time.perf_counter()))
+    self.metrics.queueDepth = self._queue.qsize()
+    return await future
+
+  async def _batch(self) -> None:
+    """Forms batches and hands them to _run, forever."""
+    (queue, slots) = (self._queue, self._slots)
+    assert queue is not None and slots is not None
+    loop = asyncio.get_running_loop()
+    while True:
+      batch = [await queue.get()]
+      deadline = loop.time() + self.maxDelay
+      # While all workers are busy, requests pile up in the queue.
+      await slots.acquire()
+      while len(batch) < self.maxBatch:
+        if not queue.empty():
+          batch.append(queue.get_nowait())
+          continue
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+          break
+        try:
+          batch.append(await asyncio.wait_for(queue.get(), timeout))
+        except asyncio.TimeoutError:
+          break
+      self.metrics.queueDepth = queue.qsize()
+      task = loop.create_task(self._run(batch))
+      self._running.add(task)
+      task.add_done_callback(self._running.discard)
+
+  async def _run(self, batch: List[Request]) -> None:
+    """Runs batch in the executor and resolves its futures."""
+    assert self._queue is not None and self._slots is not None
+    metrics = self.metrics
+    metrics.batches += 1
+    metrics.requests += len(batch)
+    metrics.maxBatchSize = max(metrics.maxBatchSize, len(batch))
+    ops = [(op, args) for (op, args, _, _) in batch]
+    try:
+      outcomes = await self._execute(ops)
+    finally:
+      self._slots.release()
+    now = time.perf_counter()
+    for ((_, _, future, start), (ok, value)) in zip(batch, outcomes):
+      if not future.done():
+        if ok:
+          future.set_result(value)
+        else:
+          future.set_exception(value)
+      metrics.latencies.append(now - start)
+      self._queue.task_done()
+
+  async def _execute(
+      self, ops: List[Tuple[str, Tuple[Any, ...]]]) -> List[Tuple[bool, Any]]:
+    """(True, result) or (False, exception) for every op.
+
+    If the batch fails, e.g. on a malformed request, every op is retried on
+    its own, so that only the bad ones fail.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+      results = await loop.run_in_executor(self._executor, _runBatch, ops)
+      return [(True, r) for r in results]
+    except Exception as e:
+      if len(ops) == 1:
+        return [(False, e)]
+    outcomes = []
+    for op in ops:
+      outcomes.extend(await self._execute([op]))
+    return outcomes
+
+
+class Server(object):
+  """Line-delimited JSON protocol on top of a SignatureService.
+
+  Every request line is an object with an "op" and an "id", which the
+  response echoes, as responses can come out of order:
+
+    {"id": 1, "op": "sign", "e": 42, "x": 7}
+      -> {"id": 1, "signature": "<hex of wire.SignatureCodec>"}
+    {"id": 2, "op": "verify", "signature": "...", "pubKey": "...", "e": 42}
+      -> {"id": 2, "valid": true}
+    {"id": 3, "op": "metrics"}
+      -> {"id": 3, "metrics": {...}}
+
+  pubKey is a hex SEC1 point, see wire.PointCodec. Failed requests get
+  {"id": ..., "error": "<message>"}.
+  """
+
+  def __init__(self, service: SignatureService):
+    self.service = service
+    self.signatures = wire.SignatureCodec()
+    self.points = wire.PointCodec(Signature.Hfield.ec)
+
+  async def handle(self, reader: asyncio.StreamReader,
+                   writer: asyncio.StreamWriter) -> None:
+    """Serves one connection until EOF."""
+    pending = set()
+    while True:
+      line = await reader.readline()
+      if not line:
+        break
+      if line.strip():
+        pending.add(asyncio.ensure_future(self._respond(line, writer)))
+    if pending:
+      await asyncio.wait(pending)
+    writer.close()
+
+  async def _respond(self, line: bytes, writer: asyncio.StreamWriter) -> None:
+    id = None
+    try:
+      request = json.loads(line)
+      id = request.get('id')
+      response = {'id': id}
+      response.update(await self._dispatch(request))
+    except Exception as e:
+      response = {'id': id, 'error': str(e) or type(e).__name__}
+    writer.write(json.dumps(response).encode() + b'\n')
+    await writer.drain()
+
+  async def _dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+    op = request.get('op')
+    if op == 'sign':
+      sig = await self.service.sign(int(request['e']),
+                                    Signature.nF.make(int(request['x'])))
+      return {'signature': self.signatures.encode(sig).hex()}
+    if op == 'verify':
+      sig = self.signatures.decode(bytes.fromhex(request['signature']))
+      pubKey = Signature.Hfield.ec.decode(bytes.fromhex(request['pubKey']))
+      return {
+          'valid': await self.service.verify(sig, pubKey, int(request['e']))
+      }
+    if op == 'metrics':
+      return {'metrics': self.service.metrics.toDict()}
+    raise ValueError("Unknown op %r" % op)
+
+
+class _Stdio(object):
+  """The reader and writer halves Server.handle needs, on stdin and stdout.
+
+  Unlike asyncio's pipe transports this also works for regular files. The
+  blocking reads run in the default executor.
+  """
+
+  async def readline(self) -> bytes:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, sys.stdin.buffer.readline)
+
+  def write(self, data: bytes) -> None:
+    sys.stdout.buffer.write(data)
+
+  async def drain(self) -> None:
+    sys.stdout.buffer.flush()
+
+  def close(self) -> None:
+    sys.stdout.buffer.flush()
+
+
+async def serve(args: argparse.Namespace) -> None:
+  async with SignatureService(args.max_batch, args.max_delay,
+                              args.workers) as service:
+    server = Server(service)
+    if args.unix:
+      listener = await asyncio.start_unix_server(server.handle, args.unix)
+    elif args.port:
+      listener = await asyncio.start_server(server.handle, '127.0.0.1',
+                                            args.port)
+    else:
+      stdio = _Stdio()
+      await server.handle(stdio, stdio)  # type: ignore
+      return
+    async with listener:
+      await listener.serve_forever()
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(
+      description="Signature service, on stdio unless --unix or --port.")
+  parser.add_argument('--unix', help='listen on this unix socket path')
+  parser.add_argument('--port', type=int, help='listen on localhost:port')
+  parser.add_argument('--max-batch', type=int, default=64)
+  parser.add_argument('--max-delay', type=float, default=0.005)
+  parser.add_argument('--workers', type=int)
+  asyncio.run(serve(parser.parse_args()))
+
+
+if __name__ == '__main__':
+  main()
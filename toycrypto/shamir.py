@@ -0,0 +1,184 @@
+"""Shamir's threshold secret sharing over Z(p).
+
+A secret s is shared by a random polynomial f of degree threshold - 1
+over Z(p) with f(0) = s, and party x gets f(x) for x = 1, ..., n. Any
+threshold shares determine f(0) by Lagrange interpolation, fewer reveal
+nothing about it.
+
+split does this for one secret with POF, splitMany for many secrets at
+once on raw ints. As the share points are small, Horner's scheme runs
+without any reduction, and each share is reduced once at the end.
+Reconstruction caches the Lagrange coefficients per set of share points,
+so every further secret shared among the same parties costs one dot
+product. splitStream and combineStream work on files in fixed-size
+chunks, each share file being a sequence of wire.IntCodec records.
+"""
+import collections
+import operator
+import random
+
+from toycrypto import wire
+from toycrypto.base import interned
+from toycrypto.pof import POF
+from toycrypto.primefields import Z
+from typing import BinaryIO, Dict, List, Optional, Sequence, Tuple
+
+# The smallest prime above 2^256, so that any 32-byte chunk is a secret.
+PRIME = 2**256 + 297
+
+Share = collections.namedtuple("Share", ["x", "y"])
+
+
+class Shamir(object):
+  """Sharing among n parties, any threshold of which can reconstruct."""
+
+  def __init__(self,
+               threshold: int,
+               n: int,
+               field: Optional[Z] = None,
+               rng: Optional[random.Random] = None):
+    self.field = field or interned(Z, PRIME)
+    if not 1 <= threshold <= n < self.field.order:
+      raise ValueError("Need 1 <= threshold <= n < p")
+    self.threshold = threshold
+    self.n = n
+    self.pof = POF(self.field)
+    self.rng = rng or random.SystemRandom()
+    self._lagrange: Dict[Tuple[int, ...], List[int]] = {}
+
+  def polynomial(self, secret: int) -> POF.Element:
+    """A random polynomial of degree threshold - 1 with secret at 0."""
+    p = self.field.order
+    return self.pof.make(
+        [secret % p] +
+        [self.rng.randrange(p) for i in range(self.threshold - 1)])
+
+  def split(self, secret: int) -> List[Share]:
+    f = self.polynomial(secret)
+    shares = []
+    for x in range(1, self.n + 1):
+      xe = self.field.make(x)
+      y = self.field.plusID()
+      for i in range(self.threshold - 1, -1, -1):
+        y = self.field.plus(self.field.mul(y, xe), f.getCoefficient(i))
+      shares.append(Share(x, y))
+    return shares
+
+  def splitMany(self, secrets: Sequence[int]) -> List[List[int]]:
+    """Shares of every secret, as a list per party x = 1, ..., n."""
+    p = self.field.order
+    rand = self.rng.randrange
+    coefficients = [[
+        s % p for s in secrets
+    ]] + [[rand(p) for s in secrets] for i in range(self.threshold - 1)]
+    coefficients.reverse()
+    shares = []
+    for x in range(1, self.n + 1):
+      # f(x) < threshold x^(threshold-1) p, reduced only once.
+      ys = coefficients[0]
+      for c in coefficients[1:]:
+        ys = [y * x + a for (y, a) in zip(ys, c)]
+      shares.append([y % p for y in ys])
+    return shares
+
+  def lagrange(self, xs: Sequence[int]) -> List[int]:
+    """The coefficients l_i with f(0) = sum l_i f(x_i), cached per xs.
+
+    l_i = prod_{j != i} x_j / (x_j - x_i), with all denominators inverted
+    by one batch inversion.
+    """
+    key = tuple(xs)
+    if key not in self._lagrange:
+      if len(set(key)) != len(key) or len(key) < self.threshold:
+        raise ValueError("Need %d distinct share points, got %r" %
+                         (self.threshold, key))
+      p = self.field.order
+      numerators = []
+      denominators = []
+      for xi in key:
+        (num, den) = (1, 1)
+        for xj in key:
+          if xj != xi:
+            num = num * xj % p
+            den = den * (xj - xi) % p
+        numerators.append(num)
+        denominators.append(self.field.make(den))
+      inverses = self.field.batchMulInv(denominators)
+      self._lagrange[key] = [
+          n * int(i) % p for (n, i) in zip(numerators, inverses)
+      ]
+    return self._lagrange[key]
+
+  def combine(self, shares: Sequence[Share]) -> Z.Element:
+    """The secret from at least threshold shares of it."""
+    l = self.lagrange([s.x for s in shares])
+    return self.field.make(
+        sum(map(operator.mul, l, [int(s.y) for s in shares])) %
+        self.field.order)
+
+  def combineMany(self, xs: Sequence[int],
+                  shares: Sequence[Sequence[int]]) -> List[int]:
+    """The secrets from splitMany's lists for the parties xs."""
+    l = self.lagrange(xs)
+    p = self.field.order
+    return [sum(map(operator.mul, l, ys)) % p for ys in zip(*shares)]
+
+  def splitStream(self,
+                  src: BinaryIO,
+                  shares: Sequence[BinaryIO],
+                  chunkSize: int = 32,
+                  batch: int = 1024) -> int:
+    """Shares src chunkSize bytes at a time, to the n files in shares.
+
+    Reads batch chunks at a time, so memory use doesn't depend on the size
+    of src. The last chunk is padded with zeros. Returns the number of
+    bytes read.
+    """
+    if len(shares) != self.n:
+      raise ValueError("Expected %d share files, got %d" %
+                       (self.n, len(shares)))
+    if 256**chunkSize > self.field.order:
+      raise ValueError("Chunks of %d bytes don't fit into Z(p)" % chunkSize)
+    codec = self.codec()
+    total = 0
+    while True:
+      data = src.read(chunkSize * batch)
+      if not data:
+        return total
+      total += len(data)
+      data += bytes(-len(data) % chunkSize)
+      secrets = [
+          int.from_bytes(data[i:i + chunkSize], 'big')
+          for i in range(0, len(data), chunkSize)
+      ]
+      for (f, ys) in zip(shares, self.splitMany(secrets)):
+        wire.writeRecords(f, codec, ys)
+
+  def combineStream(self,
+                    shares: Dict[int, BinaryIO],
+                    dst: BinaryIO,
+                    length: int,
+                    chunkSize: int = 32,
+                    batch: int = 1024) -> None:
+    """Writes the length bytes shared by splitStream to dst.
+
+    shares maps at least threshold parties x to their share files.
+    """
+    codec = self.codec()
+    xs = sorted(shares)[:self.threshold]
+    while length > 0:
+      count = min(batch, -(-length // chunkSize))
+      columns = []
+      for x in xs:
+        buf = shares[x].read(count * codec.size)
+        if len(buf) != count * codec.size:
+          raise ValueError("Share file of party %d ends early" % x)
+        columns.append(list(wire.RecordView(buf, codec)))
+      data = b''.join(
+          s.to_bytes(chunkSize, 'big') for s in self.combineMany(xs, columns))
+      dst.write(data[:length])
+      length -= len(data)
+
+  def codec(self) -> wire.IntCodec:
+    """The codec of the records in share files."""
+    return wire.IntCodec(((self.field.order - 1).bit_length() + 7) // 8)
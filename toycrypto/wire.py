@@ -0,0 +1,240 @@
+"""Fixed-width binary encodings and lazy bulk loading.
+
+Every codec has a fixed size in bytes, an encode method returning exactly
+that many bytes and a decode method taking any bytes-like object of that
+size. Since all records of a codec have the same size, RecordView can index
+into a buffer or memory mapped file of concatenated records directly, and
+only decodes the records that get accessed.
+
+All integers are big-endian. Polynomial coefficients are stored from x^0
+upwards.
+"""
+import collections.abc
+import mmap
+import weakref
+
+from toycrypto.ec import EC
+from toycrypto.pof import POF
+from toycrypto.primefields import Z
+from typing import Any, Iterable, Optional, Tuple, Union
+
+
+def _byteLength(order: int) -> int:
+  return ((order - 1).bit_length() + 7) // 8
+
+
+class IntCodec(object):
+  """Non-negative integers of up to size bytes."""
+
+  def __init__(self, size: int):
+    self.size = size
+
+  def encode(self, n: int) -> bytes:
+    return n.to_bytes(self.size, 'big')
+
+  def decode(self, buf: Any) -> int:
+    return int.from_bytes(buf, 'big')
+
+
+class ScalarCodec(object):
+  """Elements of Z(n), in as many bytes as n - 1 needs."""
+
+  def __init__(self, field: Z):
+    self.field = field
+    self.size = _byteLength(field.order)
+
+  def encode(self, e: Z.Element) -> bytes:
+    return int(e).to_bytes(self.size, 'big')
+
+  def decode(self, buf: Any) -> Z.Element:
+    value = int.from_bytes(buf, 'big')
+    if value >= self.field.order:
+      raise ValueError("Scalar out of range for %s" % self.field)
+    return self.field.make(value)
+
+
+class PointCodec(object):
+  """Points of an EC over Z(p), SEC1 encoded.
+
+  To keep the width fixed, the point at infinity is a zero byte followed by
+  zero bytes in place of the coordinates.
+  """
+
+  def __init__(self, ec: EC, compressed: bool = True):
+    self.ec = ec
+    self.compressed = compressed
+    self.size = 1 + ec.byteLength() * (1 if compressed else 2)
+
+  def encode(self, P: EC.Element) -> bytes:
+    if P.isPlusID():
+      return bytes(self.size)
+    return P.encode(self.compressed)
+
+  def decode(self, buf: Any) -> EC.Element:
+    mv = memoryview(buf)
+    if len(mv) != self.size:
+      raise ValueError("Expected %d bytes, got %d" % (self.size, len(mv)))
+    if mv[0] == 0:
+      if any(mv[1:]):
+        raise ValueError("Invalid encoding of the point at infinity")
+      return self.ec.plusID()
+    (P, _) = self.ec._decodeAt(mv, 0)
+    return P
+
+
+class PolynomialCodec(object):
+  """Polynomials over Z(n) with a fixed number of coefficients.
+
+  For GFPOFs, the number of coefficients defaults to the degree of the
+  reduction polynomial.
+  """
+
+  def __init__(self, pof: POF, length: Optional[int] = None):
+    if length is None:
+      length = pof.rp.getDegree()
+    self.pof = pof
+    self.length = length
+    self.coefficient = ScalarCodec(pof.field)
+    self.size = length * self.coefficient.size
+
+  def encode(self, pol: POF.Element) -> bytes:
+    degree = pol.getDegree()
+    if degree is not None and degree >= self.length:
+      raise ValueError("Polynomial of degree %d doesn't fit into %d "
+                       "coefficients" % (degree, self.length))
+    return b''.join(
+        self.coefficient.encode(pol.getCoefficient(i))
+        for i in range(self.length))
+
+  def decode(self, buf: Any) -> POF.Element:
+    mv = memoryview(buf)
+    step = self.coefficient.size
+    pol = self.pof.plusID()
+    for i in range(self.length):
+      pol.setCoefficient(i,
+                         self.coefficient.decode(mv[i * step:(i + 1) * step]))
+    return pol
+
+
+class TupleCodec(object):
+  """Concatenation of other codecs, decoding to a tuple."""
+
+  def __init__(self, *codecs: Any):
+    self.codecs = codecs
+    self.size = sum(c.size for c in codecs)
+
+  def encode(self, values: Iterable[Any]) -> bytes:
+    values = tuple(values)
+    if len(values) != len(self.codecs):
+      raise ValueError("Expected %d values, got %d" %
+                       (len(self.codecs), len(values)))
+    return b''.join(c.encode(v) for (c, v) in zip(self.codecs, values))
+
+  def decode(self, buf: Any) -> Tuple[Any, ...]:
+    mv = memoryview(buf)
+    result = []
+    pos = 0
+    for c in self.codecs:
+      result.append(c.decode(mv[pos:pos + c.size]))
+      pos += c.size
+    return tuple(result)
+
+
+class SignatureCodec(TupleCodec):
+  """Signatures as the scalar s followed by the compressed point K."""
+
+  def __init__(self) -> None:
+    # Imported here, so that importing this module doesn't build the curve.
+    from toycrypto.asymmetric import Signature
+    self.signature = Signature
+    super(SignatureCodec, self).__init__(ScalarCodec(Signature.nF),
+                                         PointCodec(Signature.Hfield.ec))
+
+  def decode(self, buf: Any) -> Any:
+    return self.signature(*super(SignatureCodec, self).decode(buf))
+
+
+class RecordView(collections.abc.Sequence):
+  """Read-only sequence of the records in a buffer, decoded on access.
+
+  The buffer is never copied: records are decoded straight from
+  memoryview slices when they are accessed, and slicing a RecordView gives
+  another view of the same buffer.
+  """
+
+  def __init__(self, buf: Any, codec: Any):
+    self.codec = codec
+    self._mmap: Optional[mmap.mmap] = None
+    # Slices of this view, which close releases as well.
+    self._slices: 'weakref.WeakSet[RecordView]' = weakref.WeakSet()
+    self.mv = memoryview(buf).cast('B')
+    if len(self.mv) % codec.size:
+      raise ValueError("Buffer of %d bytes is not a multiple of the %d byte "
+                       "record size" % (len(self.mv), codec.size))
+
+  @classmethod
+  def open(cls, path: str, codec: Any) -> 'RecordView':
+    """Maps the file at path into memory and views its records.
+
+    Use as a context manager or call close, to unmap the file again.
+    """
+    with open(path, 'rb') as f:
+      mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = cls(mm, codec)
+    view._mmap = mm
+    return view
+
+  def close(self) -> None:
+    """Releases the view and its slices, and unmaps an opened file.
+
+    Memoryviews from raw that are still alive keep the mapping open. It is
+    then unmapped as soon as the last of them is released or collected.
+    """
+    for view in list(self._slices):
+      view.close()
+    self.mv.release()
+    if self._mmap is not None:
+      try:
+        self._mmap.close()
+      except BufferError:
+        # Dropping our reference leaves the unmapping to the last export.
+        pass
+      self._mmap = None
+
+  def __enter__(self) -> 'RecordView':
+    return self
+
+  def __exit__(self, *args: Any) -> None:
+    self.close()
+
+  def __len__(self) -> int:
+    return len(self.mv) // self.codec.size
+
+  def raw(self, i: int) -> memoryview:
+    """The undecoded bytes of record i."""
+    if i < 0:
+      i += len(self)
+    if not 0 <= i < len(self):
+      raise IndexError("Record index out of range")
+    return self.mv[i * self.codec.size:(i + 1) * self.codec.size]
+
+  def __getitem__(self, i: Union[int, slice]) -> Any:
+    if isinstance(i, slice):
+      (start, stop, step) = i.indices(len(self))
+      if step != 1:
+        raise ValueError("RecordView only supports contiguous slices")
+      size = self.codec.size
+      view = RecordView(self.mv[start * size:max(start, stop) * size],
+                        self.codec)
+      self._slices.add(view)
+      return view
+    return self.codec.decode(self.raw(i))
+
+
+def writeRecords(f: Any, codec: Any, values: Iterable[Any]) -> int:
+  """Writes the encoded values to the binary file f, returns their count."""
+  n = 0
+  for v in values:
+    f.write(codec.encode(v))
+    n += 1
+  return n
@@ -0,0 +1,309 @@
+"""Vectors of Z elements stored as raw values, with element-wise arithmetic.
+
+A ZVector holds many elements of one Z without an object per element. With
+NumPy and a modulus below SMALL_MODULUS, the values live in an int64 array,
+where the product of two values still fits, so every operation is a single
+NumPy call. Larger moduli use an object array of Python ints, and without
+NumPy a plain list of ints, behind the same interface.
+
+Indexing gives Z.Elements, and vectors can be built from ints or elements,
+so int() and Z.make work across both. fromPOF and toPOF convert to and from
+dense coefficient vectors, and convolve multiplies those by Kronecker
+substitution: both vectors are packed into one big integer each, the two
+integers multiplied with Python's subquadratic multiplication, and the
+product unpacked again. POF.mul uses this for large polynomials over Z,
+and PolyMod for arithmetic modulo a fixed polynomial, which is behind
+POF.Element.powMod and the polyfactor module.
+"""
+import operator
+
+from toycrypto.base import opNWindow
+from toycrypto.primefields import Z
+from typing import Any, Iterable, Iterator, List, Sequence, Union
+
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
+# Below this modulus, products of two values fit into an int64.
+SMALL_MODULUS = 2**31
+
+
+class ZVector(object):
+  """A vector of elements of field, see the module documentation."""
+
+  def __init__(self, field: Z, values: Iterable[Any]):
+    self.field = field
+    self.p = field.order
+    self.values = self._store([int(v) % self.p for v in values])
+
+  def _store(self, ints: List[int]) -> Any:
+    if numpy is None:
+      return ints
+    if self.p < SMALL_MODULUS:
+      return numpy.array(ints, dtype=numpy.int64)
+    array = numpy.empty(len(ints), dtype=object)
+    array[:] = ints
+    return array
+
+  def _new(self, values: Any) -> 'ZVector':
+    """A vector of the same field holding the reduced values."""
+    v = ZVector.__new__(ZVector)
+    v.field = self.field
+    v.p = self.p
+    v.values = values
+    return v
+
+  @classmethod
+  def zeros(cls, field: Z, n: int) -> 'ZVector':
+    return cls(field, [0] * n)
+
+  def ints(self) -> List[int]:
+    if numpy is None:
+      return list(self.values)
+    return [int(v) for v in self.values]
+
+  def __len__(self) -> int:
+    return len(self.values)
+
+  def __getitem__(self, i: Union[int, slice]) -> Any:
+    if isinstance(i, slice):
+      return self._new(self.values[i])
+    return self.field.make(int(self.values[i]))
+
+  def __iter__(self) -> Iterator[Z.Element]:
+    make = self.field.make
+    return (make(v) for v in self.ints())
+
+  def __eq__(self, other: object) -> bool:
+    return (isinstance(other, ZVector) and self.field == other.field and
+            self.ints() == other.ints())
+
+  def __repr__(self) -> str:
+    return "ZVector(%s, %r)" % (self.field, self.ints())
+
+  def _operand(self, other: Any) -> Any:
+    """Raw values of other, a ZVector of the same length, or a scalar."""
+    if isinstance(other, ZVector):
+      if other.field != self.field or len(other) != len(self):
+        raise ValueError("Vectors of different fields or lengths")
+      return other.values
+    return int(other) % self.p
+
+  def plus(self, other: Any) -> 'ZVector':
+    b = self._operand(other)
+    p = self.p
+    if numpy is not None:
+      return self._new((self.values + b) % p)
+    if isinstance(b, int):
+      return self._new([(x + b) % p for x in self.values])
+    return self._new([(x + y) % p for (x, y) in zip(self.values, b)])
+
+  def minus(self, other: Any) -> 'ZVector':
+    b = self._operand(other)
+    p = self.p
+    if numpy is not None:
+      return self._new((self.values - b) % p)
+    if isinstance(b, int):
+      return self._new([(x - b) % p for x in self.values])
+    return self._new([(x - y) % p for (x, y) in zip(self.values, b)])
+
+  def mul(self, other: Any) -> 'ZVector':
+    """Element-wise product with a vector, or product with a scalar."""
+    b = self._operand(other)
+    p = self.p
+    if numpy is not None:
+      return self._new(self.values * b % p)
+    if isinstance(b, int):
+      return self._new([x * b % p for x in self.values])
+    return self._new([x * y % p for (x, y) in zip(self.values, b)])
+
+  def plusInv(self) -> 'ZVector':
+    if numpy is not None:
+      return self._new(-self.values % self.p)
+    return self._new([-x % self.p for x in self.values])
+
+  def pow(self, e: int) -> 'ZVector':
+    """Every element to the e-th power."""
+    if e < 0:
+      raise ValueError("Exponent %d can't be negative" % e)
+    p = self.p
+    if numpy is None or self.values.dtype == object:
+      return self._new(self._store([pow(x, e, p) for x in self.ints()]))
+    # Square and multiply, one NumPy call per step for all elements.
+    result = numpy.ones(len(self), dtype=numpy.int64)
+    base = self.values.copy()
+    while e:
+      if e & 1:
+        result = result * base % p
+      base = base * base % p
+      e >>= 1
+    return self._new(result)
+
+  def mulInv(self) -> 'ZVector':
+    """Every element inverted, raising ZeroDivisionError on zeros.
+
+    Small moduli use Fermat's little theorem, x^(p-2), as a vectorised pow.
+    Otherwise Montgomery's trick needs a single inversion for all.
+    """
+    p = self.p
+    ints = self.ints()
+    if 0 in ints:
+      raise ZeroDivisionError("Can't invert a vector containing zero")
+    if numpy is not None and self.values.dtype != object:
+      return self.pow(p - 2)
+    if not ints:
+      return self
+    prefix = [ints[0]]
+    for x in ints[1:]:
+      prefix.append(prefix[-1] * x % p)
+    inv = self.field.backend.invert(prefix[-1], self.field.modulus)
+    result = [0] * len(ints)
+    for i in range(len(ints) - 1, 0, -1):
+      result[i] = inv * prefix[i - 1] % p
+      inv = inv * ints[i] % p
+    result[0] = inv
+    return self._new(self._store(result))
+
+  def dot(self, other: 'ZVector') -> Z.Element:
+    b = self._operand(other)
+    if numpy is not None and self.values.dtype != object:
+      # Reduce the products first, so that their sum can't overflow.
+      return self.field.make(int((self.values * b % self.p).sum()) % self.p)
+    return self.field.make(
+        sum(map(operator.mul, self.ints(), list(b))) % self.p)
+
+  def sum(self) -> Z.Element:
+    return self.field.make(sum(self.ints()) % self.p)
+
+  def convolve(self, other: 'ZVector') -> 'ZVector':
+    """The coefficients of the product of the two polynomials."""
+    if other.field != self.field:
+      raise ValueError("Vectors of different fields")
+    return self._new(self._store(convolve(self.ints(), other.ints(), self.p)))
+
+  @classmethod
+  def fromPOF(cls, poly: Any, length: int = 0) -> 'ZVector':
+    """Dense coefficients of a POF over Z, x^0 first, padded to length."""
+    degree = poly.getDegree()
+    n = max(length, 0 if degree is None else degree + 1)
+    ints = [0] * n
+    for (k, v) in poly.c.items():
+      ints[k] = int(v.value)
+    v = cls.__new__(cls)
+    v.field = poly.pof.field
+    v.p = v.field.order
+    v.values = v._store(ints)
+    return v
+
+  def toPOF(self, pof: Any) -> Any:
+    """The polynomial in pof with these coefficients, x^0 first."""
+    return pof.make({k: v for (k, v) in enumerate(self.ints()) if v})
+
+
+def convolve(a: Sequence[int], b: Sequence[int], p: int) -> List[int]:
+  """The coefficients of the product of polynomials a and b over Z(p).
+
+  Coefficients are ints in [0, p), x^0 first. Every coefficient of the
+  product is a sum of at most min(len) products below p^2, which gives the
+  width of its slot in the packed integers.
+  """
+  if not a or not b:
+    return []
+  bits = 2 * (p - 1).bit_length() + min(len(a), len(b)).bit_length()
+  width = (bits + 7) // 8
+  product = _pack(a, width) * _pack(b, width)
+  n = len(a) + len(b) - 1
+  buf = product.to_bytes(n * width, 'little')
+  return [
+      int.from_bytes(buf[i:i + width], 'little') % p
+      for i in range(0, n * width, width)
+  ]
+
+
+class PolyMod(object):
+  """Dense polynomials over Z(p) modulo a fixed polynomial m of degree n.
+
+  Polynomials are lists of n ints, x^0 first. Products are reduced with
+  Barrett's method: the inverse of the reversed modulus as a power series
+  is computed once, after which a remainder costs two convolutions rather
+  than a long division.
+  """
+
+  def __init__(self, m: Sequence[int], p: int):
+    m = [x % p for x in m]
+    while m and not m[-1]:
+      m.pop()
+    if len(m) < 2:
+      raise ValueError("The modulus needs a positive degree")
+    # Remainders modulo m and modulo the monic c m are the same.
+    lead = pow(m[-1], -1, p)
+    self.m = [x * lead % p for x in m]
+    self.p = p
+    self.n = len(m) - 1
+    self._inverse = _seriesInverse(self.m[::-1], self.n - 1, p)
+    self._frobenius = [self.reduce([0, 1])]
+
+  def reduce(self, a: Sequence[int]) -> List[int]:
+    """a modulo m, for any a."""
+    (n, p) = (self.n, self.p)
+    a = list(a)
+    if len(a) <= n:
+      return a + [0] * (n - len(a))
+    if len(a) > 2 * n - 1:
+      return self.reduce(_remainder(a, self.m, p))
+    # With k quotient coefficients, the reversed quotient is the reversed
+    # a times the inverse of the reversed m, modulo x^k.
+    k = len(a) - n
+    q = convolve(a[::-1][:k], self._inverse[:k], p)[:k][::-1]
+    qm = convolve(q, self.m, p)
+    return [(x - y) % p for (x, y) in zip(a[:n], qm)]
+
+  def one(self) -> List[int]:
+    return self.reduce([1])
+
+  def mul(self, a: Sequence[int], b: Sequence[int]) -> List[int]:
+    return self.reduce(convolve(a, b, self.p))
+
+  def pow(self, a: Sequence[int], e: int) -> List[int]:
+    return opNWindow(list(a), e, self.one(), self.mul)
+
+  def frobenius(self, i: int) -> List[int]:
+    """x^(p^i) modulo m, each computed once from the previous one."""
+    while len(self._frobenius) <= i:
+      self._frobenius.append(self.pow(self._frobenius[-1], self.p))
+    return self._frobenius[i]
+
+
+def _seriesInverse(f: Sequence[int], k: int, p: int) -> List[int]:
+  """g with f g = 1 modulo x^k, for f[0] = 1, by Newton iteration."""
+  if k <= 0:
+    return []
+  g = [1]
+  precision = 1
+  while precision < k:
+    precision = min(2 * precision, k)
+    e = [-x % p for x in convolve(f[:precision], g, p)[:precision]]
+    e[0] = (e[0] + 2) % p
+    g = convolve(g, e, p)[:precision]
+  return g + [0] * (k - len(g))
+
+
+def _remainder(a: Sequence[int], m: Sequence[int], p: int) -> List[int]:
+  """a modulo the monic m, by long division."""
+  r = list(a)
+  n = len(m) - 1
+  terms = [(i, c) for (i, c) in enumerate(m[:-1]) if c]
+  for top in range(len(r) - 1, n - 1, -1):
+    q = r[top]
+    if q:
+      shift = top - n
+      for (i, c) in terms:
+        r[shift + i] = (r[shift + i] - q * c) % p
+  return r[:n]
+
+
+def _pack(ints: Sequence[int], width: int) -> int:
+  return int.from_bytes(b''.join(x.to_bytes(width, 'little') for x in ints),
+                        'little')